@@ -0,0 +1,5 @@
+"""
+Throughput benchmarks for the lib modules
+Run a module directly, e.g. python -m benchmarks.bench_serialization_utils
+The regression tracking suite runs with python -m benchmarks.suite or python -m pytest benchmarks
+"""
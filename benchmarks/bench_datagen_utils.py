@@ -0,0 +1,74 @@
+"""
+Throughput benchmarks for lib.datagen_utils
+Compares one random_string call per value with schema batches, and writing each format serially and in a process pool.
+"""
+import argparse
+import datetime
+import io
+import os
+import random
+
+from benchmarks.timing import best_of, print_table
+from lib import random_utils
+from lib.datagen_utils import FORMATS, ChoiceField, DataGenerator, DateField, FloatField, IntField, RecordSchema, \
+    StringField
+
+SCHEMA = RecordSchema({
+    'name': StringField(12, include_digits=False),
+    'email': StringField(20, include_uppercase=False),
+    'age': IntField(18, 90),
+    'score': FloatField(0.0, 100.0, digits=2),
+    'joined': DateField(datetime.date(2015, 1, 1), datetime.date(2024, 12, 31), iso_format=True),
+    'plan': ChoiceField(['free', 'pro', 'team', 'enterprise']),
+})
+
+
+def one_at_a_time(count: int) -> list:
+    """ The original approach: one random_string call per string value"""
+    start = datetime.date(2015, 1, 1).toordinal()
+    return [{'name': random_utils.random_letters_string(12),
+             'email': random_utils.random_lowercase_string(20, include_digits=True),
+             'age': random.randint(18, 90),
+             'score': round(random.uniform(0.0, 100.0), 2),
+             'joined': datetime.date.fromordinal(start + random.randrange(3653)).isoformat(),
+             'plan': random.choice(['free', 'pro', 'team', 'enterprise'])} for _ in range(count)]
+
+
+def bench_records(count: int, repeat: int):
+    """ Time building records one value at a time against schema batches, reporting records per second"""
+    generator = DataGenerator(SCHEMA, seed=1)
+    baseline = count / best_of(lambda: one_at_a_time(count), repeat)
+    batched = count / best_of(lambda: sum(len(batch) for batch in generator.iter_batches(count)), repeat)
+    print_table(f'Record generation, {count:,} records per run, records per second',
+                ['one at a time', 'batches', 'speedup'], [[baseline, batched, f'{batched / baseline:.1f}x']])
+
+
+def bench_write(count: int, repeat: int, workers: int):
+    """ Time writing each format from one process and from a process pool, reporting records per second"""
+    generator = DataGenerator(SCHEMA, seed=1, shard_size=max(1, count // (4 * workers)))
+    rows = []
+    for fmt in FORMATS:
+        serial = count / best_of(lambda fmt=fmt: generator.write(io.BytesIO(), count, fmt, max_workers=1), repeat)
+        pooled = count / best_of(lambda fmt=fmt: generator.write(io.BytesIO(), count, fmt, max_workers=workers),
+                                 repeat)
+        rows.append([fmt, serial, pooled])
+    print_table(f'Writing {count:,} records, records per second', ['format', '1 process', f'{workers} processes'],
+                rows)
+
+
+def main():
+    """ Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=200000, help='Records per run')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement, best is reported')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes for pooled writes')
+    parser.add_argument('--only', choices=['records', 'write'], help='Run a single benchmark')
+    args = parser.parse_args()
+    if args.only in (None, 'records'):
+        bench_records(args.count, args.repeat)
+    if args.only in (None, 'write'):
+        bench_write(args.count, args.repeat, args.workers)
+
+
+if __name__ == '__main__':
+    main()
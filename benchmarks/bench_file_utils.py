@@ -0,0 +1,144 @@
+"""
+Throughput benchmarks for lib.file_utils
+Compares auditing a directory tree with os.walk and check_permissions per path against scan_permissions, and the
+memory and query cost of nested dicts against PermissionTable, repeated checks against PermissionCache, and
+per-file access checks against AccessContext batches.
+"""
+import argparse
+import os
+import stat
+import tempfile
+import tracemalloc
+
+from benchmarks.timing import best_of, print_table
+from lib.file_utils import AccessContext, PermissionCache, PermissionEntry, PermissionTable, _permission_dict, \
+    check_permissions, scan_permissions
+
+
+def make_tree(root: str, dirs: int, files_per_dir: int):
+    """ A two level tree of dirs directories holding files_per_dir empty files each"""
+    for index in range(dirs):
+        directory = os.path.join(root, f'd{index // 32}', f'd{index}')
+        os.makedirs(directory)
+        for number in range(files_per_dir):
+            open(os.path.join(directory, f'f{number}'), 'w').close()
+
+
+def walk_and_check(root: str) -> int:
+    """ The original approach: os.walk plus check_permissions on every path"""
+    count = 0
+    for directory, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            check_permissions(os.path.join(directory, name))
+            count += 1
+    return count
+
+
+def bench_scan(dirs: int, files_per_dir: int, repeat: int, workers: list):
+    """ Time each way of visiting every entry of a generated tree, reporting entries per second"""
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, dirs, files_per_dir)
+        entries = walk_and_check(root)
+        rows = [['os.walk + check_permissions', entries / best_of(lambda: walk_and_check(root), repeat)]]
+        for count in workers:
+            def scan(count=count):
+                return sum(1 for _ in scan_permissions(root, max_workers=count))
+            rows.append([f'scan_permissions, {count} thread(s)', entries / best_of(scan, repeat)])
+    print_table(f'Permission audit of {entries:,} entries, entries per second', ['method', 'entries/s'], rows)
+
+
+def allocated(build) -> tuple:
+    """ The result of build and the bytes it left allocated"""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def bench_storage(count: int, repeat: int):
+    """ Bytes per result and group-writable query time for nested dicts against a PermissionTable"""
+    entries = [PermissionEntry(f'/data/{index}', 0o100644 | (index % 3 == 0) * stat.S_IWGRP, 1000, 1000, False)
+               for index in range(count)]
+    dicts, dict_bytes = allocated(lambda: {entry.path: _permission_dict(entry.mode) for entry in entries})
+    table, table_bytes = allocated(lambda: PermissionTable(entries))
+    # the path strings are shared by both containers, so they are not part of either measurement
+    dict_query = best_of(lambda: [path for path, perm in dicts.items() if perm['group']['write']], repeat)
+    table_query = best_of(lambda: table.filter('group_writable'), repeat)
+    print_table(f'Holding {count:,} results', ['container', 'bytes/entry', 'group writable query (ms)'],
+                [['nested dicts', dict_bytes / count, dict_query * 1000],
+                 ['PermissionTable', table_bytes / count, table_query * 1000]])
+
+
+def bench_cache(calls: int, repeat: int):
+    """ Checks per second of check_permissions against each PermissionCache mode, over a handful of paths"""
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, 1, 8)
+        paths = [entry.path for entry in scan_permissions(root)]
+        rounds = range(calls // len(paths))
+
+        def run(check):
+            for _ in rounds:
+                for path in paths:
+                    check(path)
+
+        rows = [['check_permissions', calls / best_of(lambda: run(check_permissions), repeat)]]
+        modes = [('watch=None', {'watch': None}), ('auto watch', {}), ('validate', {'watch': None, 'validate': True})]
+        for label, options in modes:
+            with PermissionCache(**options) as cache:
+                rows.append([f'PermissionCache.check, {label}', calls / best_of(lambda: run(cache.check), repeat)])
+                rows.append([f'PermissionCache.get, {label}', calls / best_of(lambda: run(cache.get), repeat)])
+    print_table(f'Repeated checks of {len(paths)} paths, checks per second', ['method', 'checks/s'], rows)
+
+
+def stat_and_groups(path: str) -> int:
+    """ The original approach: stat plus getgroups for every file, then the mode bits by hand"""
+    st = os.stat(path)
+    if st.st_uid == os.geteuid():
+        return (st.st_mode >> 6) & 7
+    if st.st_gid in os.getgroups() or st.st_gid == os.getegid():
+        return (st.st_mode >> 3) & 7
+    return st.st_mode & 7
+
+
+def bench_access(dirs: int, files_per_dir: int, repeat: int):
+    """ Paths per second for effective access checks of every file in a generated tree"""
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, dirs, files_per_dir)
+        entries = list(scan_permissions(root))
+        paths = [entry.path for entry in entries]
+        context = AccessContext()
+        rows = [
+            ['stat + getgroups per path', len(paths) / best_of(lambda: [stat_and_groups(path) for path in paths],
+                                                               repeat)],
+            ['os.access x3 per path', len(paths) / best_of(
+                lambda: [[os.access(path, mode) for mode in (os.R_OK, os.W_OK, os.X_OK)] for path in paths], repeat)],
+            ['AccessContext.access_many', len(paths) / best_of(lambda: context.access_many(paths), repeat)],
+            ['access_many, acls', len(paths) / best_of(lambda: context.access_many(paths, acls=True), repeat)],
+            ['access_many, scan entries', len(paths) / best_of(lambda: context.access_many(entries), repeat)],
+        ]
+    print_table(f'Effective access of {len(paths):,} paths, paths per second', ['method', 'paths/s'], rows)
+
+
+def main():
+    """ Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dirs', type=int, default=200, help='Directories in the generated tree')
+    parser.add_argument('--files', type=int, default=100, help='Files per directory')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement, best is reported')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16], help='Thread counts to try')
+    parser.add_argument('--entries', type=int, default=1000000, help='Results held by the storage benchmark')
+    parser.add_argument('--only', choices=['scan', 'storage', 'cache', 'access'], help='Run a single benchmark')
+    args = parser.parse_args()
+    if args.only in (None, 'scan'):
+        bench_scan(args.dirs, args.files, args.repeat, args.workers)
+    if args.only in (None, 'storage'):
+        bench_storage(args.entries, args.repeat)
+    if args.only in (None, 'cache'):
+        bench_cache(args.entries, args.repeat)
+    if args.only in (None, 'access'):
+        bench_access(args.dirs, args.files, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Throughput benchmarks for lib.random_utils
+Compares the original one random.choice per character generator with the bulk random_strings engine, and the
+throughput of the RandomGenerator sources and of unique ID minting, and per call latency of StringPool.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.timing import best_of, print_table
+from lib import random_utils
+
+
+def per_character(count: int, length: int) -> list:
+    """ The original approach: rebuild the charset and call random.choice for every character"""
+    def one(size):
+        charset = ''
+        for name in ('lowercase', 'uppercase', 'digits'):
+            charset += random_utils.charsets[name]
+        return ''.join(random.choice(charset) for _ in range(size))
+    return [one(length) for _ in range(count)]
+
+
+def bench_strings(count: int, lengths: list, repeat: int):
+    """ Time per-character generation against single calls and the bulk API, reporting characters per second"""
+    rows = []
+    for length in lengths:
+        chars = count * length
+        baseline = chars / best_of(lambda: per_character(count, length), repeat)
+        single = chars / best_of(lambda: [random_utils.random_string(length) for _ in range(count)], repeat)
+        bulk = chars / best_of(lambda: random_utils.random_strings(count, length, include_punctuation=False), repeat)
+        rows.append([length, baseline, single, bulk, f'{bulk / baseline:.0f}x'])
+    print_table(f'Random strings, {count:,} strings per run, characters per second',
+                ['length', 'per-char', 'random_string', 'random_strings', 'bulk speedup'], rows)
+
+
+def bench_sources(count: int, lengths: list, repeat: int):
+    """ Time bulk generation from each RandomGenerator source, reporting characters per second"""
+    generators = {'global': random_utils.RandomGenerator('global'),
+                  'seeded': random_utils.RandomGenerator.seeded(1234),
+                  'secure': random_utils.RandomGenerator.secure()}
+    if random_utils.numpy is not None:
+        generators['numpy'] = random_utils.RandomGenerator('numpy', seed=1234)
+    rows = []
+    for length in lengths:
+        chars = count * length
+        row = [length]
+        for generator in generators.values():
+            row.append(chars / best_of(lambda gen=generator: gen.random_strings(count, length), repeat))
+        rows.append(row)
+    print_table(f'RandomGenerator sources, {count:,} strings per run, characters per second',
+                ['length'] + list(generators), rows)
+
+
+def retry_loop(count: int, length: int) -> set:
+    """ The original approach: one random_string per ID, retried until it is not in the issued set"""
+    issued = set()
+    for _ in range(count):
+        value = random_utils.random_string(length)
+        while value in issued:
+            value = random_utils.random_string(length)
+        issued.add(value)
+    return issued
+
+
+def bench_ids(count: int, lengths: list, repeat: int):
+    """ Time minting count unique IDs with each index, reporting IDs per second and index bytes per ID"""
+    rows = []
+    for length in lengths:
+        row = [length, count / best_of(lambda: retry_loop(count, length), repeat)]
+        sizes = []
+        for index in ('set', 'bloom'):
+            def mint(index=index):
+                minter = random_utils.UniqueIdGenerator(length, index=index, capacity=count,
+                                                        generator=random_utils.RandomGenerator.seeded(1))
+                minter.mint_batch(count)
+                sizes.append(minter.nbytes / count)
+            row.append(count / best_of(mint, repeat))
+        rows.append(row + [f'{sizes[0]:.1f}', f'{sizes[-1]:.1f}'])
+    print_table(f'Unique IDs, {count:,} per run, IDs per second and index bytes per ID',
+                ['length', 'retry loop', 'set', 'bloom', 'set B/ID', 'bloom B/ID'], rows)
+
+
+def latencies(func, count: int) -> list:
+    """ Sorted per call latencies of count calls, in microseconds"""
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(count):
+        started = clock()
+        func()
+        samples.append((clock() - started) / 1000)
+    return sorted(samples)
+
+
+def bench_pool(count: int, lengths: list):
+    """ Per call latency percentiles of random_string against a warm StringPool"""
+    rows = []
+    with random_utils.StringPool(capacity=count // 4) as pool:
+        for length in lengths:
+            pool.prefill(length)
+            for name, func in (('random_string', lambda: random_utils.random_string(length)),
+                               ('StringPool.get', lambda: pool.get(length))):
+                samples = latencies(func, count)
+                rows.append([length, name] + [f'{samples[int(len(samples) * q)]:.2f}' for q in (0.5, 0.99, 0.999)])
+        rows.append(['', 'pool stats', str(pool.stats.exhausted) + ' exhausted', f'{pool.stats.refill_rate:,.0f}/s',
+                     ''])
+    print_table(f'Per call latency, {count:,} calls, microseconds', ['length', 'source', 'p50', 'p99', 'p99.9'],
+                rows)
+
+
+def main():
+    """ Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=20000, help='Strings per run')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[8, 32, 128], help='String lengths to try')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement, best is reported')
+    parser.add_argument('--only', choices=['strings', 'sources', 'ids', 'pool'], help='Run a single benchmark')
+    args = parser.parse_args()
+    if args.only in (None, 'strings'):
+        bench_strings(args.count, args.lengths, args.repeat)
+    if args.only in (None, 'sources'):
+        bench_sources(args.count, args.lengths, args.repeat)
+    if args.only in (None, 'ids'):
+        bench_ids(args.count, args.lengths, args.repeat)
+    if args.only in (None, 'pool'):
+        bench_pool(args.count, args.lengths)
+
+
+if __name__ == '__main__':
+    main()
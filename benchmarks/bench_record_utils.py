@@ -0,0 +1,73 @@
+"""
+Throughput benchmarks for lib.record_utils
+Compares a list of dataclass records sent as one dict per record, via dataclasses.asdict or a hand written dict, with
+    RecordSerializer rows and columns, with and without validation, over each installed strategy.
+"""
+import argparse
+import dataclasses
+import typing
+
+from benchmarks.timing import best_of, print_table
+from lib.record_utils import RecordSerializer
+from lib.serialization_utils import JsonSerializer, MsgpackSerializer, PickleSerializer
+
+
+@dataclasses.dataclass(slots=True)
+class Reading:
+    """ A bulk transfer style record"""
+    sensor: int
+    host: str
+    value: float
+    ok: bool
+    labels: typing.List[str]
+
+
+def make_readings(count: int) -> typing.List[Reading]:
+    """ Build count readings"""
+    return [Reading(index, f'cidw-app-{index % 16:02d}', index * 0.25, index % 7 != 0, ['cpu', 'prod'])
+            for index in range(count)]
+
+
+def as_dict(reading: Reading) -> dict:
+    """ The dict a caller would build by hand instead of dataclasses.asdict"""
+    return {'sensor': reading.sensor, 'host': reading.host, 'value': reading.value, 'ok': reading.ok,
+            'labels': reading.labels}
+
+
+def bench_records(count: int, repeat: int):
+    """ Payload size and speed of dicts against generated rows and columns, per wrapped strategy"""
+    readings = make_readings(count)
+    strategies = [JsonSerializer(), JsonSerializer(backend='auto'), PickleSerializer()]
+    try:
+        strategies.append(MsgpackSerializer())
+    except ImportError:
+        pass
+    rows = []
+    for strategy in strategies:
+        blob = strategy([as_dict(reading) for reading in readings])
+        rows.append([repr(strategy), 'asdict', len(blob),
+                     best_of(lambda: strategy([dataclasses.asdict(r) for r in readings]), repeat) * 1000,
+                     best_of(lambda: [Reading(**d) for d in strategy(blob, deserialize=True)], repeat) * 1000])
+        rows.append([repr(strategy), 'hand written dict', len(blob),
+                     best_of(lambda: strategy([as_dict(r) for r in readings]), repeat) * 1000, ''])
+        for columnar in (False, True):
+            for validate in (False, True):
+                serializer = RecordSerializer(Reading, strategy, columnar=columnar, validate=validate)
+                blob = serializer(readings)
+                rows.append([repr(strategy), f"{'columns' if columnar else 'rows'}{', validated' if validate else ''}",
+                             len(blob), best_of(lambda: serializer(readings), repeat) * 1000,
+                             best_of(lambda: serializer(blob, deserialize=True), repeat) * 1000])
+    print_table(f'{count:,} records', ['strategy', 'layout', 'bytes', 'serialize ms', 'deserialize ms'], rows)
+
+
+def main():
+    """ Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000, help='Records per payload')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement, best is reported')
+    args = parser.parse_args()
+    bench_records(args.count, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Throughput benchmarks for lib.serialization_utils
+Compares per-object serialize/deserialize with the batch API in serial, thread and process pool modes,
+    the libyaml fast path of YamlSerializer with the pure python loader and dumper, each installed JSON backend,
+    payload size and speed of every strategy including MessagePack and CBOR, in-band against protocol 5
+    out-of-band pickling of large buffers, and the per-call cost of metrics instrumentation.
+"""
+import argparse
+
+from benchmarks.timing import best_of, print_table
+from lib.serialization_utils import CborSerializer, DataSerializer, InMemoryMetrics, JsonSerializer, \
+    MsgpackSerializer, PickleSerializer, SerializerMetrics, YamlSerializer, available_json_backends
+
+STRATEGIES = [JsonSerializer, YamlSerializer, PickleSerializer]
+
+
+def make_entries(count: int) -> list:
+    """ Build count small cache-entry style dicts"""
+    return [{'id': i, 'name': f'entry-{i}', 'tags': ['a', 'b', 'c'], 'attrs': {'size': i * 3, 'ok': True}}
+            for i in range(count)]
+
+
+def bench_batch(count: int, workers: int, repeat: int):
+    """ Time the single-call loop against serialize_many/deserialize_many in each pool mode"""
+    entries = make_entries(count)
+    rows = []
+    for strategy in STRATEGIES:
+        serializer = DataSerializer(strategy())
+        blobs = serializer.serialize_many(entries)
+        loop_s = best_of(lambda: [serializer.serialize(e) for e in entries], repeat)
+        loop_d = best_of(lambda: [serializer.deserialize(b) for b in blobs], repeat)
+        rows.append([strategy.__name__, 'per-call', count / loop_s, count / loop_d])
+        for pool in ('serial', 'thread', 'process'):
+            ser = best_of(lambda: serializer.serialize_many(entries, pool=pool, max_workers=workers), repeat)
+            des = best_of(lambda: serializer.deserialize_many(blobs, pool=pool, max_workers=workers), repeat)
+            rows.append([strategy.__name__, pool, count / ser, count / des])
+    print_table(f'Batch throughput, {count:,} entries, {workers} workers',
+                ['strategy', 'mode', 'serialize/s', 'deserialize/s'], rows)
+
+
+def make_config(services: int) -> dict:
+    """ Build a nested, config-file shaped document with the given number of service sections"""
+    return {
+        'version': 3,
+        'defaults': {'timeout': 30.0, 'retries': 5, 'log_level': 'INFO'},
+        'services': {
+            f'service-{i}': {
+                'image': f'registry.local/app-{i}:1.{i}.0',
+                'ports': [8000 + i, 9000 + i],
+                'env': {'DB_HOST': f'db{i % 4}.internal', 'POOL_SIZE': i % 16, 'DEBUG': i % 2 == 0},
+                'healthcheck': {'path': '/health', 'interval': 10.5, 'thresholds': [1, 3, 5]},
+                'volumes': [{'src': f'/srv/{i}/data', 'dst': '/data', 'ro': False}],
+            } for i in range(services)
+        },
+    }
+
+
+def bench_yaml(services: int, repeat: int):
+    """ Time YamlSerializer with and without libyaml for both loader choices"""
+    document = make_config(services)
+    rows = []
+    for loader in ('full', 'safe'):
+        timings = {}
+        for use_libyaml in (False, True):
+            serializer = YamlSerializer(loader=loader, use_libyaml=use_libyaml)
+            text = serializer(document)
+            timings[use_libyaml] = (best_of(lambda: serializer(document), repeat),
+                                    best_of(lambda: serializer(text, deserialize=True), repeat))
+            rows.append([repr(serializer), serializer.libyaml, timings[use_libyaml][0] * 1000,
+                         timings[use_libyaml][1] * 1000])
+        rows.append([f'speedup ({loader})', '', timings[False][0] / timings[True][0],
+                     timings[False][1] / timings[True][1]])
+    print_table(f'YAML config document, {services} services, {len(YamlSerializer()(document)):,} bytes',
+                ['serializer', 'libyaml', 'dump ms', 'load ms'], rows)
+
+
+def bench_json(count: int, repeat: int):
+    """ Time every installed JSON backend on a batch of entries, as str and as bytes"""
+    entries = make_entries(count)
+    rows = []
+    for backend in available_json_backends():
+        for binary in (False, True):
+            serializer = JsonSerializer(backend=backend, binary=binary)
+            blobs = [serializer(e) for e in entries]
+            ser = best_of(lambda: [serializer(e) for e in entries], repeat)
+            des = best_of(lambda: [serializer(b, deserialize=True) for b in blobs], repeat)
+            rows.append([backend, 'bytes' if binary else 'str', count / ser, count / des])
+    print_table(f'JSON backends, {count:,} entries', ['backend', 'output', 'serialize/s', 'deserialize/s'], rows)
+
+
+def make_metrics(points: int) -> dict:
+    """ Build a numeric heavy payload, the kind of metrics blob passed between servers"""
+    return {
+        'host': 'cidw-app-01',
+        'series': [{'ts': 1700000000 + i, 'cpu': i % 100 / 3.0, 'mem': 1024 * (i % 64), 'ok': i % 7 != 0}
+                   for i in range(points)],
+    }
+
+
+def bench_formats(points: int, repeat: int):
+    """ Compare payload size and speed of every strategy whose package is installed"""
+    payload = make_metrics(points)
+    rows = []
+    for factory in (JsonSerializer, YamlSerializer, PickleSerializer, MsgpackSerializer, CborSerializer):
+        try:
+            serializer = factory()
+        except ImportError:
+            continue
+        blob = serializer(payload)
+        ser = best_of(lambda: serializer(payload), repeat)
+        des = best_of(lambda: serializer(blob, deserialize=True), repeat)
+        rows.append([repr(serializer), f'{len(blob):,}', ser * 1000, des * 1000])
+    print_table(f'Formats, metrics payload of {points:,} points', ['strategy', 'bytes', 'dump ms', 'load ms'], rows)
+
+
+def bench_oob(megabytes: int, repeat: int):
+    """ Time a large-buffer round trip through the in-band pickle stream and through out-of-band parts"""
+    data = {'array': bytearray(megabytes * 1024 * 1024), 'meta': {'shape': [megabytes, 1024, 1024]}}
+    data_serializer = DataSerializer(PickleSerializer(protocol=5))
+    in_band = best_of(lambda: data_serializer.deserialize(data_serializer.serialize(data)), repeat)
+    out_of_band = best_of(lambda: data_serializer.deserialize_parts(data_serializer.serialize_parts(data)), repeat)
+    print_table(f'Pickle round trip of a {megabytes} MiB bytearray', ['mode', 'ms'],
+                [['in band', in_band * 1000], ['out of band', out_of_band * 1000]])
+
+
+def bench_metrics(count: int, repeat: int):
+    """ Per-call time of serialize and deserialize of a tiny payload without metrics, with an in-memory sink and
+        with 1 percent sampling"""
+    payload = {'id': 1, 'ok': True}
+    variants = [('disabled', None), ('InMemoryMetrics', SerializerMetrics(InMemoryMetrics())),
+                ('1% sampled', SerializerMetrics(InMemoryMetrics(), sample_rate=0.01))]
+    rows = []
+    for label, metrics in variants:
+        serializer = DataSerializer(PickleSerializer(), metrics=metrics)
+        blob = serializer.serialize(payload)
+        ser = best_of(lambda: [serializer.serialize(payload) for _ in range(count)], repeat)
+        des = best_of(lambda: [serializer.deserialize(blob) for _ in range(count)], repeat)
+        rows.append([label, ser / count * 1e9, des / count * 1e9])
+    print_table(f'Metrics overhead, {count:,} calls, nanoseconds per call', ['metrics', 'serialize', 'deserialize'],
+                rows)
+
+
+def main():
+    """ Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=20000, help='Objects per batch')
+    parser.add_argument('--workers', type=int, default=4, help='Pool workers')
+    parser.add_argument('--services', type=int, default=200, help='Service sections in the YAML document')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement, best is reported')
+    parser.add_argument('--points', type=int, default=10000, help='Data points in the format comparison payload')
+    parser.add_argument('--megabytes', type=int, default=256, help='Buffer size for the out-of-band pickle run')
+    parser.add_argument('--only', choices=['batch', 'yaml', 'json', 'formats', 'oob', 'metrics'],
+                        help='Run a single benchmark')
+    args = parser.parse_args()
+    if args.only in (None, 'batch'):
+        bench_batch(args.count, args.workers, args.repeat)
+    if args.only in (None, 'yaml'):
+        bench_yaml(args.services, args.repeat)
+    if args.only in (None, 'json'):
+        bench_json(args.count, args.repeat)
+    if args.only in (None, 'formats'):
+        bench_formats(args.points, args.repeat)
+    if args.only in (None, 'oob'):
+        bench_oob(args.megabytes, args.repeat)
+    if args.only in (None, 'metrics'):
+        bench_metrics(args.count, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Throughput benchmarks for lib.shm_utils
+Sends objects between forked processes through pipes, with MultipartPayload.writev and read, against shared memory:
+    one large object fanned out to several consumers through a segment they all load without copying, and streams
+    of small records and of large buffers through a SharedRingBuffer.
+"""
+import argparse
+import os
+import typing
+
+from benchmarks.timing import best_of, print_table
+from lib.serialization_utils import DataSerializer, MultipartPayload, PickleSerializer
+from lib.shm_utils import SharedRingBuffer, SharedSegment, share_object
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SERIALIZER = DataSerializer(PickleSerializer())
+
+
+def make_buffer(kib: int) -> typing.Any:
+    """ A large buffer, a NumPy array when available as those are loaded from a segment without a copy"""
+    return numpy.zeros(kib * 1024, numpy.uint8) if numpy is not None else bytearray(kib * 1024)
+
+
+def fork(run: typing.Callable[[], None]) -> int:
+    """ Fork a child that runs run and exits, returning its pid"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run()
+        finally:
+            os._exit(0)
+    return pid
+
+
+def pipe_fan_out(data: typing.Any, consumers: int, count: int):
+    """ Send data count times to each consumer, through a pipe per consumer"""
+    pipes = [os.pipe() for _ in range(consumers)]
+    pids = []
+    for read_fd, write_fd in pipes:
+        def consume(read_fd=read_fd, write_fd=write_fd):
+            os.close(write_fd)
+            with os.fdopen(read_fd, 'rb') as reader:
+                for _ in range(count):
+                    SERIALIZER.deserialize_parts(MultipartPayload.read(reader))
+
+        pids.append(fork(consume))
+        os.close(read_fd)
+    for _ in range(count):
+        payload = SERIALIZER.serialize_parts(data)
+        for _, write_fd in pipes:
+            payload.writev(write_fd)
+    for (_, write_fd), pid in zip(pipes, pids):
+        os.close(write_fd)
+        os.waitpid(pid, 0)
+
+
+def segment_fan_out(data: typing.Any, consumers: int, count: int):
+    """ Share data count times in a segment, sending each consumer its name and waiting until all have loaded it"""
+    channels = []
+    for _ in range(consumers):
+        names_read, names_write = os.pipe()
+        acks_read, acks_write = os.pipe()
+
+        def consume(names_read=names_read, acks_write=acks_write):
+            with os.fdopen(names_read) as names, os.fdopen(acks_write, 'wb', buffering=0) as acks:
+                for _ in range(count):
+                    segment = SharedSegment.attach(names.readline().rstrip('\n'))
+                    result = segment.load(SERIALIZER)
+                    del result
+                    segment.release()
+                    acks.write(b'\x01')
+
+        pid = fork(consume)
+        os.close(names_read)
+        os.close(acks_write)
+        channels.append((os.fdopen(names_write, 'w'), os.fdopen(acks_read, 'rb', buffering=0), pid))
+    for _ in range(count):
+        with share_object(data, SERIALIZER) as segment:
+            for names, _, _ in channels:
+                names.write(f'{segment.name}\n')
+                names.flush()
+            for _, acks, _ in channels:
+                acks.read(1)
+    for names, acks, pid in channels:
+        names.close()
+        acks.close()
+        os.waitpid(pid, 0)
+
+
+def pipe_stream(data: typing.Any, count: int, out_of_band: bool):
+    """ Send data count times from a producer process through a pipe, as parts or as a single serialized part"""
+    read_fd, write_fd = os.pipe()
+
+    def produce():
+        os.close(read_fd)
+        for _ in range(count):
+            if out_of_band:
+                SERIALIZER.serialize_parts(data).writev(write_fd)
+            else:
+                MultipartPayload([SERIALIZER.serialize(data)]).writev(write_fd)
+
+    pid = fork(produce)
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as reader:
+        for _ in range(count):
+            if out_of_band:
+                SERIALIZER.deserialize_parts(MultipartPayload.read(reader))
+            else:
+                SERIALIZER.deserialize(MultipartPayload.read(reader).parts[0])
+    os.waitpid(pid, 0)
+
+
+def ring_stream(data: typing.Any, count: int, capacity: int, out_of_band: bool):
+    """ Send data count times from a producer process through a ring buffer"""
+    with SharedRingBuffer.create(capacity, SERIALIZER, out_of_band=out_of_band) as ring:
+        def produce():
+            with SharedRingBuffer.attach(ring.name, SERIALIZER) as producer:
+                for _ in range(count):
+                    producer.put(data)
+                producer.finish()
+
+        pid = fork(produce)
+        for _ in ring:
+            pass
+        os.waitpid(pid, 0)
+
+
+def bench_fan_out(kib: int, consumers: typing.List[int], count: int, repeat: int):
+    """ One large object to several consumers through a pipe each against a shared segment"""
+    data = {'array': make_buffer(kib), 'meta': {'kib': kib}}
+    rows = []
+    for consumer_count in consumers:
+        for label, transfer in (('pipe', pipe_fan_out), ('segment', segment_fan_out)):
+            seconds = best_of(lambda: transfer(data, consumer_count, count), repeat)
+            rows.append([consumer_count, label, seconds / count * 1000])
+    print_table(f'{kib:,} KiB {type(data["array"]).__name__} to each consumer, {count} objects',
+                ['consumers', 'path', 'ms per object'], rows)
+
+
+def bench_stream(count: int, kib: int, repeat: int):
+    """ Streams of small records, serialized in band, and of large buffers, out of band, through a pipe against a
+        ring buffer"""
+    small = {'host': 'cidw-app-01', 'metric': 'cpu', 'value': 0.25, 'labels': ['prod', 'eu']}
+    large = {'array': make_buffer(kib), 'meta': {'kib': kib}}
+    large_count = max(1, count // 100)
+    rows = []
+    for label, data, records, out_of_band in (('small', small, count, False),
+                                              (f'{kib:,} KiB', large, large_count, True)):
+        capacity = max(1 << 20, 4 * kib * 1024)
+        for path, transfer in (('pipe', lambda: pipe_stream(data, records, out_of_band)),
+                               ('ring', lambda: ring_stream(data, records, capacity, out_of_band))):
+            seconds = best_of(transfer, repeat)
+            rows.append([label, path, records, seconds * 1000, seconds / records * 1e6])
+    print_table('Streams from a producer process', ['records', 'path', 'count', 'ms', 'us per record'], rows)
+
+
+def main():
+    """ Command line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--kib', type=int, default=16384, help='Size of the large objects in KiB')
+    parser.add_argument('--consumers', type=int, nargs='+', default=[1, 2, 4], help='Consumer counts to fan out to')
+    parser.add_argument('--objects', type=int, default=20, help='Large objects per fan out run')
+    parser.add_argument('--count', type=int, default=50000, help='Small records per stream run')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement, best is reported')
+    parser.add_argument('--only', choices=['fan-out', 'stream'], help='Run a single benchmark')
+    args = parser.parse_args()
+    if args.only in (None, 'fan-out'):
+        bench_fan_out(args.kib, args.consumers, args.objects, args.repeat)
+    if args.only in (None, 'stream'):
+        bench_stream(args.count, args.kib // 16, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
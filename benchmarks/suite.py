@@ -0,0 +1,309 @@
+"""
+Benchmark and regression tracking suite for the lib modules
+Times DataSerializer with each strategy over payload size tiers, the random_utils generators over string lengths and
+    batch sizes, and the file_utils permission checks over directory tree sizes. Results are written as JSON and can
+    be compared against a stored baseline, failing when throughput drops or peak memory grows past a tolerance.
+Run standalone with python -m benchmarks.suite, or under pytest with python -m pytest benchmarks
+    (BENCH_PROFILE, BENCH_OUTPUT, BENCH_BASELINE and BENCH_TOLERANCE set the same options).
+Baselines are only comparable when recorded on the same machine with the same profile.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+from benchmarks.timing import best_of, print_table
+from lib import random_utils
+from lib.file_utils import check_permissions, scan_permissions
+from lib.serialization_utils import CborSerializer, DataSerializer, JsonSerializer, MsgpackSerializer, \
+    PickleSerializer, YamlSerializer, cbor2, msgpack
+
+# version of the results file layout
+RESULTS_VERSION = 1
+
+# default allowed slowdown or memory growth, as a fraction of the baseline
+DEFAULT_TOLERANCE = 0.25
+
+# payload tier: number of records in the nested structure, roughly 200 bytes of JSON each
+PAYLOAD_TIERS = {
+    'tiny': 0,
+    'small': 5,
+    'medium': 5000,
+    'large': 500000,
+}
+
+# the tiers, string lengths, batch sizes and tree sizes each profile runs
+PROFILES = {
+    'quick': {
+        'payloads': ['tiny', 'small', 'medium'],
+        'yaml_max_tier': 'small',
+        'lengths': [8, 64],
+        'batches': [1, 1000],
+        'trees': [100],
+        'repeat': 3,
+    },
+    'full': {
+        'payloads': ['tiny', 'small', 'medium', 'large'],
+        'yaml_max_tier': 'medium',
+        'lengths': [8, 64, 1024],
+        'batches': [1, 1000, 100000],
+        'trees': [100, 10000, 100000],
+        'repeat': 5,
+    },
+}
+
+
+class Case(typing.NamedTuple):
+    """
+    One benchmark: setup builds the input once, run(state) is the timed operation, which handles items items.
+    """
+    name: str
+    setup: typing.Callable[[], typing.Any]
+    run: typing.Callable[[typing.Any], typing.Any]
+    items: int
+
+
+def make_payload(tier: str) -> typing.Any:
+    """ The payload of a tier: a flat dict for 'tiny', a list of nested records otherwise"""
+    records = PAYLOAD_TIERS[tier]
+    if not records:
+        return {'id': 1, 'name': 'tiny', 'ok': True}
+    generator = random_utils.RandomGenerator.seeded(0)
+    names = generator.random_strings(records, 12, include_punctuation=False)
+    return {
+        'tier': tier,
+        'records': [{'id': index, 'name': name, 'score': index * 0.5, 'active': index % 2 == 0,
+                     'tags': ['alpha', 'beta', name[:4]],
+                     'nested': {'depth': 2, 'values': [index, index + 1, index + 2], 'label': f'record-{index}'}}
+                    for index, name in enumerate(names)],
+    }
+
+
+def strategies() -> typing.Dict[str, typing.Callable[[], typing.Any]]:
+    """ The strategies to time, optional ones only when their package is installed"""
+    available = {'json': JsonSerializer, 'yaml': YamlSerializer, 'pickle': PickleSerializer}
+    if msgpack is not None:
+        available['msgpack'] = MsgpackSerializer
+    if cbor2 is not None:
+        available['cbor'] = CborSerializer
+    return available
+
+
+def serialization_cases(tiers: typing.List[str], yaml_max_tier: str) -> typing.List[Case]:
+    """ Serialize and deserialize cases for every strategy and payload tier, YAML being too slow for the largest"""
+    cases = []
+    order = list(PAYLOAD_TIERS)
+    for label, strategy in strategies().items():
+        for tier in tiers:
+            if label == 'yaml' and order.index(tier) > order.index(yaml_max_tier):
+                continue
+            serializer = DataSerializer(strategy())
+
+            def setup(tier=tier, serializer=serializer):
+                payload = make_payload(tier)
+                return payload, serializer.serialize(payload)
+
+            cases.append(Case(f'serialization.{label}.serialize.{tier}', setup,
+                              lambda state, serializer=serializer: serializer.serialize(state[0]), 1))
+            cases.append(Case(f'serialization.{label}.deserialize.{tier}', setup,
+                              lambda state, serializer=serializer: serializer.deserialize(state[1]), 1))
+    return cases
+
+
+def random_cases(lengths: typing.List[int], batches: typing.List[int]) -> typing.List[Case]:
+    """ random_string call and random_strings batch cases for every string length and batch size"""
+    cases = []
+    for length in lengths:
+        for batch in batches:
+            if batch == 1:
+                cases.append(Case(f'random.random_string.len{length}', lambda: None,
+                                  lambda state, length=length: random_utils.random_string(length), 1))
+            else:
+                cases.append(Case(f'random.random_strings.len{length}.batch{batch}', lambda: None,
+                                  lambda state, length=length, batch=batch: random_utils.random_strings(batch, length),
+                                  batch))
+    return cases
+
+
+def make_tree(root: str, entries: int) -> typing.List[str]:
+    """ A tree of about entries files, 100 per directory, returning the file paths"""
+    paths = []
+    for index in range(entries):
+        directory = os.path.join(root, f'd{index // 100}')
+        if index % 100 == 0:
+            os.makedirs(directory)
+        path = os.path.join(directory, f'f{index}')
+        open(path, 'w').close()
+        paths.append(path)
+    return paths
+
+
+def file_cases(trees: typing.List[int], workdir: str) -> typing.List[Case]:
+    """ check_permissions over every file and scan_permissions of the tree, for every tree size"""
+    cases = []
+    for entries in trees:
+        root = os.path.join(workdir, f'tree{entries}')
+
+        def setup(root=root, entries=entries):
+            if not os.path.isdir(root):
+                make_tree(root, entries)
+            return root, [os.path.join(root, f'd{index // 100}', f'f{index}') for index in range(entries)]
+
+        cases.append(Case(f'file.check_permissions.tree{entries}', setup,
+                          lambda state: [check_permissions(path) for path in state[1]], entries))
+        cases.append(Case(f'file.scan_permissions.tree{entries}', setup,
+                          lambda state: sum(1 for _ in scan_permissions(state[0])), entries))
+    return cases
+
+
+def build_cases(profile: str, workdir: str) -> typing.List[Case]:
+    """
+    Every case of a profile.
+
+    Args:
+        profile (str): A key of PROFILES.
+        workdir (str): Scratch directory for the directory trees.
+
+    Returns:
+        list: The cases.
+    """
+    options = PROFILES[profile]
+    return (serialization_cases(options['payloads'], options['yaml_max_tier']) +
+            random_cases(options['lengths'], options['batches']) + file_cases(options['trees'], workdir))
+
+
+def measure(case: Case, repeat: int) -> typing.Dict[str, float]:
+    """
+    Time a case and measure its peak traced memory, in a separate untimed run since tracing slows everything down.
+
+    Args:
+        case (Case): The case.
+        repeat (int): Timed runs, the fastest counts.
+
+    Returns:
+        dict: ops_per_sec (items per second), seconds (fastest run) and peak_bytes.
+    """
+    state = case.setup()
+    # one warm-up run, so caches and lazy imports are not timed
+    case.run(state)
+    seconds = best_of(lambda: case.run(state), repeat)
+    tracemalloc.start()
+    try:
+        case.run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'ops_per_sec': case.items / seconds, 'seconds': seconds, 'peak_bytes': peak}
+
+
+def environment() -> typing.Dict[str, str]:
+    """ Where the results were recorded"""
+    return {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'platform': platform.platform(), 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def run_suite(profile: str = 'quick', only: typing.Optional[str] = None,
+              progress: typing.Optional[typing.Callable[[str, dict], None]] = None) -> dict:
+    """
+    Run every case of a profile.
+
+    Args:
+        profile (str): A key of PROFILES. Defaults to 'quick'.
+        only (str, optional): Only run cases whose name starts with this prefix, such as 'serialization.json'.
+        progress (callable, optional): Called with each case name and its measurement.
+
+    Returns:
+        dict: The results document, as written by write_results.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in build_cases(profile, workdir):
+            if only and not case.name.startswith(only):
+                continue
+            results[case.name] = measure(case, PROFILES[profile]['repeat'])
+            if progress is not None:
+                progress(case.name, results[case.name])
+    return {'version': RESULTS_VERSION, 'profile': profile, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'environment': environment(), 'results': results}
+
+
+def write_results(document: dict, path: str):
+    """ Write a results document as JSON"""
+    with open(path, 'w') as stream:
+        json.dump(document, stream, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    """ Read a results document written by write_results"""
+    with open(path) as stream:
+        document = json.load(stream)
+    if document.get('version') != RESULTS_VERSION:
+        raise ValueError(f'Unsupported results version {document.get("version")} in {path}')
+    return document
+
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE,
+            memory_tolerance: typing.Optional[float] = None) -> typing.List[str]:
+    """
+    Regressions of a run against a baseline, for the cases present in both.
+
+    Args:
+        current (dict): Results document of the run.
+        baseline (dict): Results document to compare against.
+        tolerance (float): Allowed throughput drop, as a fraction of the baseline. Defaults to DEFAULT_TOLERANCE.
+        memory_tolerance (float, optional): Allowed peak memory growth, as a fraction. Defaults to tolerance.
+
+    Returns:
+        list: One message per regression, empty when the run is within tolerance.
+    """
+    if memory_tolerance is None:
+        memory_tolerance = tolerance
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        expected = baseline['results'].get(name)
+        if expected is None:
+            continue
+        if result['ops_per_sec'] < expected['ops_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['ops_per_sec']:,.1f}/s is "
+                               f"{1 - result['ops_per_sec'] / expected['ops_per_sec']:.0%} below the baseline "
+                               f"{expected['ops_per_sec']:,.1f}/s")
+        # a few KiB of slack so tiny allocations do not flap
+        if result['peak_bytes'] > expected['peak_bytes'] * (1 + memory_tolerance) + 4096:
+            regressions.append(f"{name}: peak memory {result['peak_bytes']:,} bytes is above the baseline "
+                               f"{expected['peak_bytes']:,} bytes")
+    return regressions
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    """ Command line entry point, returns the exit status: 1 when a regression was found"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick', help='Tiers to run')
+    parser.add_argument('--only', help='Only run cases whose name starts with this prefix')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against the results JSON in this file')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed throughput drop as a fraction of the baseline')
+    parser.add_argument('--memory-tolerance', type=float, help='Allowed peak memory growth, defaults to --tolerance')
+    args = parser.parse_args(argv)
+
+    document = run_suite(args.profile, args.only)
+    print_table(f'Benchmark suite, {args.profile} profile', ['case', 'ops/s', 'peak KiB'],
+                [[name, result['ops_per_sec'], result['peak_bytes'] / 1024]
+                 for name, result in document['results'].items()])
+    if args.output:
+        write_results(document, args.output)
+    if args.baseline:
+        regressions = compare(document, load_results(args.baseline), args.tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+pytest entry point for the benchmark suite: python -m pytest benchmarks
+Environment variables: BENCH_PROFILE (default quick), BENCH_ONLY, BENCH_OUTPUT to write the results JSON,
+    BENCH_BASELINE to fail cases that regressed against a stored results JSON, BENCH_TOLERANCE (default 0.25).
+"""
+import os
+import tempfile
+
+import pytest
+
+from benchmarks import suite
+
+PROFILE = os.environ.get('BENCH_PROFILE', 'quick')
+ONLY = os.environ.get('BENCH_ONLY')
+TOLERANCE = float(os.environ.get('BENCH_TOLERANCE', suite.DEFAULT_TOLERANCE))
+
+WORKDIR = tempfile.TemporaryDirectory()
+CASES = [case for case in suite.build_cases(PROFILE, WORKDIR.name) if not ONLY or case.name.startswith(ONLY)]
+
+
+@pytest.fixture(scope='module')
+def document():
+    """ The results document the cases fill in, written to BENCH_OUTPUT once every case has run"""
+    document = {'version': suite.RESULTS_VERSION, 'profile': PROFILE, 'environment': suite.environment(),
+                'results': {}}
+    yield document
+    if os.environ.get('BENCH_OUTPUT'):
+        suite.write_results(document, os.environ['BENCH_OUTPUT'])
+    WORKDIR.cleanup()
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    """ The stored baseline, or None"""
+    path = os.environ.get('BENCH_BASELINE')
+    return suite.load_results(path) if path else None
+
+
+@pytest.mark.parametrize('case', CASES, ids=[case.name for case in CASES])
+def test_benchmark(case, document, baseline):
+    """
+    Measure one case, and compare it with the baseline when there is one.
+    """
+    result = suite.measure(case, suite.PROFILES[PROFILE]['repeat'])
+    assert result['ops_per_sec'] > 0
+    document['results'][case.name] = result
+    if baseline is not None:
+        current = {'results': {case.name: result}}
+        regressions = suite.compare(current, baseline, TOLERANCE)
+        assert not regressions, '\n'.join(regressions)
+
+
+def test_compare():
+    """
+    Test that compare flags slowdowns and memory growth beyond the tolerance, and nothing within it.
+    """
+    baseline = {'results': {'a': {'ops_per_sec': 100.0, 'peak_bytes': 100000},
+                            'b': {'ops_per_sec': 100.0, 'peak_bytes': 100000}}}
+    current = {'results': {'a': {'ops_per_sec': 90.0, 'peak_bytes': 110000},
+                           'b': {'ops_per_sec': 70.0, 'peak_bytes': 200000},
+                           'new': {'ops_per_sec': 1.0, 'peak_bytes': 1}}}
+    regressions = suite.compare(current, baseline, tolerance=0.2)
+    assert len(regressions) == 2
+    assert all(message.startswith('b:') for message in regressions)
+    assert suite.compare(current, baseline, tolerance=0.2, memory_tolerance=1.5)[0].startswith('b: throughput')
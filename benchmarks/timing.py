@@ -0,0 +1,40 @@
+""" Small timing helpers shared by the benchmark scripts"""
+import time
+import typing
+
+
+def best_of(func: typing.Callable[[], typing.Any], repeat: int = 3) -> float:
+    """
+    Run func repeat times and return the fastest wall-clock duration.
+
+    Args:
+        func (callable): Zero-argument callable to time.
+        repeat (int): Number of timed runs. Defaults to 3.
+
+    Returns:
+        float: Fastest run in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def print_table(title: str, headers: typing.Sequence[str], rows: typing.Iterable[typing.Sequence[typing.Any]]):
+    """
+    Print rows as a fixed-width table under a title.
+
+    Args:
+        title (str): Heading printed above the table.
+        headers (sequence): Column headings.
+        rows (iterable): Row values, one sequence per row.
+    """
+    rows = [[f'{v:,.1f}' if isinstance(v, float) else str(v) for v in row] for row in rows]
+    widths = [max(len(str(h)), *(len(r[i]) for r in rows)) for i, h in enumerate(headers)]
+    print(f'\n{title}')
+    print('  '.join(str(h).ljust(w) for h, w in zip(headers, widths)).rstrip())
+    print('  '.join('-' * w for w in widths))
+    for row in rows:
+        print('  '.join(v.ljust(w) for v, w in zip(row, widths)).rstrip())
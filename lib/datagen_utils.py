@@ -0,0 +1,421 @@
+""" Synthetic test data generation from a declarative record schema, built on random_utils"""
+import abc
+import collections
+import concurrent.futures
+import csv
+import datetime
+import io
+import os
+import typing
+
+from lib import random_utils
+from lib.serialization_utils import DataSerializer, JsonSerializer, PickleSerializer
+
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_SHARD_SIZE = 100000
+
+
+class Field(abc.ABC):
+    """
+    A column of a record schema. Fields generate a whole column of a batch at once, so the bulk generators in
+        random_utils do the work instead of one call per value.
+    """
+
+    @abc.abstractmethod
+    def generate(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[typing.Any]:
+        """
+        Generate count values.
+
+        Args:
+            generator (RandomGenerator): Source of randomness, its source attribute offers the random.Random API.
+            count (int): Number of values.
+
+        Returns:
+            list: count generated values.
+        """
+
+    def __repr__(self):
+        """
+        Formal string representation of the field.
+
+        Returns:
+            str: Field class and options in formal string format.
+        """
+        options = ', '.join(f'{name}={value!r}' for name, value in vars(self).items())
+        return f"{self.__class__.__name__}({options})"
+
+
+class StringField(Field):
+    """
+    Random strings of a fixed length from the random_utils character sets.
+    """
+
+    def __init__(self, length: int, include_lowercase: bool = True, include_uppercase: bool = True,
+                 include_digits: bool = True, include_punctuation: bool = False):
+        """
+        Constructor for StringField class.
+
+        Args:
+            length (int): Length of each string.
+            include_lowercase (bool): Whether to include lowercase letters in the strings. Defaults to True.
+            include_uppercase (bool): Whether to include uppercase letters in the strings. Defaults to True.
+            include_digits (bool): Whether to include digits in the strings. Defaults to True.
+            include_punctuation (bool): Whether to include punctuation in the strings. Defaults to False.
+        """
+        self.length = length
+        self.include_lowercase = include_lowercase
+        self.include_uppercase = include_uppercase
+        self.include_digits = include_digits
+        self.include_punctuation = include_punctuation
+
+    def generate(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[str]:
+        return generator.random_strings(count, self.length, self.include_lowercase, self.include_uppercase,
+                                        self.include_digits, self.include_punctuation)
+
+
+class IntField(Field):
+    """
+    Uniformly distributed integers between low and high, both included.
+    """
+
+    def __init__(self, low: int, high: int):
+        """
+        Constructor for IntField class.
+
+        Args:
+            low (int): Smallest value.
+            high (int): Largest value.
+        """
+        assert low <= high, "Low should not be greater than high."
+        self.low = low
+        self.high = high
+
+    def generate(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[int]:
+        randrange = generator.source.randrange
+        low, stop = self.low, self.high + 1
+        return [randrange(low, stop) for _ in range(count)]
+
+
+class FloatField(Field):
+    """
+    Uniformly distributed floats between low and high, optionally rounded.
+    """
+
+    def __init__(self, low: float, high: float, digits: typing.Optional[int] = None):
+        """
+        Constructor for FloatField class.
+
+        Args:
+            low (float): Smallest value.
+            high (float): Largest value.
+            digits (int, optional): Decimal places to round to. Defaults to no rounding.
+        """
+        assert low <= high, "Low should not be greater than high."
+        self.low = low
+        self.high = high
+        self.digits = digits
+
+    def generate(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[float]:
+        random = generator.source.random
+        low, span = self.low, self.high - self.low
+        if self.digits is None:
+            return [low + span * random() for _ in range(count)]
+        digits = self.digits
+        return [round(low + span * random(), digits) for _ in range(count)]
+
+
+class DateField(Field):
+    """
+    Uniformly distributed dates between start and end, both included.
+    """
+
+    def __init__(self, start: datetime.date, end: datetime.date, iso_format: bool = False):
+        """
+        Constructor for DateField class.
+
+        Args:
+            start (date): Earliest date.
+            end (date): Latest date.
+            iso_format (bool): Whether to generate ISO 8601 strings instead of date objects. JSON Lines output
+                writes date objects as ISO strings either way. Defaults to False.
+        """
+        assert start <= end, "Start should not be after end."
+        self.start = start
+        self.end = end
+        self.iso_format = iso_format
+
+    def generate(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[typing.Any]:
+        randrange = generator.source.randrange
+        start, days = self.start.toordinal(), (self.end - self.start).days + 1
+        fromordinal = datetime.date.fromordinal
+        dates = [fromordinal(start + randrange(days)) for _ in range(count)]
+        if self.iso_format:
+            return [date.isoformat() for date in dates]
+        return dates
+
+
+class ChoiceField(Field):
+    """
+    Values picked from a fixed sequence of choices, optionally weighted.
+    """
+
+    def __init__(self, choices: typing.Sequence[typing.Any],
+                 weights: typing.Optional[typing.Sequence[float]] = None):
+        """
+        Constructor for ChoiceField class.
+
+        Args:
+            choices (sequence): Values to pick from.
+            weights (sequence, optional): Relative weight of each choice. Defaults to equal weights.
+        """
+        assert choices, "Choices should not be empty."
+        assert weights is None or len(weights) == len(choices), "Weights should match the choices."
+        self.choices = list(choices)
+        self.weights = None if weights is None else list(weights)
+
+    def generate(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[typing.Any]:
+        return generator.source.choices(self.choices, self.weights, k=count)
+
+
+class RecordSchema:
+    """
+    An ordered mapping of field names to fields describing one record.
+    """
+
+    def __init__(self, fields: typing.Mapping[str, Field]):
+        """
+        Constructor for RecordSchema class.
+
+        Args:
+            fields (mapping): Field of each column, in column order.
+        """
+        assert fields, "A schema needs at least one field."
+        self.fields = collections.OrderedDict(fields)
+
+    @property
+    def names(self) -> typing.List[str]:
+        """ Column names, in order"""
+        return list(self.fields)
+
+    def generate_rows(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[tuple]:
+        """
+        Generate count records as tuples in column order, column by column.
+
+        Args:
+            generator (RandomGenerator): Source of randomness.
+            count (int): Number of records.
+
+        Returns:
+            list: count tuples.
+        """
+        return list(zip(*(field.generate(generator, count) for field in self.fields.values())))
+
+    def generate_batch(self, generator: random_utils.RandomGenerator, count: int) -> typing.List[dict]:
+        """
+        Generate count records as dicts.
+
+        Args:
+            generator (RandomGenerator): Source of randomness.
+            count (int): Number of records.
+
+        Returns:
+            list: count dicts keyed by column name.
+        """
+        names = self.names
+        return [dict(zip(names, row)) for row in self.generate_rows(generator, count)]
+
+    def __repr__(self):
+        """
+        Formal string representation of RecordSchema object.
+
+        Returns:
+            str: RecordSchema class and fields in formal string format.
+        """
+        return f"RecordSchema({dict(self.fields)!r})"
+
+
+def _encode_jsonl(schema: RecordSchema, batches: typing.Iterable[typing.List[tuple]]) -> bytes:
+    """
+    Shard records as JSON Lines, with the stdlib backend so the bytes do not depend on which JSON packages are
+        installed, and date objects written as ISO 8601 strings.
+    """
+    stream = io.BytesIO()
+    serializer = DataSerializer(JsonSerializer())
+    names = schema.names
+    dates = [index for index, field in enumerate(schema.fields.values())
+             if isinstance(field, DateField) and not field.iso_format]
+    for rows in batches:
+        if dates:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for index in dates:
+                    row[index] = row[index].isoformat()
+        serializer.dump_records((dict(zip(names, row)) for row in rows), stream)
+    return stream.getvalue()
+
+
+def _encode_pickle(schema: RecordSchema, batches: typing.Iterable[typing.List[tuple]]) -> bytes:
+    """ Shard records as consecutive pickle frames, one dict per record"""
+    stream = io.BytesIO()
+    serializer = DataSerializer(PickleSerializer())
+    names = schema.names
+    for rows in batches:
+        serializer.dump_records((dict(zip(names, row)) for row in rows), stream)
+    return stream.getvalue()
+
+
+def _encode_csv(schema: RecordSchema, batches: typing.Iterable[typing.List[tuple]]) -> bytes:
+    """ Shard records as CSV rows without the header"""
+    stream = io.StringIO()
+    writer = csv.writer(stream, lineterminator='\n')
+    for rows in batches:
+        writer.writerows(rows)
+    return stream.getvalue().encode('utf-8')
+
+
+def _csv_header(schema: RecordSchema) -> bytes:
+    """ The CSV header row"""
+    stream = io.StringIO()
+    csv.writer(stream, lineterminator='\n').writerow(schema.names)
+    return stream.getvalue().encode('utf-8')
+
+
+# format name: (shard encoder, header writer or None)
+FORMATS = {
+    'jsonl': (_encode_jsonl, None),
+    'pickle': (_encode_pickle, None),
+    'csv': (_encode_csv, _csv_header),
+}
+
+
+class DataGenerator:
+    """
+    Reproducible high-volume record generation. Records are split into shards of shard_size records, shard i is
+        always generated from child i of the seed, so the output depends only on the schema, seed, shard size and
+        batch size, never on how many workers generated it.
+    """
+
+    def __init__(self, schema: RecordSchema, seed: typing.Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, shard_size: int = DEFAULT_SHARD_SIZE):
+        """
+        Constructor for DataGenerator class.
+
+        Args:
+            schema (RecordSchema): Description of one record.
+            seed (int, optional): Seed of the whole data set. Defaults to a fresh seed, kept in the seed attribute.
+            batch_size (int): Records generated per batch. Defaults to DEFAULT_BATCH_SIZE.
+            shard_size (int): Records per shard, the unit of parallel work. Defaults to DEFAULT_SHARD_SIZE.
+        """
+        assert batch_size > 0, "Batch size should be a positive integer."
+        assert shard_size > 0, "Shard size should be a positive integer."
+        self.schema = schema
+        self.seed = random_utils.RandomGenerator.seeded(seed).seed
+        self.batch_size = batch_size
+        self.shard_size = shard_size
+
+    def _shards(self, count: int) -> typing.List[typing.Tuple[int, int]]:
+        """ (shard index, record count) of each shard of count records"""
+        return [(index, min(self.shard_size, count - start))
+                for index, start in enumerate(range(0, count, self.shard_size))]
+
+    def _shard_rows(self, shard: int, count: int) -> typing.Iterator[typing.List[tuple]]:
+        """ Batches of row tuples of one shard"""
+        generator = random_utils.RandomGenerator.seeded(self.seed).child(shard)
+        for start in range(0, count, self.batch_size):
+            yield self.schema.generate_rows(generator, min(self.batch_size, count - start))
+
+    def iter_batches(self, count: int) -> typing.Iterator[typing.List[dict]]:
+        """
+        Lazily generate count records in batches of at most batch_size dicts.
+
+        Args:
+            count (int): Total number of records.
+
+        Returns:
+            iterator: Lists of records.
+        """
+        assert count >= 0, "Count should not be negative."
+        names = self.schema.names
+        for shard, shard_count in self._shards(count):
+            for rows in self._shard_rows(shard, shard_count):
+                yield [dict(zip(names, row)) for row in rows]
+
+    def records(self, count: int) -> typing.Iterator[dict]:
+        """
+        Lazily generate count records one at a time.
+
+        Args:
+            count (int): Total number of records.
+
+        Returns:
+            iterator: Records.
+        """
+        for batch in self.iter_batches(count):
+            yield from batch
+
+    def encode_shard(self, shard: int, count: int, fmt: str) -> bytes:
+        """
+        Generate and encode one shard, the work each pool worker does.
+
+        Args:
+            shard (int): Shard index.
+            count (int): Records in the shard.
+            fmt (str): One of FORMATS.
+
+        Returns:
+            bytes: The encoded records, ready to append to the output.
+        """
+        return FORMATS[fmt][0](self.schema, self._shard_rows(shard, count))
+
+    def write(self, fileobj: typing.Union[str, os.PathLike, typing.BinaryIO], count: int, fmt: str = 'jsonl',
+              max_workers: typing.Optional[int] = None) -> int:
+        """
+        Generate count records straight to a file. Shards are generated and encoded in a process pool and written
+            in shard order, with at most two shards per worker in flight so memory stays bounded.
+
+        Args:
+            fileobj (str, path or file-like): Output path or writable binary stream.
+            count (int): Total number of records.
+            fmt (str): 'jsonl', 'pickle' or 'csv'. Defaults to 'jsonl'.
+            max_workers (int, optional): Worker processes, 1 generates in this process. Defaults to the CPU count.
+
+        Returns:
+            int: Number of bytes written.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f'Unknown format: {fmt!r}, expected one of {sorted(FORMATS)}')
+        assert count >= 0, "Count should not be negative."
+        if not hasattr(fileobj, 'write'):
+            with open(fileobj, 'wb') as stream:
+                return self.write(stream, count, fmt, max_workers)
+        header = FORMATS[fmt][1]
+        written = fileobj.write(header(self.schema)) if header is not None else 0
+        for chunk in self._encoded_shards(count, fmt, max_workers or os.cpu_count() or 1):
+            written += fileobj.write(chunk)
+        return written
+
+    def _encoded_shards(self, count: int, fmt: str, max_workers: int) -> typing.Iterator[bytes]:
+        """ Encoded shards in order, from a bounded window of pool tasks"""
+        shards = self._shards(count)
+        if max_workers == 1 or len(shards) == 1:
+            for shard, shard_count in shards:
+                yield self.encode_shard(shard, shard_count, fmt)
+            return
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = collections.deque()
+            for shard, shard_count in shards:
+                pending.append(executor.submit(self.encode_shard, shard, shard_count, fmt))
+                if len(pending) >= 2 * max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def __repr__(self):
+        """
+        Formal string representation of DataGenerator object.
+
+        Returns:
+            str: DataGenerator class and configuration in formal string format.
+        """
+        return (f"DataGenerator(schema={self.schema!r}, seed={self.seed}, batch_size={self.batch_size}, "
+                f"shard_size={self.shard_size})")
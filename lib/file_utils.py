@@ -1,5 +1,29 @@
-import pathlib
+import array
+import asyncio
+import collections
+import concurrent.futures
+import ctypes
+import ctypes.util
+import errno
+import functools
+import itertools
+import os
+import select
 import stat
+import struct
+import sys
+import threading
+import time
+import typing
+
+# Threads listing directories in scan_permissions unless told otherwise
+DEFAULT_SCAN_WORKERS = 8
+
+# Directories queued per scan_permissions thread, the rest wait in the generator so closing it early is cheap
+SCAN_QUEUE_PER_WORKER = 4
+
+# Paths probed at once by aiter_permissions unless told otherwise
+DEFAULT_ASYNC_CONCURRENCY = 16
 
 
 def check_permissions(path):
@@ -11,16 +35,24 @@ def check_permissions(path):
     :return: A dictionary containing the permissions of the file or directory.
     :rtype: dict
     """
-    # Initialize pathlib.Path object
-    p = pathlib.Path(path)
+    # One stat call both checks that the path exists and reads its permissions
+    try:
+        permissions = os.stat(path).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"The file or directory {path} does not exist.") from None
 
-    # Check if path exists
-    if not p.exists():
-        raise FileNotFoundError(f"The file or directory {path} does not exist.")
+    return _permission_dict(permissions)
 
-    # Get the file or directory's permissions
-    permissions = p.stat().st_mode
 
+def _permission_dict(permissions):
+    """
+    Build the nested permission dictionary of check_permissions from a st_mode value.
+
+    :param permissions: The st_mode of a file or directory.
+    :type permissions: int
+    :return: A dictionary containing the permissions.
+    :rtype: dict
+    """
     # Check the read, write, and execute permissions for the user, group, and others
     permission_dict = {
         'user': {
@@ -41,3 +73,1027 @@ def check_permissions(path):
     }
 
     return permission_dict
+
+
+class PermissionBits:
+    """
+    The read, write and execute bits of one of user, group or others. There are only eight possible values, shared
+    by every Permissions object, so attribute access allocates nothing.
+    """
+    __slots__ = ('bits',)
+
+    def __init__(self, bits):
+        """
+        :param bits: The three permission bits, read being 4, write 2 and execute 1.
+        :type bits: int
+        """
+        self.bits = bits
+
+    @property
+    def read(self):
+        return bool(self.bits & 4)
+
+    @property
+    def write(self):
+        return bool(self.bits & 2)
+
+    @property
+    def execute(self):
+        return bool(self.bits & 1)
+
+    def to_dict(self):
+        """
+        The bits in the format of one level of check_permissions.
+
+        :rtype: dict
+        """
+        return {'read': self.read, 'write': self.write, 'execute': self.execute}
+
+    def __repr__(self):
+        return f"PermissionBits(read={self.read}, write={self.write}, execute={self.execute})"
+
+
+_PERMISSION_BITS = tuple(PermissionBits(bits) for bits in range(8))
+
+
+class Permissions(int):
+    """
+    Compact permissions of a file or directory: the st_mode integer itself, with attribute access such as
+    perm.user.write instead of the nested dictionary of check_permissions.
+    """
+    __slots__ = ()
+
+    @property
+    def user(self):
+        return _PERMISSION_BITS[(self >> 6) & 7]
+
+    @property
+    def group(self):
+        return _PERMISSION_BITS[(self >> 3) & 7]
+
+    @property
+    def others(self):
+        return _PERMISSION_BITS[self & 7]
+
+    def to_dict(self):
+        """
+        The permissions in the nested dictionary format of check_permissions.
+
+        :rtype: dict
+        """
+        return _permission_dict(self)
+
+    def __str__(self):
+        # The familiar rwxr-xr-x form, without the file type character
+        return stat.filemode(self)[1:]
+
+    def __repr__(self):
+        return f"Permissions({oct(stat.S_IMODE(self))})"
+
+
+def get_permissions(path):
+    """
+    This function returns the compact permissions of a file or directory.
+
+    :param path: The path to the file or directory to check.
+    :type path: str
+    :return: The permissions, with attribute access such as perm.user.write.
+    :rtype: Permissions
+    """
+    try:
+        return Permissions(os.stat(path).st_mode)
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"The file or directory {path} does not exist.") from None
+
+
+class PermissionEntry(typing.NamedTuple):
+    """
+    One file or directory found by scan_permissions, with the fields of its single stat call that audits need.
+    """
+    path: str
+    mode: int
+    uid: int
+    gid: int
+    is_dir: bool
+
+    def permissions(self):
+        """
+        The permissions in the nested dictionary format of check_permissions.
+
+        :return: A dictionary containing the permissions of the entry.
+        :rtype: dict
+        """
+        return _permission_dict(self.mode)
+
+    @property
+    def perm(self):
+        """
+        The permissions as a compact Permissions value.
+
+        :rtype: Permissions
+        """
+        return Permissions(self.mode)
+
+
+# Named filters for scan_permissions and PermissionTable: the mode bit tested and whether it must be set
+FILTER_BITS = {
+    'world_writable': (stat.S_IWOTH, True),
+    'world_readable': (stat.S_IROTH, True),
+    'group_writable': (stat.S_IWGRP, True),
+    'not_user_readable': (stat.S_IRUSR, False),
+    'not_user_writable': (stat.S_IWUSR, False),
+    'setuid': (stat.S_ISUID, True),
+    'setgid': (stat.S_ISGID, True),
+}
+
+
+def _bit_filter(bit, present):
+    """
+    Build a predicate on a PermissionEntry testing that a mode bit is set, or that it is not.
+    """
+    if present:
+        return lambda entry: bool(entry.mode & bit)
+    return lambda entry: not entry.mode & bit
+
+
+PERMISSION_FILTERS = {name: _bit_filter(bit, present) for name, (bit, present) in FILTER_BITS.items()}
+
+
+def _entry_from_stat(path, st):
+    """
+    Build a PermissionEntry from a stat result.
+    """
+    return PermissionEntry(path, st.st_mode, st.st_uid, st.st_gid, stat.S_ISDIR(st.st_mode))
+
+
+def _scan_directory(path, follow_symlinks, onerror):
+    """
+    List one directory with os.scandir, stating each entry once.
+
+    :param path: The directory to list.
+    :param follow_symlinks: Whether to stat and descend into symbolic link targets.
+    :param onerror: Called with the OSError of an unreadable directory, or None to skip it silently.
+    :return: The entries of the directory and the (path, (device, inode)) of the subdirectories to scan next.
+    :rtype: tuple
+    """
+    entries = []
+    subdirs = []
+    try:
+        with os.scandir(path) as iterator:
+            for dir_entry in iterator:
+                try:
+                    st = dir_entry.stat(follow_symlinks=follow_symlinks)
+                except OSError:
+                    # Removed or became unreadable since the listing
+                    continue
+                entry = _entry_from_stat(dir_entry.path, st)
+                entries.append(entry)
+                if entry.is_dir:
+                    subdirs.append((entry.path, (st.st_dev, st.st_ino)))
+    except OSError as error:
+        if onerror is not None:
+            onerror(error)
+    return entries, subdirs
+
+
+def scan_permissions(root, predicate=None, max_workers=DEFAULT_SCAN_WORKERS, follow_symlinks=False, onerror=None):
+    """
+    Stream the permissions of every file and directory under root, root included, with a single stat per entry.
+    Directories are listed in parallel by a thread pool, so results come in no particular order. Only a few
+    directories per thread are handed to the pool at a time, and closing the iterator cancels them, so stopping
+    early does not wait for the rest of the tree.
+
+    :param root: The directory (or file) to scan.
+    :type root: str or os.PathLike
+    :param predicate: Only yield entries it accepts, either a name from PERMISSION_FILTERS or a callable taking a
+        PermissionEntry. Defaults to every entry.
+    :type predicate: str or callable
+    :param max_workers: Threads listing directories, 1 scans in the calling thread.
+    :type max_workers: int
+    :param follow_symlinks: Whether to report and descend into the targets of symbolic links.
+    :type follow_symlinks: bool
+    :param onerror: Called with the OSError of each directory that cannot be listed, which is otherwise skipped.
+    :type onerror: callable
+    :return: An iterator of PermissionEntry.
+    :rtype: iterator
+    """
+    if isinstance(predicate, str):
+        if predicate not in PERMISSION_FILTERS:
+            raise ValueError(f"Unknown filter: {predicate!r}, expected one of {sorted(PERMISSION_FILTERS)}")
+        predicate = PERMISSION_FILTERS[predicate]
+
+    root = os.fspath(root)
+    try:
+        st = os.stat(root, follow_symlinks=follow_symlinks)
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"The file or directory {root} does not exist.") from None
+    top = _entry_from_stat(root, st)
+    if predicate is None or predicate(top):
+        yield top
+    if not top.is_dir:
+        return
+
+    # Followed symbolic links can form cycles, so directories are only descended into once
+    seen = {(st.st_dev, st.st_ino)}
+
+    def unseen(subdirs):
+        if not follow_symlinks:
+            return [path for path, _ in subdirs]
+        fresh = []
+        for path, key in subdirs:
+            if key not in seen:
+                seen.add(key)
+                fresh.append(path)
+        return fresh
+
+    if max_workers == 1:
+        pending = [root]
+        while pending:
+            entries, subdirs = _scan_directory(pending.pop(), follow_symlinks, onerror)
+            pending.extend(unseen(subdirs))
+            yield from entries if predicate is None else filter(predicate, entries)
+        return
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    limit = (max_workers or DEFAULT_SCAN_WORKERS) * SCAN_QUEUE_PER_WORKER
+    queued = collections.deque([root])
+    running = set()
+    try:
+        while queued or running:
+            while queued and len(running) < limit:
+                running.add(executor.submit(_scan_directory, queued.popleft(), follow_symlinks, onerror))
+            done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                entries, subdirs = future.result()
+                queued.extend(unseen(subdirs))
+                yield from entries if predicate is None else filter(predicate, entries)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class PermissionTable:
+    """
+    Columnar container for bulk permission results: paths in a list and modes, uids and gids in typed arrays, about
+    a dozen bytes per entry beside the path. Queries run over the mode column in one pass.
+    """
+
+    def __init__(self, entries=()):
+        """
+        :param entries: PermissionEntry values to start with, for example from scan_permissions.
+        :type entries: iterable
+        """
+        self.paths = []
+        self.modes = array.array('I')
+        self.uids = array.array('I')
+        self.gids = array.array('I')
+        self.extend(entries)
+
+    @classmethod
+    def from_scan(cls, root, **kwargs):
+        """
+        Scan a tree into a table.
+
+        :param root: The directory to scan.
+        :param kwargs: Further arguments of scan_permissions.
+        :rtype: PermissionTable
+        """
+        return cls(scan_permissions(root, **kwargs))
+
+    def append(self, entry):
+        """
+        Add one PermissionEntry.
+        """
+        self.paths.append(entry.path)
+        self.modes.append(entry.mode)
+        self.uids.append(entry.uid)
+        self.gids.append(entry.gid)
+
+    def extend(self, entries):
+        """
+        Add many PermissionEntry values.
+        """
+        for entry in entries:
+            self.append(entry)
+
+    def where(self, bits, present=True):
+        """
+        Paths whose mode has all of the given bits set, or none of them.
+
+        :param bits: Mode bits, for example stat.S_IWGRP.
+        :type bits: int
+        :param present: Whether the bits must be set, or must all be clear.
+        :type present: bool
+        :return: The matching paths, in table order.
+        :rtype: list
+        """
+        if present:
+            return list(itertools.compress(self.paths, [mode & bits == bits for mode in self.modes]))
+        return list(itertools.compress(self.paths, [not mode & bits for mode in self.modes]))
+
+    def filter(self, name):
+        """
+        Paths matching a named filter from FILTER_BITS, such as 'group_writable'.
+
+        :param name: The filter name.
+        :type name: str
+        :return: The matching paths, in table order.
+        :rtype: list
+        """
+        if name not in FILTER_BITS:
+            raise ValueError(f"Unknown filter: {name!r}, expected one of {sorted(FILTER_BITS)}")
+        return self.where(*FILTER_BITS[name])
+
+    def owned_by(self, uid):
+        """
+        Paths owned by a user id.
+
+        :rtype: list
+        """
+        return list(itertools.compress(self.paths, [owner == uid for owner in self.uids]))
+
+    def to_dict(self):
+        """
+        Export in the format of check_permissions, keyed by path.
+
+        :return: Path to nested permission dictionary.
+        :rtype: dict
+        """
+        return {path: _permission_dict(mode) for path, mode in zip(self.paths, self.modes)}
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the numeric columns, the paths not included.
+        """
+        return sum(column.itemsize * len(column) for column in (self.modes, self.uids, self.gids))
+
+    def __getitem__(self, index):
+        return PermissionEntry(self.paths[index], self.modes[index], self.uids[index], self.gids[index],
+                               stat.S_ISDIR(self.modes[index]))
+
+    def __iter__(self):
+        for index in range(len(self.paths)):
+            yield self[index]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __repr__(self):
+        return f"PermissionTable({len(self)} entries)"
+
+
+# inotify event bits, from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+@functools.lru_cache(maxsize=None)
+def _inotify_libc():
+    """
+    Load the C library for its inotify functions.
+
+    :return: The library, or None when inotify is not available on this platform.
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class PermissionCacheStats:
+    """
+    Counters for a PermissionCache.
+    """
+    __slots__ = ('hits', 'misses', 'expirations', 'invalidations')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def as_dict(self):
+        """
+        The counters as a dict.
+
+        :rtype: dict
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"PermissionCacheStats({', '.join(f'{k}={v}' for k, v in self.as_dict().items())})"
+
+
+class _InotifyWatcher:
+    """
+    Background thread that calls invalidate with the path of every watched file whose attributes change, or that
+    is deleted or moved.
+    """
+    MASK = IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF
+
+    def __init__(self, invalidate):
+        libc = _inotify_libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._invalidate = invalidate
+        self._paths = {}
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._wake_read, self._wake_write = os.pipe()
+        self._thread = threading.Thread(target=self._run, name='PermissionCache-inotify', daemon=True)
+        self._thread.start()
+
+    def watch(self, path):
+        """
+        Start watching a path, returns False if it cannot be watched.
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            return False
+        with self._lock:
+            self._paths.setdefault(wd, set()).add(path)
+            self._watches[path] = wd
+        return True
+
+    def unwatch(self, path):
+        """
+        Stop watching a path.
+        """
+        with self._lock:
+            wd = self._watches.pop(path, None)
+            if wd is None:
+                return
+            paths = self._paths.get(wd, set())
+            paths.discard(path)
+            if paths:
+                return
+            self._paths.pop(wd, None)
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _run(self):
+        while True:
+            ready, _, _ = select.select([self._fd, self._wake_read], [], [])
+            if self._wake_read in ready:
+                return
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size + length
+                with self._lock:
+                    # IN_IGNORED means the kernel dropped the watch, after a delete or an explicit removal
+                    paths = self._paths.pop(wd, set()) if mask & IN_IGNORED else set(self._paths.get(wd, ()))
+                    if mask & IN_IGNORED:
+                        for path in paths:
+                            if self._watches.get(path) == wd:
+                                del self._watches[path]
+                for path in paths:
+                    self._invalidate(path)
+
+    def close(self):
+        os.write(self._wake_write, b'x')
+        self._thread.join()
+        for fd in (self._fd, self._wake_read, self._wake_write):
+            os.close(fd)
+
+
+class PermissionCache:
+    """
+    Cached permission checks for callers that check the same paths over and over. A cached result is served until
+    its TTL runs out or the path is invalidated, so a hit costs a dict lookup instead of a stat call.
+
+    Invalidation comes from one of:
+    - 'inotify': a kernel watch on every cached path, Linux only.
+    - 'poll': a background thread re-stats the cached paths every poll_interval seconds.
+    - None: nothing, entries only expire through the TTL or are revalidated on every hit.
+    'auto' picks inotify where it is available and polling elsewhere.
+
+    With validate=True every hit makes one stat call and compares inode, device and ctime (chmod and chown change
+    the ctime but not the mtime), which is exact but no longer syscall free. Paths inotify cannot watch, past the
+    watch limit or on filesystems without inotify support, are validated that way whatever validate says.
+    """
+
+    def __init__(self, ttl=None, validate=False, watch='auto', poll_interval=1.0):
+        """
+        :param ttl: Seconds a result is served without checking, None for no expiry.
+        :type ttl: float
+        :param validate: Whether to confirm every hit with a stat call.
+        :type validate: bool
+        :param watch: 'auto', 'inotify', 'poll' or None.
+        :type watch: str
+        :param poll_interval: Seconds between re-stats with watch='poll'.
+        :type poll_interval: float
+        """
+        if watch not in ('auto', 'inotify', 'poll', None):
+            raise ValueError(f"Unknown watch mode: {watch!r}, expected 'auto', 'inotify', 'poll' or None")
+        if watch == 'auto':
+            watch = 'inotify' if _inotify_libc() is not None else 'poll'
+        self.ttl = ttl
+        self.validate = validate
+        self.poll_interval = poll_interval
+        self.stats = PermissionCacheStats()
+        self._entries = {}
+        # Bumped by every invalidation, so a result read before one is not stored after it
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._watcher = None
+        self._poller = None
+        if watch == 'inotify':
+            self._watcher = _InotifyWatcher(self.invalidate)
+        elif watch == 'poll':
+            self._poller = threading.Thread(target=self._poll, name='PermissionCache-poll', daemon=True)
+            self._poller.start()
+        self.watch = watch
+
+    @staticmethod
+    def _identity(st):
+        return st.st_dev, st.st_ino, st.st_ctime_ns, st.st_mode
+
+    def _stat(self, path):
+        try:
+            return os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise FileNotFoundError(f"The file or directory {path} does not exist.") from None
+
+    def get(self, path):
+        """
+        The compact permissions of a path, from the cache when possible.
+
+        :param path: The path to the file or directory to check.
+        :type path: str
+        :return: The permissions.
+        :rtype: Permissions
+        """
+        path = os.fspath(path)
+        entry = self._entries.get(path)
+        if entry is not None:
+            perm, identity, expires, unwatched = entry
+            if expires is not None and time.monotonic() >= expires:
+                with self._lock:
+                    self.stats.expirations += 1
+            elif (self.validate or unwatched) and self._identity(self._stat(path)) != identity:
+                with self._lock:
+                    self.stats.invalidations += 1
+            else:
+                with self._lock:
+                    self.stats.hits += 1
+                return perm
+
+        with self._lock:
+            generation = (self._epoch, self._generations.get(path, 0))
+        # Watch before the stat, so a change between the two still invalidates the new entry
+        unwatched = entry[3] if entry is not None else False
+        if self._watcher is not None and entry is None:
+            unwatched = not self._watcher.watch(path)
+        st = self._stat(path)
+        perm = Permissions(st.st_mode)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self.stats.misses += 1
+            # An invalidation since the stat means it may predate the change, so the result is not cached
+            if (self._epoch, self._generations.get(path, 0)) == generation:
+                self._entries[path] = (perm, self._identity(st), expires, unwatched)
+        return perm
+
+    def check(self, path):
+        """
+        The permissions of a path in the nested dictionary format of check_permissions.
+
+        :param path: The path to the file or directory to check.
+        :type path: str
+        :rtype: dict
+        """
+        return _permission_dict(self.get(path))
+
+    def invalidate(self, path=None):
+        """
+        Drop the cached result of one path, or of every path.
+
+        :param path: The path to drop, or None for all.
+        """
+        with self._lock:
+            if path is None:
+                paths = list(self._entries)
+                self._entries.clear()
+                self._generations.clear()
+                self._epoch += 1
+            else:
+                path = os.fspath(path)
+                self._generations[path] = self._generations.get(path, 0) + 1
+                paths = [path] if self._entries.pop(path, None) is not None else []
+            self.stats.invalidations += len(paths)
+        if self._watcher is not None:
+            for dropped in paths:
+                self._watcher.unwatch(dropped)
+
+    def _poll(self):
+        while not self._closed.wait(self.poll_interval):
+            with self._lock:
+                entries = list(self._entries.items())
+            for path, (_, identity, _, _) in entries:
+                try:
+                    changed = self._identity(os.stat(path)) != identity
+                except OSError:
+                    changed = True
+                if changed:
+                    self.invalidate(path)
+
+    def close(self):
+        """
+        Stop the background watcher or poller.
+        """
+        self._closed.set()
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"PermissionCache(ttl={self.ttl}, validate={self.validate}, watch={self.watch!r})"
+
+
+# POSIX ACL tags and xattr layout, from <linux/posix_acl_xattr.h>
+ACL_USER_OBJ = 0x01
+ACL_USER = 0x02
+ACL_GROUP_OBJ = 0x04
+ACL_GROUP = 0x08
+ACL_MASK = 0x10
+ACL_OTHER = 0x20
+_ACL_XATTR = 'system.posix_acl_access'
+_ACL_VERSION = 2
+_ACL_HEADER = struct.Struct('<I')
+_ACL_ENTRY = struct.Struct('<HHI')
+
+
+class _UndecidedAccess(Exception):
+    """
+    Raised when access cannot be worked out in-process, so os.access has to answer.
+    """
+
+
+def _read_acl(path):
+    """
+    Read the access ACL of a path.
+
+    :param path: The path to the file or directory.
+    :return: (tag, permission bits, id) entries, or None when the path has no extended ACL.
+    :rtype: list
+    """
+    try:
+        data = os.getxattr(path, _ACL_XATTR)
+    except OSError as error:
+        if error.errno in (errno.ENODATA, errno.ENOTSUP, errno.EOPNOTSUPP):
+            return None
+        raise _UndecidedAccess(str(error)) from error
+    except AttributeError:
+        # No xattr support in this Python build
+        return None
+    if len(data) < _ACL_HEADER.size or (len(data) - _ACL_HEADER.size) % _ACL_ENTRY.size or \
+            _ACL_HEADER.unpack_from(data)[0] != _ACL_VERSION:
+        raise _UndecidedAccess(f"Unrecognised ACL on {path}")
+    return list(_ACL_ENTRY.iter_unpack(data[_ACL_HEADER.size:]))
+
+
+class AccessContext:
+    """
+    Effective access evaluation: whether a user with a set of groups can read, write or execute paths. The ids are
+    resolved once, then the owner, mode bits and optionally the POSIX ACL of each path are evaluated in-process,
+    with os.access consulted only when an ACL cannot be read or understood.
+
+    By default the context is the current process (effective uid and all its groups). For the current process a
+    successful stat already proves every parent directory is searchable; for any other user pass check_parents to
+    access_many to also evaluate search permission on the parent directories.
+    """
+
+    def __init__(self, uid=None, gids=None):
+        """
+        :param uid: The user id, defaults to the effective uid of this process.
+        :type uid: int
+        :param gids: The group ids, defaults to the effective gid and supplementary groups of this process.
+        :type gids: iterable
+        """
+        self.is_current = uid is None and gids is None
+        self.uid = os.geteuid() if uid is None else uid
+        if gids is None:
+            gids = {os.getegid(), *os.getgroups()} if uid is None else ()
+        self.gids = frozenset(gids)
+
+    def mode_bits(self, mode, owner, group, acl=None):
+        """
+        Evaluate access to a path from its stat fields.
+
+        :param mode: The st_mode of the path.
+        :param owner: The st_uid of the path.
+        :param group: The st_gid of the path.
+        :param acl: The entries returned by _read_acl, or None.
+        :return: The granted bits, read being 4, write 2 and execute 1.
+        :rtype: int
+        """
+        if self.uid == 0:
+            # root reads and writes anything, and executes directories and files with any execute bit
+            return 6 | bool(stat.S_ISDIR(mode) or mode & 0o111)
+        if owner == self.uid:
+            return (mode >> 6) & 7
+        if acl:
+            mask, named, group_bits, group_matched, other = 7, None, 0, False, mode & 7
+            for tag, perm, ident in acl:
+                if tag == ACL_MASK:
+                    mask = perm
+                elif tag == ACL_USER and ident == self.uid:
+                    named = perm
+                elif (tag == ACL_GROUP_OBJ and group in self.gids) or (tag == ACL_GROUP and ident in self.gids):
+                    group_matched = True
+                    group_bits |= perm
+                elif tag == ACL_OTHER:
+                    other = perm
+            if named is not None:
+                return named & mask
+            if group_matched:
+                return group_bits & mask
+            return other
+        if group in self.gids:
+            return (mode >> 3) & 7
+        return mode & 7
+
+    def _os_access_bits(self, path):
+        """
+        Ask the kernel, only possible for the current process.
+        """
+        if not self.is_current:
+            raise PermissionError(f"Cannot evaluate access to {path} for uid {self.uid}")
+        effective = os.access in os.supports_effective_ids
+        return sum(bit for bit in (os.R_OK, os.W_OK, os.X_OK)
+                   if os.access(path, bit, effective_ids=effective))
+
+    def _bits(self, path, st, acls):
+        """
+        The granted bits of a path, given its stat result.
+        """
+        try:
+            acl = _read_acl(path) if acls and self.uid != 0 and st.st_uid != self.uid else None
+        except _UndecidedAccess:
+            return self._os_access_bits(path)
+        return self.mode_bits(st.st_mode, st.st_uid, st.st_gid, acl)
+
+    def access(self, path, acls=False):
+        """
+        The effective access to one path.
+
+        :param path: The path to the file or directory.
+        :type path: str
+        :param acls: Whether to honour POSIX ACLs, costing one getxattr call per path not owned by the user.
+        :type acls: bool
+        :return: The granted access, with read, write and execute attributes.
+        :rtype: PermissionBits
+        """
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise FileNotFoundError(f"The file or directory {path} does not exist.") from None
+        return _PERMISSION_BITS[self._bits(path, st, acls)]
+
+    def access_many(self, paths, acls=False, check_parents=False):
+        """
+        The effective access to a batch of paths.
+
+        :param paths: Paths, or PermissionEntry values from scan_permissions whose stat fields are reused.
+        :type paths: iterable
+        :param acls: Whether to honour POSIX ACLs.
+        :type acls: bool
+        :param check_parents: Whether to also require search permission on every parent directory, each evaluated
+            once per batch. Only needed for a context other than the current process.
+        :type check_parents: bool
+        :return: Path to PermissionBits, or to None for paths that do not exist.
+        :rtype: dict
+        """
+        results = {}
+        searchable = {}
+        for item in paths:
+            if isinstance(item, PermissionEntry) and not stat.S_ISLNK(item.mode):
+                path, st = item.path, os.stat_result((item.mode, 0, 0, 0, item.uid, item.gid, 0, 0, 0, 0))
+            else:
+                path = os.fspath(item.path if isinstance(item, PermissionEntry) else item)
+                try:
+                    st = os.stat(path)
+                except PermissionError:
+                    results[path] = _PERMISSION_BITS[0]
+                    continue
+                except OSError:
+                    results[path] = None
+                    continue
+            if check_parents and not self._parents_searchable(path, acls, searchable):
+                results[path] = _PERMISSION_BITS[0]
+                continue
+            results[path] = _PERMISSION_BITS[self._bits(path, st, acls)]
+        return results
+
+    def _parents_searchable(self, path, acls, cache):
+        """
+        Whether every parent directory of path grants search permission, caching each directory's answer.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        pending = []
+        while directory not in cache:
+            pending.append(directory)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        allowed = cache.get(directory, True)
+        # Walk back down from the outermost unknown directory, a closed directory closes everything below it
+        for directory in reversed(pending):
+            if allowed:
+                try:
+                    allowed = bool(self._bits(directory, os.stat(directory), acls) & 1)
+                except OSError:
+                    allowed = False
+            cache[directory] = allowed
+        return allowed
+
+    def __repr__(self):
+        return f"AccessContext(uid={self.uid}, gids={sorted(self.gids)})"
+
+
+def effective_access(path, acls=False):
+    """
+    This function checks whether the current process can read, write and execute a file or directory.
+
+    :param path: The path to the file or directory to check.
+    :type path: str
+    :param acls: Whether to honour POSIX ACLs.
+    :type acls: bool
+    :return: The granted access, with read, write and execute attributes.
+    :rtype: PermissionBits
+    """
+    return AccessContext().access(path, acls)
+
+
+async def _in_executor(func, path, executor, timeout, stuck=None):
+    """
+    Run func(path) in an executor, giving up after timeout seconds. The timeout starts once func is running in a
+    thread, so a call queued behind busy workers is not failed for their sake. A stat blocked on a dead mount cannot
+    be interrupted, so its worker thread stays busy after the timeout; only the caller stops waiting. The future of
+    such a call is added to the stuck set, if given, until its thread is done.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+
+    def run():
+        loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+        return func(path)
+
+    future = loop.run_in_executor(executor, run)
+    if timeout is None:
+        return await future
+    try:
+        # a call cancelled while queued completes future without ever starting
+        await asyncio.wait([started, future], return_when=asyncio.FIRST_COMPLETED)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        # nobody awaits the abandoned call, so its outcome is fetched here to keep asyncio from logging it
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        if stuck is not None:
+            stuck.add(future)
+            future.add_done_callback(stuck.discard)
+        raise TimeoutError(f"Checking {path} took longer than {timeout} seconds") from None
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+
+
+async def acheck_permissions(path, executor=None, timeout=None):
+    """
+    This function checks the permissions of a file or directory without blocking the event loop.
+
+    :param path: The path to the file or directory to check.
+    :type path: str
+    :param executor: Where the stat call runs, defaults to the event loop's default executor.
+    :type executor: concurrent.futures.Executor
+    :param timeout: Seconds the stat call may run before TimeoutError is raised, counted from when it starts in a
+        thread, None to wait for ever.
+    :type timeout: float
+    :return: A dictionary containing the permissions of the file or directory.
+    :rtype: dict
+    """
+    return await _in_executor(check_permissions, path, executor, timeout)
+
+
+async def aget_permissions(path, executor=None, timeout=None):
+    """
+    This function returns the compact permissions of a file or directory without blocking the event loop.
+
+    :param path: The path to the file or directory to check.
+    :type path: str
+    :param executor: Where the stat call runs, defaults to the event loop's default executor.
+    :type executor: concurrent.futures.Executor
+    :param timeout: Seconds the stat call may run before TimeoutError is raised, counted from when it starts in a
+        thread, None to wait for ever.
+    :type timeout: float
+    :return: The permissions.
+    :rtype: Permissions
+    """
+    return await _in_executor(get_permissions, path, executor, timeout)
+
+
+class PermissionResult(typing.NamedTuple):
+    """
+    The outcome of checking one path with aiter_permissions: the permissions, or the exception raised instead.
+    """
+    path: str
+    permissions: typing.Any
+    error: typing.Optional[BaseException]
+
+
+async def aiter_permissions(paths, max_concurrency=DEFAULT_ASYNC_CONCURRENCY, timeout=None, executor=None,
+                            compact=False):
+    """
+    Check many paths concurrently, yielding each result as soon as it is ready, so one slow mount only delays its
+    own paths. At most max_concurrency checks are in flight, and paths are taken from the iterable only as slots
+    free up. A check that timed out keeps its slot until its thread returns, so later paths wait for a free thread
+    instead of timing out in the executor's queue behind it.
+
+    :param paths: The paths to check.
+    :type paths: iterable
+    :param max_concurrency: Checks in flight at once.
+    :type max_concurrency: int
+    :param timeout: Seconds each path may run in its thread before it is reported with a TimeoutError, None to wait
+        for ever.
+    :type timeout: float
+    :param executor: Where the stat calls run. Defaults to a thread pool of max_concurrency threads, which is not
+        waited for on exit, so threads stuck on a dead mount never hold up the caller.
+    :type executor: concurrent.futures.Executor
+    :param compact: Whether to report Permissions values instead of check_permissions dictionaries.
+    :type compact: bool
+    :return: An async iterator of PermissionResult, in completion order.
+    :rtype: async iterator
+    """
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency should be at least 1, got {max_concurrency}")
+    check = get_permissions if compact else check_permissions
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency,
+                                                         thread_name_prefix='aiter_permissions')
+
+    # calls that timed out but whose threads are still busy
+    stuck = set()
+
+    async def probe(path):
+        try:
+            return PermissionResult(path, await _in_executor(check, path, executor, timeout, stuck), None)
+        except (OSError, TimeoutError) as error:
+            return PermissionResult(path, None, error)
+
+    pending = set()
+    iterator = iter(paths)
+    exhausted = False
+    try:
+        while True:
+            free = max_concurrency - len(pending) - len(stuck)
+            if free > 0 and not exhausted:
+                batch = list(itertools.islice(iterator, free))
+                exhausted = len(batch) < free
+                pending.update(asyncio.ensure_future(probe(path)) for path in batch)
+            if not pending and exhausted:
+                return
+            done, _ = await asyncio.wait(pending | stuck, return_when=asyncio.FIRST_COMPLETED)
+            for task in done & pending:
+                pending.discard(task)
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,22 @@
 """ Utility methods for generating random values"""
+import collections
+import functools
+import hashlib
+import itertools
+import math
+import os
 import random
+import secrets
 import string
+import sys
+import threading
+import time
+import typing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Define charsets
 charsets = {
@@ -11,22 +27,20 @@ charsets = {
 }
 
 
-def _random_string(length: int, include_lowercase: bool = True, include_uppercase: bool = True,
-                   include_digits: bool = True, include_punctuation: bool = True) -> str:
-    """
-    Generate a random string of a given length with the specified character sets.
+# strings generated per chunk by iter_random_strings unless told otherwise
+DEFAULT_CHUNK_SIZE = 10000
 
-    Args:
-        length (int): Length of the random string to generate.
-        include_lowercase (bool): Whether to include lowercase letters in the string. Defaults to True.
-        include_uppercase (bool): Whether to include uppercase letters in the string. Defaults to True.
-        include_digits (bool): Whether to include digits in the string. Defaults to True.
-        include_punctuation (bool): Whether to include punctuation in the string. Defaults to True.
+
+@functools.lru_cache(maxsize=None)
+def _charset_table(include_lowercase: bool, include_uppercase: bool, include_digits: bool,
+                   include_punctuation: bool) -> typing.Tuple[bytes, bytes, int]:
+    """
+    Build, once per combination of character sets, the tables that turn random bytes into charset characters.
 
     Returns:
-        str: Generated random string.
+        tuple: A bytes.translate table mapping each byte value to a charset character, the byte values to delete
+            so that every character stays equally likely, and how many of the 256 byte values are kept.
     """
-    assert length > 0, "Length should be a positive integer."
     assert include_lowercase or include_uppercase or include_digits or include_punctuation, \
         "At least one character set should be included."
 
@@ -40,7 +54,367 @@ def _random_string(length: int, include_lowercase: bool = True, include_uppercas
     if include_punctuation:
         charset += charsets["punctuation"]
 
-    return ''.join(random.choice(charset) for _ in range(length))
+    # keep the largest multiple of len(charset) byte values so the modulo mapping is unbiased
+    kept = 256 - 256 % len(charset)
+    table = bytes(ord(charset[value % len(charset)]) for value in range(256))
+    return table, bytes(range(kept, 256)), kept
+
+
+def _random_chars(count: int, table: typing.Tuple[bytes, bytes, int],
+                  randbytes: typing.Callable[[int], bytes]) -> bytes:
+    """
+    Draw count random charset characters as ASCII bytes: random bytes in bulk, mapped through the charset table.
+
+    Args:
+        count (int): Number of characters.
+        table (tuple): Result of _charset_table.
+        randbytes (callable): Source of random bytes, such as random.randbytes.
+
+    Returns:
+        bytes: count ASCII characters.
+    """
+    translate, rejected, kept = table
+    chars = bytearray()
+    while len(chars) < count:
+        # ask for enough bytes that, after dropping the rejected values, one draw is almost always enough
+        draw = (count - len(chars)) * 256 // kept + 32
+        chars += randbytes(draw).translate(translate, rejected)
+    del chars[count:]
+    return bytes(chars)
+
+
+def _derive_seed(seed: int, spawn_key: typing.Tuple[int, ...]) -> int:
+    """ A seed for the stream at spawn_key below seed, unrelated to the seeds of its parent and siblings"""
+    if not spawn_key:
+        return seed
+    digest = hashlib.blake2b(repr((seed, spawn_key)).encode('ascii'), digest_size=32).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class RandomGenerator:
+    """
+    Random string generator drawing from its own source instead of the shared global random module.
+    Sources:
+        'random': a random.Random seeded with seed, reproducible for load-test replays.
+        'system': secrets.SystemRandom, cryptographically secure, for tokens. Never reproducible.
+        'numpy': a NumPy Generator seeded with seed, needs numpy.
+        'global': the random module itself, what the module level functions use.
+    Independent streams for parallel workers come from child/spawn (reproducible, one per worker index) or
+        for_thread (one per thread and process), so workers neither contend on one lock nor repeat each other.
+    """
+
+    KINDS = ('random', 'system', 'numpy', 'global')
+
+    def __init__(self, kind: str = 'random', seed: typing.Optional[int] = None,
+                 spawn_key: typing.Tuple[int, ...] = ()):
+        """
+        Constructor for RandomGenerator class.
+
+        Args:
+            kind (str): Source of randomness, one of KINDS. Defaults to 'random'.
+            seed (int, optional): Seed for the 'random' and 'numpy' sources. Defaults to a fresh seed from the OS,
+                available as the seed attribute so a run can be replayed.
+            spawn_key (tuple, optional): Path of child indices below seed, as set by child. Defaults to ().
+        """
+        assert kind in self.KINDS, f"Kind should be one of {self.KINDS}."
+        if kind in ('random', 'numpy') and seed is None:
+            seed = secrets.randbits(128)
+        self.kind = kind
+        self.seed = seed
+        self.spawn_key = tuple(spawn_key)
+        if kind == 'random':
+            self.source = random.Random(_derive_seed(seed, self.spawn_key))
+            self._randbytes = self.source.randbytes
+        elif kind == 'system':
+            self.source = secrets.SystemRandom()
+            self._randbytes = self.source.randbytes
+        elif kind == 'numpy':
+            if numpy is None:
+                raise ImportError("The 'numpy' source requires the numpy package")
+            self.source = numpy.random.default_rng(numpy.random.SeedSequence(seed, spawn_key=self.spawn_key))
+            self._randbytes = self.source.bytes
+        else:
+            self.source = random
+            self._randbytes = random.randbytes
+        self._local = threading.local()
+        self._thread_counter = itertools.count()
+
+    @classmethod
+    def seeded(cls, seed: typing.Optional[int] = None) -> 'RandomGenerator':
+        """
+        A reproducible generator over random.Random.
+
+        Args:
+            seed (int, optional): Seed, the same seed gives the same strings. Defaults to a fresh seed.
+
+        Returns:
+            RandomGenerator: The generator.
+        """
+        return cls('random', seed)
+
+    @classmethod
+    def secure(cls) -> 'RandomGenerator':
+        """
+        A cryptographically secure generator over secrets.SystemRandom, for tokens and passwords.
+
+        Returns:
+            RandomGenerator: The generator.
+        """
+        return cls('system')
+
+    def child(self, index: int) -> 'RandomGenerator':
+        """
+        The independent generator for one worker. The same parent seed and index always give the same stream,
+            so hand child(i) to worker i for a reproducible parallel run.
+
+        Args:
+            index (int): Worker index, a non-negative integer.
+
+        Returns:
+            RandomGenerator: A generator of the same kind with its own stream.
+        """
+        assert index >= 0, "Index should not be negative."
+        if self.kind == 'system':
+            return RandomGenerator('system')
+        if self.kind == 'global':
+            return RandomGenerator('random', random.getrandbits(128))
+        return RandomGenerator(self.kind, self.seed, self.spawn_key + (index,))
+
+    def spawn(self, count: int) -> typing.List['RandomGenerator']:
+        """
+        Independent generators for count workers, child(0) to child(count - 1).
+
+        Args:
+            count (int): Number of generators.
+
+        Returns:
+            list: The generators.
+        """
+        return [self.child(index) for index in range(count)]
+
+    def for_thread(self) -> 'RandomGenerator':
+        """
+        The calling thread's own child generator, created on first use in each thread and in each process, so a
+            forked worker does not continue its parent's stream.
+
+        Returns:
+            RandomGenerator: The generator for this thread.
+        """
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.generator = self.child(next(self._thread_counter) + (os.getpid() << 32))
+            local.pid = os.getpid()
+        return local.generator
+
+    def random_strings(self, count: int, length: int, include_lowercase: bool = True, include_uppercase: bool = True,
+                       include_digits: bool = True, include_punctuation: bool = True) -> typing.List[str]:
+        """
+        Generate many random strings of the same length and character sets at once, far faster than one at a time.
+
+        Args:
+            count (int): Number of strings to generate.
+            length (int): Length of each string.
+            include_lowercase (bool): Whether to include lowercase letters in the strings. Defaults to True.
+            include_uppercase (bool): Whether to include uppercase letters in the strings. Defaults to True.
+            include_digits (bool): Whether to include digits in the strings. Defaults to True.
+            include_punctuation (bool): Whether to include punctuation in the strings. Defaults to True.
+
+        Returns:
+            list: count generated random strings.
+        """
+        assert length > 0, "Length should be a positive integer."
+        assert count >= 0, "Count should not be negative."
+        table = _charset_table(include_lowercase, include_uppercase, include_digits, include_punctuation)
+        text = _random_chars(count * length, table, self._randbytes).decode('ascii')
+        return [text[start:start + length] for start in range(0, count * length, length)]
+
+    def iter_random_strings(self, count: int, length: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            include_lowercase: bool = True, include_uppercase: bool = True,
+                            include_digits: bool = True,
+                            include_punctuation: bool = True) -> typing.Iterator[typing.List[str]]:
+        """
+        Generate random strings in fixed-size chunks, so very large counts never sit in memory at once.
+
+        Args:
+            count (int): Total number of strings to generate.
+            length (int): Length of each string.
+            chunk_size (int): Number of strings per chunk, the last chunk may be smaller.
+                Defaults to DEFAULT_CHUNK_SIZE.
+            include_lowercase (bool): Whether to include lowercase letters in the strings. Defaults to True.
+            include_uppercase (bool): Whether to include uppercase letters in the strings. Defaults to True.
+            include_digits (bool): Whether to include digits in the strings. Defaults to True.
+            include_punctuation (bool): Whether to include punctuation in the strings. Defaults to True.
+
+        Returns:
+            iterator: Lists of up to chunk_size generated random strings.
+        """
+        assert chunk_size > 0, "Chunk size should be a positive integer."
+        for start in range(0, count, chunk_size):
+            yield self.random_strings(min(chunk_size, count - start), length, include_lowercase, include_uppercase,
+                                      include_digits, include_punctuation)
+
+    def random_string(self, length: int, include_punctuation: bool = False) -> str:
+        """
+        Generate a random string of a given length, with an option to include punctuation.
+
+        Args:
+            length (int): Length of the random string to generate.
+            include_punctuation (bool): Whether to include punctuation in the string. Defaults to False.
+
+        Returns:
+            str: Generated random string.
+        """
+        return self.random_strings(1, length, include_punctuation=include_punctuation)[0]
+
+    def random_lowercase_string(self, length: int, include_digits: bool = False,
+                                include_punctuation: bool = False) -> str:
+        """
+        Generate a random string of a given length, with only lowercase letters, digits and punctuation based on
+            input.
+
+        Args:
+            length (int): Length of the random string to generate.
+            include_digits (bool): Whether to include digits in the string. Defaults to False.
+            include_punctuation (bool): Whether to include punctuation in the string. Defaults to False.
+
+        Returns:
+            str: Generated random string.
+        """
+        return self.random_strings(1, length, include_uppercase=False, include_digits=include_digits,
+                                   include_punctuation=include_punctuation)[0]
+
+    def random_uppercase_string(self, length: int, include_digits: bool = False,
+                                include_punctuation: bool = False) -> str:
+        """
+        Generate a random string of a given length, with only uppercase letters, digits and punctuation based on
+            input.
+
+        Args:
+            length (int): Length of the random string to generate.
+            include_digits (bool): Whether to include digits in the string. Defaults to False.
+            include_punctuation (bool): Whether to include punctuation in the string. Defaults to False.
+
+        Returns:
+            str: Generated random string.
+        """
+        return self.random_strings(1, length, include_lowercase=False, include_digits=include_digits,
+                                   include_punctuation=include_punctuation)[0]
+
+    def random_digits_string(self, length: int) -> str:
+        """
+        Generate a random string of a given length, with only digits.
+
+        Args:
+            length (int): Length of the random string to generate.
+
+        Returns:
+            str: Generated random string.
+        """
+        return self.random_strings(1, length, include_uppercase=False, include_lowercase=False,
+                                   include_punctuation=False)[0]
+
+    def random_punctuation_string(self, length: int) -> str:
+        """
+        Generate a random string of a given length, with only punctuation.
+
+        Args:
+            length (int): Length of the random string to generate.
+
+        Returns:
+            str: Generated random string.
+        """
+        return self.random_strings(1, length, include_lowercase=False, include_uppercase=False,
+                                   include_digits=False)[0]
+
+    def random_letters_string(self, length: int) -> str:
+        """
+        Generate a random string of a given length, with only letters (lowercase and uppercase).
+
+        Args:
+            length (int): Length of the random string to generate.
+
+        Returns:
+            str: Generated random string.
+        """
+        return self.random_strings(1, length, include_digits=False, include_punctuation=False)[0]
+
+    def __reduce__(self):
+        """ Pickle the kind, seed and spawn key, the copy restarts the stream from its seed"""
+        return type(self), (self.kind, self.seed, self.spawn_key)
+
+    def __repr__(self):
+        """
+        Formal string representation of RandomGenerator object.
+
+        Returns:
+            str: RandomGenerator class in formal string format, showing the source and seed.
+        """
+        spawn_key = f', spawn_key={self.spawn_key}' if self.spawn_key else ''
+        return f"RandomGenerator(kind={self.kind!r}, seed={self.seed}{spawn_key})"
+
+
+# the generator behind the module level functions, drawing from the global random module
+_global_generator = RandomGenerator('global')
+
+
+def random_strings(count: int, length: int, include_lowercase: bool = True, include_uppercase: bool = True,
+                   include_digits: bool = True, include_punctuation: bool = True) -> typing.List[str]:
+    """
+    Generate many random strings of the same length and character sets at once, far faster than one at a time.
+
+    Args:
+        count (int): Number of strings to generate.
+        length (int): Length of each string.
+        include_lowercase (bool): Whether to include lowercase letters in the strings. Defaults to True.
+        include_uppercase (bool): Whether to include uppercase letters in the strings. Defaults to True.
+        include_digits (bool): Whether to include digits in the strings. Defaults to True.
+        include_punctuation (bool): Whether to include punctuation in the strings. Defaults to True.
+
+    Returns:
+        list: count generated random strings.
+    """
+    return _global_generator.random_strings(count, length, include_lowercase, include_uppercase, include_digits,
+                                            include_punctuation)
+
+
+def iter_random_strings(count: int, length: int, chunk_size: int = DEFAULT_CHUNK_SIZE, include_lowercase: bool = True,
+                        include_uppercase: bool = True, include_digits: bool = True,
+                        include_punctuation: bool = True) -> typing.Iterator[typing.List[str]]:
+    """
+    Generate random strings in fixed-size chunks, so very large counts never sit in memory at once.
+
+    Args:
+        count (int): Total number of strings to generate.
+        length (int): Length of each string.
+        chunk_size (int): Number of strings per chunk, the last chunk may be smaller. Defaults to DEFAULT_CHUNK_SIZE.
+        include_lowercase (bool): Whether to include lowercase letters in the strings. Defaults to True.
+        include_uppercase (bool): Whether to include uppercase letters in the strings. Defaults to True.
+        include_digits (bool): Whether to include digits in the strings. Defaults to True.
+        include_punctuation (bool): Whether to include punctuation in the strings. Defaults to True.
+
+    Returns:
+        iterator: Lists of up to chunk_size generated random strings.
+    """
+    return _global_generator.iter_random_strings(count, length, chunk_size, include_lowercase, include_uppercase,
+                                                 include_digits, include_punctuation)
+
+
+def _random_string(length: int, include_lowercase: bool = True, include_uppercase: bool = True,
+                   include_digits: bool = True, include_punctuation: bool = True) -> str:
+    """
+    Generate a random string of a given length with the specified character sets.
+
+    Args:
+        length (int): Length of the random string to generate.
+        include_lowercase (bool): Whether to include lowercase letters in the string. Defaults to True.
+        include_uppercase (bool): Whether to include uppercase letters in the string. Defaults to True.
+        include_digits (bool): Whether to include digits in the string. Defaults to True.
+        include_punctuation (bool): Whether to include punctuation in the string. Defaults to True.
+
+    Returns:
+        str: Generated random string.
+    """
+    return random_strings(1, length, include_lowercase, include_uppercase, include_digits, include_punctuation)[0]
 
 
 def random_string(length: int, include_punctuation: bool = False) -> str:
@@ -127,3 +501,502 @@ def random_letters_string(length: int) -> str:
         str: Generated random string.
     """
     return _random_string(length, include_digits=False, include_punctuation=False)
+
+
+def id_space(length: int, include_lowercase: bool = True, include_uppercase: bool = True, include_digits: bool = True,
+             include_punctuation: bool = True) -> int:
+    """
+    Number of distinct strings of a given length and character sets.
+
+    Args:
+        length (int): Length of the strings.
+        include_lowercase (bool): Whether lowercase letters are included. Defaults to True.
+        include_uppercase (bool): Whether uppercase letters are included. Defaults to True.
+        include_digits (bool): Whether digits are included. Defaults to True.
+        include_punctuation (bool): Whether punctuation is included. Defaults to True.
+
+    Returns:
+        int: The size of the space, charset size to the power of length.
+    """
+    table = _charset_table(include_lowercase, include_uppercase, include_digits, include_punctuation)[0]
+    return len(set(table)) ** length
+
+
+def collision_probability(count: int, length: int, include_lowercase: bool = True, include_uppercase: bool = True,
+                          include_digits: bool = True, include_punctuation: bool = True) -> float:
+    """
+    Birthday bound estimate of the probability that count random strings are not all distinct.
+
+    Args:
+        count (int): Number of strings drawn.
+        length (int): Length of the strings.
+        include_lowercase (bool): Whether lowercase letters are included. Defaults to True.
+        include_uppercase (bool): Whether uppercase letters are included. Defaults to True.
+        include_digits (bool): Whether digits are included. Defaults to True.
+        include_punctuation (bool): Whether punctuation is included. Defaults to True.
+
+    Returns:
+        float: Probability between 0 and 1.
+    """
+    space = id_space(length, include_lowercase, include_uppercase, include_digits, include_punctuation)
+    if count > space:
+        return 1.0
+    # 1 - exp(-n(n-1)/2N), through expm1 so tiny probabilities do not round to zero
+    return -math.expm1(-count * (count - 1) / (2 * space))
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings in a fixed bit array. Membership tests never miss an added value, and report a
+        value that was never added with probability about error_rate once capacity values are in.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6):
+        """
+        Constructor for BloomFilter class.
+
+        Args:
+            capacity (int): Number of values the filter is sized for.
+            error_rate (float): False positive rate at capacity. Defaults to one in a million.
+        """
+        assert capacity > 0, "Capacity should be a positive integer."
+        assert 0 < error_rate < 1, "Error rate should be between 0 and 1."
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str) -> typing.List[int]:
+        """ Bit positions of a value, by double hashing one BLAKE2b digest"""
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, value: str) -> bool:
+        """
+        Add a value.
+
+        Args:
+            value (str): Value to add.
+
+        Returns:
+            bool: True if the value was not in the filter before, False if it (probably) was.
+        """
+        bits = self.bits
+        added = False
+        for position in self._positions(value):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, value: str) -> bool:
+        """ Whether the value was (probably) added"""
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def __len__(self) -> int:
+        """ Number of values added"""
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        """ Size of the bit array in bytes"""
+        return len(self.bits)
+
+    def __repr__(self):
+        """
+        Formal string representation of BloomFilter object.
+
+        Returns:
+            str: BloomFilter class and sizing in formal string format.
+        """
+        return f"BloomFilter(capacity={self.capacity}, error_rate={self.error_rate})"
+
+
+class UniqueIdGenerator:
+    """
+    Mints random strings that are never issued twice, tracking issued values in an index: an exact set, or a
+        BloomFilter for very large volumes. A Bloom false positive only discards a fresh candidate, it can never
+        let a duplicate through.
+    """
+
+    # consecutive draws without a single new value before the space is considered exhausted
+    MAX_EMPTY_DRAWS = 100
+
+    def __init__(self, length: int, index: str = 'set', capacity: typing.Optional[int] = None,
+                 error_rate: float = 1e-6, generator: typing.Optional[RandomGenerator] = None,
+                 include_lowercase: bool = True, include_uppercase: bool = True, include_digits: bool = True,
+                 include_punctuation: bool = False):
+        """
+        Constructor for UniqueIdGenerator class.
+
+        Args:
+            length (int): Length of each ID.
+            index (str): 'set' for exact dedup, 'bloom' for a BloomFilter. Defaults to 'set'.
+            capacity (int, optional): IDs the Bloom filter is sized for, required with index='bloom'.
+            error_rate (float): Bloom filter false positive rate at capacity. Defaults to one in a million.
+            generator (RandomGenerator, optional): Source of the IDs. Defaults to a secure generator.
+            include_lowercase (bool): Whether to include lowercase letters in the IDs. Defaults to True.
+            include_uppercase (bool): Whether to include uppercase letters in the IDs. Defaults to True.
+            include_digits (bool): Whether to include digits in the IDs. Defaults to True.
+            include_punctuation (bool): Whether to include punctuation in the IDs. Defaults to False.
+        """
+        assert length > 0, "Length should be a positive integer."
+        if index == 'set':
+            self.index = set()
+        elif index == 'bloom':
+            assert capacity, "A Bloom filter index needs a capacity."
+            self.index = BloomFilter(capacity, error_rate)
+        else:
+            raise ValueError(f"Unknown index: {index!r}, expected 'set' or 'bloom'")
+        self.length = length
+        self.generator = generator if generator is not None else RandomGenerator.secure()
+        self._charsets = (include_lowercase, include_uppercase, include_digits, include_punctuation)
+        self.space = id_space(length, *self._charsets)
+        self.issued = 0
+        # candidates discarded as already issued, or as Bloom false positives
+        self.rejected = 0
+
+    def collision_probability(self, count: typing.Optional[int] = None) -> float:
+        """
+        Probability that count random IDs of this length and charset would collide without dedup.
+
+        Args:
+            count (int, optional): Number of IDs. Defaults to the number issued so far.
+
+        Returns:
+            float: Probability between 0 and 1.
+        """
+        return collision_probability(self.issued if count is None else count, self.length, *self._charsets)
+
+    def add(self, values: typing.Iterable[str]) -> None:
+        """
+        Record IDs issued elsewhere, such as ones already in the database, so they are never minted.
+
+        Args:
+            values (iterable): Existing IDs.
+        """
+        index = self.index
+        if isinstance(index, set):
+            before = len(index)
+            index.update(values)
+            self.issued += len(index) - before
+        else:
+            self.issued += sum(index.add(value) for value in values)
+
+    def mint(self) -> str:
+        """
+        Mint one new ID.
+
+        Returns:
+            str: An ID never issued before.
+        """
+        return self.mint_batch(1)[0]
+
+    def mint_batch(self, count: int) -> typing.List[str]:
+        """
+        Mint count new IDs, drawing candidates in bulk and deduplicating them against the index and each other.
+
+        Args:
+            count (int): Number of IDs.
+
+        Returns:
+            list: count distinct IDs never issued before.
+        """
+        assert count >= 0, "Count should not be negative."
+        index = self.index
+        exact = isinstance(index, set)
+        minted = []
+        empty_draws = 0
+        while len(minted) < count:
+            if exact and len(index) >= self.space:
+                raise RuntimeError(f'All {self.space} IDs of length {self.length} have been issued')
+            need = count - len(minted)
+            # draw a little extra when the index is filling up, so one draw is usually enough
+            draw = need + need * len(index) // self.space + 1
+            candidates = dict.fromkeys(self.generator.random_strings(draw, self.length, *self._charsets))
+            self.rejected += draw - len(candidates)
+            if exact:
+                fresh = [value for value in candidates if value not in index]
+                self.rejected += len(candidates) - len(fresh)
+                del fresh[need:]
+                index.update(fresh)
+            else:
+                fresh = []
+                for value in candidates:
+                    if len(fresh) == need:
+                        break
+                    if index.add(value):
+                        fresh.append(value)
+                    else:
+                        self.rejected += 1
+            empty_draws = 0 if fresh else empty_draws + 1
+            if empty_draws >= self.MAX_EMPTY_DRAWS:
+                raise RuntimeError(f'No new IDs of length {self.length} after {empty_draws} draws')
+            minted += fresh
+        self.issued += count
+        return minted
+
+    @property
+    def nbytes(self) -> int:
+        """ Approximate memory held by the index in bytes"""
+        if isinstance(self.index, set):
+            return sys.getsizeof(self.index) + sum(sys.getsizeof(value) for value in self.index)
+        return self.index.nbytes
+
+    def __len__(self) -> int:
+        """ Number of IDs issued or added"""
+        return self.issued
+
+    def __contains__(self, value: str) -> bool:
+        """ Whether the ID was issued or added, for a Bloom index possibly a false positive"""
+        return value in self.index
+
+    def __repr__(self):
+        """
+        Formal string representation of UniqueIdGenerator object.
+
+        Returns:
+            str: UniqueIdGenerator class, length and index in formal string format.
+        """
+        return f"UniqueIdGenerator(length={self.length}, index={self.index.__class__.__name__}, issued={self.issued})"
+
+
+class PoolStats:
+    """
+    Counters for a StringPool.
+    """
+    __slots__ = ('hits', 'exhausted', 'refills', 'refilled', 'refill_errors', 'refill_seconds', 'wait_seconds')
+
+    def __init__(self):
+        """
+        Constructor for PoolStats class, all counters start at zero.
+        """
+        self.hits = 0
+        self.exhausted = 0
+        self.refills = 0
+        self.refilled = 0
+        self.refill_errors = 0
+        self.refill_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    @property
+    def refill_rate(self) -> float:
+        """ Strings generated per second of refill work"""
+        return self.refilled / self.refill_seconds if self.refill_seconds else 0.0
+
+    def as_dict(self) -> typing.Dict[str, float]:
+        """
+        The counters as a dict.
+
+        Returns:
+            dict: Counter name to value, plus refill_rate.
+        """
+        counters = {name: getattr(self, name) for name in self.__slots__}
+        counters['refill_rate'] = self.refill_rate
+        return counters
+
+    def __repr__(self):
+        """
+        Formal string representation of PoolStats object.
+
+        Returns:
+            str: PoolStats class in formal string format, showing the counters.
+        """
+        return f"PoolStats({', '.join(f'{k}={v}' for k, v in self.as_dict().items())})"
+
+
+class StringPool:
+    """
+    Pre-generated random strings for latency sensitive callers. Each (length, character sets) configuration has a
+        bounded buffer, and a background thread refills a buffer in bulk once it drops below the low water mark, so
+        get is a deque pop. A caller that finds its buffer empty generates one string inline, counted as exhausted
+        with the time spent in wait_seconds.
+    """
+
+    def __init__(self, capacity: int = 10000, low_water: typing.Optional[int] = None,
+                 generator: typing.Optional[RandomGenerator] = None, background: bool = True):
+        """
+        Constructor for StringPool class.
+
+        Args:
+            capacity (int): Strings kept per configuration. Defaults to 10000.
+            low_water (int, optional): Buffer size below which a refill starts. Defaults to a quarter of capacity.
+            generator (RandomGenerator, optional): Source of the strings. Defaults to the global random module.
+            background (bool): Whether to refill from a background thread, otherwise refills happen only through
+                refill. Defaults to True.
+        """
+        assert capacity > 0, "Capacity should be a positive integer."
+        self.capacity = capacity
+        self.low_water = capacity // 4 if low_water is None else low_water
+        assert 0 <= self.low_water < capacity, "Low water mark should be below the capacity."
+        self.generator = generator if generator is not None else _global_generator
+        self.stats = PoolStats()
+        # configuration -> exception raised by its last failed refill
+        self.refill_failures = {}
+        self._buffers = {}
+        # One lock per configuration, so prefill and the background thread never top up the same buffer at once
+        self._refill_locks = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._refill_loop, name='StringPool-refill', daemon=True)
+            self._thread.start()
+
+    def get(self, length: int, include_lowercase: bool = True, include_uppercase: bool = True,
+            include_digits: bool = True, include_punctuation: bool = False) -> str:
+        """
+        Take one pre-generated random string.
+
+        Args:
+            length (int): Length of the string.
+            include_lowercase (bool): Whether to include lowercase letters in the string. Defaults to True.
+            include_uppercase (bool): Whether to include uppercase letters in the string. Defaults to True.
+            include_digits (bool): Whether to include digits in the string. Defaults to True.
+            include_punctuation (bool): Whether to include punctuation in the string. Defaults to False.
+
+        Returns:
+            str: Generated random string.
+        """
+        key = self._key(length, include_lowercase, include_uppercase, include_digits, include_punctuation)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffer(key)
+        try:
+            value = buffer.popleft()
+        except IndexError:
+            return self._get_exhausted(key)
+        with self._lock:
+            self.stats.hits += 1
+        if len(buffer) < self.low_water:
+            self._wake.set()
+        return value
+
+    @staticmethod
+    def _key(length: int, *include: bool) -> tuple:
+        """ The buffer key of a configuration, checked here so an invalid one never reaches the refill thread"""
+        assert length > 0, "Length should be a positive integer."
+        assert any(include), "At least one character set should be included."
+        return (length, *include)
+
+    def _buffer(self, key: tuple, refill: bool = True) -> collections.deque:
+        """ The buffer of a configuration, created and, unless refill is False, queued for its first refill on first
+            use"""
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = collections.deque(maxlen=self.capacity)
+                self._refill_locks[key] = threading.Lock()
+        if refill:
+            self._wake.set()
+        return buffer
+
+    def _get_exhausted(self, key: tuple) -> str:
+        """ One string generated inline for a caller that found its buffer empty"""
+        started = time.perf_counter()
+        value = self.generator.random_strings(1, *key)[0]
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats.exhausted += 1
+            self.stats.wait_seconds += elapsed
+        self._wake.set()
+        return value
+
+    def prefill(self, length: int, include_lowercase: bool = True, include_uppercase: bool = True,
+                include_digits: bool = True, include_punctuation: bool = False) -> None:
+        """
+        Fill the buffer of a configuration to capacity now, so its first callers never find it empty.
+
+        Args:
+            length (int): Length of the strings.
+            include_lowercase (bool): Whether to include lowercase letters in the strings. Defaults to True.
+            include_uppercase (bool): Whether to include uppercase letters in the strings. Defaults to True.
+            include_digits (bool): Whether to include digits in the strings. Defaults to True.
+            include_punctuation (bool): Whether to include punctuation in the strings. Defaults to False.
+        """
+        key = self._key(length, include_lowercase, include_uppercase, include_digits, include_punctuation)
+        self._refill_buffer(key, self._buffer(key, refill=False))
+
+    def refill(self) -> int:
+        """
+        Top up every buffer that is below its low water mark, as the background thread does. A buffer whose refill
+            fails is skipped, counted in stats.refill_errors with the exception kept in refill_failures, so it
+            cannot stop the others from being refilled.
+
+        Returns:
+            int: Number of strings generated.
+        """
+        with self._lock:
+            buffers = [(key, buffer) for key, buffer in self._buffers.items() if len(buffer) < self.low_water]
+        generated = 0
+        for key, buffer in buffers:
+            try:
+                generated += self._refill_buffer(key, buffer)
+            except Exception as error:  # pylint: disable=broad-except
+                with self._lock:
+                    self.stats.refill_errors += 1
+                    self.refill_failures[key] = error
+        return generated
+
+    def _refill_buffer(self, key: tuple, buffer: collections.deque) -> int:
+        """ Top up one buffer to capacity in one bulk draw"""
+        with self._refill_locks[key]:
+            # Only gets run alongside, and they only shrink the buffer, so the deficit cannot overshoot
+            missing = self.capacity - len(buffer)
+            if missing <= 0:
+                return 0
+            started = time.perf_counter()
+            buffer.extend(self.generator.random_strings(missing, *key))
+            elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats.refills += 1
+            self.stats.refilled += missing
+            self.stats.refill_seconds += elapsed
+        return missing
+
+    def _refill_loop(self) -> None:
+        """ Background thread body: refill whenever a caller signals a low buffer"""
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            self.refill()
+
+    def close(self) -> None:
+        """
+        Stop the background thread. Strings already in the buffers can still be taken.
+        """
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        """ Use the pool as a context manager that closes it on exit"""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Close the pool"""
+        self.close()
+
+    def __len__(self) -> int:
+        """ Number of strings currently buffered across all configurations"""
+        return sum(len(buffer) for buffer in list(self._buffers.values()))
+
+    def __repr__(self):
+        """
+        Formal string representation of StringPool object.
+
+        Returns:
+            str: StringPool class and sizing in formal string format.
+        """
+        return f"StringPool(capacity={self.capacity}, low_water={self.low_water})"
@@ -0,0 +1,672 @@
+"""
+Schema-aware serialization of dataclass, NamedTuple and TypedDict records, built on the serialization_utils strategies
+The encoder and decoder of a record type are generated once from its fields. Records travel as positional rows, or
+    as one array per field in columnar mode, so field names are written once per payload instead of once per record.
+"""
+import collections.abc
+import dataclasses
+import functools
+import itertools
+import threading
+import types
+import typing
+
+from lib.serialization_utils import CborSerializer, JsonSerializer, MsgpackSerializer, PickleSerializer, \
+    SerializingStrategy, YamlSerializer, register_strategy
+
+# container annotations whose values come back from JSON, YAML or MessagePack as lists
+_SEQUENCE_TYPES = (list, tuple, set, frozenset, collections.abc.Sequence, collections.abc.Set)
+
+# trailing field of TypedDict rows with optional keys: a bit mask of the optional keys missing from the record, so
+# a missing key and one set to None both survive the round trip
+MISSING_FIELD = '__missing__'
+
+# record frames carry this plus the wrapped strategy's id, so they are never taken for that strategy's own frames
+RECORD_STRATEGY_OFFSET = 64
+
+# annotation -> the types a wire value may have, where that is more than the annotation itself
+_WIRE_TYPES = {
+    float: (int, float),
+    tuple: (list, tuple),
+    set: (list, tuple, set, frozenset),
+    frozenset: (list, tuple, set, frozenset),
+}
+
+
+class RecordField(typing.NamedTuple):
+    """ One field of a record type, in the order records are encoded"""
+    name: str
+    annotation: typing.Any
+    init: bool = True
+    kw_only: bool = False
+    optional: bool = False
+
+
+def record_kind(record_type: typing.Any) -> typing.Optional[str]:
+    """
+    What kind of record type record_type is.
+
+    Args:
+        record_type (Any): A class.
+
+    Returns:
+        str or None: 'dataclass', 'namedtuple' or 'typeddict', None for anything else.
+    """
+    if not isinstance(record_type, type):
+        return None
+    if dataclasses.is_dataclass(record_type):
+        return 'dataclass'
+    if issubclass(record_type, tuple) and hasattr(record_type, '_fields'):
+        return 'namedtuple'
+    if typing.is_typeddict(record_type):
+        return 'typeddict'
+    return None
+
+
+def _type_hints(record_type: type) -> typing.Dict[str, typing.Any]:
+    """ The resolved field annotations, falling back to the raw ones when a forward reference does not resolve"""
+    try:
+        return typing.get_type_hints(record_type)
+    except (NameError, TypeError):
+        return dict(getattr(record_type, '__annotations__', {}))
+
+
+def record_fields(record_type: type) -> typing.List[RecordField]:
+    """
+    The fields of a record type.
+
+    Args:
+        record_type (type): A dataclass, NamedTuple or TypedDict.
+
+    Returns:
+        list: RecordField per field, in declaration order.
+    """
+    kind = record_kind(record_type)
+    hints = _type_hints(record_type)
+    if kind == 'dataclass':
+        return [RecordField(field.name, hints.get(field.name, typing.Any), field.init, field.kw_only is True)
+                for field in dataclasses.fields(record_type)]
+    if kind == 'namedtuple':
+        return [RecordField(name, hints.get(name, typing.Any)) for name in record_type._fields]
+    if kind == 'typeddict':
+        return [RecordField(name, annotation, optional=name in record_type.__optional_keys__)
+                for name, annotation in hints.items()]
+    raise TypeError(f'Type: {record_type!r} is not a dataclass, NamedTuple or TypedDict')
+
+
+def _type_name(annotation: typing.Any) -> str:
+    return annotation.__name__ if isinstance(annotation, type) else repr(annotation)
+
+
+def _value_check(annotation: typing.Any) -> typing.Optional[typing.Callable[[typing.Any], bool]]:
+    """
+    A predicate telling whether a decoded wire value is acceptable for annotation, None when anything is.
+    Containers are checked against what the wire formats produce, a tuple field accepts a list, and nested records
+        are only checked to be rows here since their own decoder validates their fields.
+    """
+    if annotation is None or annotation is type(None):
+        return lambda value: value is None
+    if record_kind(annotation):
+        return lambda value: isinstance(value, (list, tuple))
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin is typing.Union or origin is types.UnionType:
+        checks = [_value_check(arg) for arg in args]
+        if None in checks:
+            return None
+        return lambda value: any(check(value) for check in checks)
+    if origin is typing.Literal:
+        return lambda value: value in args
+    if origin is not None:
+        container = _value_check(origin)
+        item = _value_check(args[0]) if args and origin in _SEQUENCE_TYPES and origin is not tuple else None
+        if origin in (dict, collections.abc.Mapping) and len(args) == 2:
+            key, item = _value_check(args[0]), _value_check(args[1])
+            if key is not None or item is not None:
+                return lambda value: container(value) and all((key is None or key(k)) and (item is None or item(v))
+                                                              for k, v in value.items())
+        item_types = _instance_types(args[0]) if item is not None else None
+        if item_types is not None:
+            # isinstance mapped over the elements runs the whole loop in C
+            return lambda value: container(value) and all(map(isinstance, value, itertools.repeat(item_types)))
+        if item is not None:
+            return lambda value: container(value) and all(item(element) for element in value)
+        return container
+    if isinstance(annotation, type) and annotation is not object:
+        accepted = _WIRE_TYPES.get(annotation, annotation)
+        return lambda value: isinstance(value, accepted)
+    return None
+
+
+def _instance_types(annotation: typing.Any) -> typing.Optional[typing.Tuple[type, ...]]:
+    """
+    The types a wire value of a plain class annotation, or a Union of them, may have, so the generated decoder checks
+        it with one isinstance call. None for annotations that need _value_check.
+    """
+    if annotation is None or annotation is type(None):
+        return (type(None),)
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union or origin is types.UnionType:
+        accepted = [_instance_types(arg) for arg in typing.get_args(annotation)]
+        return None if None in accepted else tuple(kind for kinds in accepted for kind in kinds)
+    if origin is None and isinstance(annotation, type) and annotation is not object and not record_kind(annotation):
+        accepted = _WIRE_TYPES.get(annotation, annotation)
+        return accepted if isinstance(accepted, tuple) else (accepted,)
+    return None
+
+
+def _tuple_source(names: typing.List[str]) -> str:
+    """ Source of a tuple of names without the parentheses, for generated code"""
+    return names[0] + ',' if len(names) == 1 else ', '.join(names)
+
+
+def _optional(func: typing.Optional[typing.Callable]) -> typing.Optional[typing.Callable]:
+    """ func, passing None through"""
+    if func is None:
+        return None
+    return lambda value: None if value is None else func(value)
+
+
+def _each(func: typing.Optional[typing.Callable]) -> typing.Optional[typing.Callable]:
+    """ func applied to every element of a list"""
+    if func is None:
+        return None
+    return lambda value: [func(element) for element in value]
+
+
+def _converters(annotation: typing.Any, validate: bool) -> typing.Tuple[typing.Optional[typing.Callable],
+                                                                          typing.Optional[typing.Callable]]:
+    """
+    The functions turning a field value into its wire form and back, None where the value passes through as is.
+    Nested records become rows, tuples and sets become lists and come back as their own type.
+    """
+    if record_kind(annotation):
+        codec = record_codec(annotation, validate)
+        # looked up on the codec when called, so a record type may refer to itself
+        return (lambda value: codec.encode_row(value)), (lambda value: codec.decode_row(value))
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if (origin is typing.Union or origin is types.UnionType) and len(args) == 2 and type(None) in args:
+        encode, decode = _converters(args[0] if args[1] is type(None) else args[1], validate)
+        return _optional(encode), _optional(decode)
+    if origin in (list, collections.abc.Sequence) and args:
+        encode, decode = _converters(args[0], validate)
+        return _each(encode), _each(decode)
+    container = origin or annotation
+    if container in (tuple, set, frozenset):
+        return list, container
+    return None, None
+
+
+class RecordCodec:
+    """
+    Encoder and decoder generated for one record type, see record_codec.
+    encode_row turns a record into a list of its field values, decode_row does the reverse. Dataclasses are built
+        with their constructor, except frozen ones without __post_init__ whose fields are set directly, skipping
+        the object.__setattr__ call per field their generated __init__ makes. Rows of TypedDicts with optional keys
+        end with the MISSING_FIELD mask.
+    """
+
+    def __init__(self, record_type: type, validate: bool = False):
+        """
+        Constructor for RecordCodec class, use record_codec to share codecs.
+
+        Args:
+            record_type (type): A dataclass, NamedTuple or TypedDict.
+            validate (bool, optional): Check every decoded value against the field's annotation. Defaults to False.
+        """
+        self.record_type = record_type
+        self.kind = record_kind(record_type)
+        self.fields = record_fields(record_type)
+        self.names = [field.name for field in self.fields]
+        self.missing_mask = self.kind == 'typeddict' and any(field.optional for field in self.fields)
+        if self.missing_mask:
+            self.names.append(MISSING_FIELD)
+        self.validate = validate
+        self.source = ''
+
+    def build(self):
+        """ Generate and compile the encode and decode functions"""
+        namespace = {'_cls': self.record_type, '_new': object.__new__, '_setattr': object.__setattr__,
+                     '_tuple_new': tuple.__new__, '_invalid': self._invalid, '_wrong_length': self._wrong_length}
+        getters = []
+        for index, field in enumerate(self.fields):
+            encode, decode = _converters(field.annotation, self.validate)
+            namespace[f'_e{index}'], namespace[f'_d{index}'] = encode, decode
+            if self.validate:
+                # a TypedDict key that may be missing travels as None
+                annotation = typing.Optional[field.annotation] if field.optional else field.annotation
+                namespace[f'_t{index}'] = _instance_types(annotation)
+                namespace[f'_c{index}'] = _value_check(annotation) if namespace[f'_t{index}'] is None else None
+            if self.kind == 'namedtuple':
+                getter = f'r[{index}]'
+            elif self.kind == 'typeddict':
+                getter = f'r.get({field.name!r})' if field.optional else f'r[{field.name!r}]'
+            else:
+                getter = f'r.{field.name}'
+            getters.append(f'_e{index}({getter})' if encode is not None else getter)
+        if self.missing_mask:
+            getters.append(' | '.join(f'(({field.name!r} not in r) << {index})'
+                                      for index, field in enumerate(self.fields) if field.optional))
+        row = ', '.join(getters)
+        lines = [
+            'def encode_row(r):',
+            f'    return [{row}]',
+            'def encode_rows(records):',
+            f'    return [[{row}] for r in records]',
+            'def encode_columns(records):',
+            f"    return [{', '.join(f'[{getter} for r in records]' for getter in getters)}]",
+            'def decode_row(row):',
+        ]
+        values = [f'v{index}' for index in range(len(self.fields))]
+        unpacked = values + ['missing'] if self.missing_mask else values
+        if self.validate or not unpacked:
+            lines.append(f'    if len(row) != {len(unpacked)}: _wrong_length(row)')
+        if unpacked:
+            lines.append(f'    {_tuple_source(unpacked)} = row')
+        for index, value in enumerate(values):
+            if namespace.get(f'_t{index}') is not None:
+                lines.append(f'    if not isinstance({value}, _t{index}): _invalid({index}, {value})')
+            elif namespace.get(f'_c{index}') is not None:
+                lines.append(f'    if not _c{index}({value}): _invalid({index}, {value})')
+            if namespace[f'_d{index}'] is not None:
+                lines.append(f'    {value} = _d{index}({value})')
+        lines.extend(self._construct(values, namespace))
+        self.source = '\n'.join(lines) + '\n'
+        # pylint: disable=exec-used
+        exec(compile(self.source, f'<record codec {self.record_type.__qualname__}>', 'exec'), namespace)
+        self.encode_row = namespace['encode_row']
+        self.encode_rows = namespace['encode_rows']
+        self.encode_columns = namespace['encode_columns']
+        self.decode_row = namespace['decode_row']
+
+    def _construct(self, values: typing.List[str], namespace: dict) -> typing.List[str]:
+        """ Source lines building the record from the decoded values"""
+        if self.kind == 'namedtuple':
+            return [f'    return _tuple_new(_cls, ({_tuple_source(values)}))']
+        if self.kind == 'typeddict':
+            required = ', '.join(f'{field.name!r}: {value}' for field, value in zip(self.fields, values)
+                                 if not field.optional)
+            lines = [f'    r = {{{required}}}']
+            lines.extend(f'    if not missing & {1 << index}: r[{field.name!r}] = {value}'
+                         for index, (field, value) in enumerate(zip(self.fields, values)) if field.optional)
+            return lines + ['    return r']
+        params = self.record_type.__dataclass_params__
+        if params.frozen and not hasattr(self.record_type, '__post_init__'):
+            lines = ['    r = _new(_cls)']
+            for index, (field, value) in enumerate(zip(self.fields, values)):
+                slot = self.record_type.__dict__.get(field.name)
+                if isinstance(slot, types.MemberDescriptorType):
+                    namespace[f'_s{index}'] = slot.__set__
+                    lines.append(f'    _s{index}(r, {value})')
+                else:
+                    lines.append(f'    _setattr(r, {field.name!r}, {value})')
+            return lines + ['    return r']
+        # keyword-only fields may be declared between positional ones, but are passed after them
+        arguments = [value for field, value in zip(self.fields, values) if field.init and not field.kw_only]
+        arguments.extend(f'{field.name}={value}' for field, value in zip(self.fields, values)
+                         if field.init and field.kw_only)
+        lines = [f"    r = _cls({', '.join(arguments)})"]
+        lines.extend(f'    _setattr(r, {field.name!r}, {value})'
+                     for field, value in zip(self.fields, values) if not field.init)
+        return lines + ['    return r']
+
+    def _wrong_length(self, row: typing.Sequence[typing.Any]):
+        """ Raise the error for a decoded row with more or fewer values than the record type has fields"""
+        raise ValueError(f'{self.record_type.__name__} has {len(self.names)} fields, got {len(row)} values')
+
+    def _invalid(self, index: int, value: typing.Any):
+        """ Raise the error for a decoded value that does not match its field's annotation"""
+        field = self.fields[index]
+        raise ValueError(f'Field {self.record_type.__name__}.{field.name}: {type(value).__name__} value {value!r} '
+                         f'does not match {_type_name(field.annotation)}')
+
+    def is_record(self, data: typing.Any) -> bool:
+        """
+        Whether data is a single record rather than a collection of them.
+
+        Args:
+            data (Any): A record or an iterable of records.
+
+        Returns:
+            bool: True for a record of this codec's type.
+        """
+        return isinstance(data, dict if self.kind == 'typeddict' else self.record_type)
+
+    def decode_rows(self, rows: typing.Iterable[typing.Sequence[typing.Any]]) -> typing.List[typing.Any]:
+        """
+        Records from rows.
+
+        Args:
+            rows (iterable): Rows as produced by encode_rows.
+
+        Returns:
+            list: The records.
+        """
+        return list(map(self.decode_row, rows))
+
+    def decode_columns(self, columns: typing.Sequence[typing.Sequence[typing.Any]]) -> typing.List[typing.Any]:
+        """
+        Records from one sequence of values per field.
+
+        Args:
+            columns (sequence): Columns as produced by encode_columns.
+
+        Returns:
+            list: The records.
+        """
+        if len(columns) != len(self.names):
+            raise ValueError(f'{self.record_type.__name__} has {len(self.names)} fields, got {len(columns)} columns')
+        if len({len(column) for column in columns}) > 1:
+            raise ValueError(f'Columns of {self.record_type.__name__} differ in length')
+        return list(map(self.decode_row, zip(*columns)))
+
+    def __repr__(self):
+        """
+        Formal string representation of RecordCodec object.
+
+        Returns:
+            str: RecordCodec class in formal string format, showing the record type and validation.
+        """
+        return f"RecordCodec({self.record_type.__qualname__}, validate={self.validate})"
+
+
+# (record type, validate) -> its codec, built once and shared
+_CODECS: typing.Dict[typing.Tuple[type, bool], RecordCodec] = {}
+_CODECS_LOCK = threading.RLock()
+
+
+def record_codec(record_type: type, validate: bool = False) -> RecordCodec:
+    """
+    The shared codec of a record type, generating it on first use.
+
+    Args:
+        record_type (type): A dataclass, NamedTuple or TypedDict. Fields annotated with another record type, or a
+            list or Optional of one, are encoded as nested rows.
+        validate (bool, optional): Check every decoded value against the field's annotation. Defaults to False.
+
+    Returns:
+        RecordCodec: The codec.
+    """
+    key = (record_type, validate)
+    codec = _CODECS.get(key)
+    if codec is None:
+        with _CODECS_LOCK:
+            codec = _CODECS.get(key)
+            if codec is None:
+                codec = RecordCodec(record_type, validate)
+                # registered before building, so the nested fields of a record type referring to itself find it
+                _CODECS[key] = codec
+                try:
+                    codec.build()
+                except BaseException:
+                    del _CODECS[key]
+                    raise
+    return codec
+
+
+class RecordSerializer(SerializingStrategy):
+    """
+    This class wraps another strategy with an encoder and decoder generated for one record type: a dataclass,
+        NamedTuple or TypedDict.
+    A record, or a list of records, is sent as its field names plus positional rows, or plus one array per field
+        with columnar=True, instead of a dict per record repeating every key. Deserializing builds the records
+        directly from the rows. Tuple and set fields and nested records come back as their own types, other values
+        are whatever the wrapped strategy produces.
+    """
+
+    def __init__(self, record_type: type, serializing_strategy: typing.Optional[SerializingStrategy] = None,
+                 columnar: bool = False, validate: bool = False):
+        """
+        Constructor for RecordSerializer class.
+
+        Args:
+            record_type (type): A dataclass, NamedTuple or TypedDict.
+            serializing_strategy (SerializingStrategy, optional): Strategy encoding the rows. Defaults to
+                JsonSerializer().
+            columnar (bool, optional): Serialize lists of records as one array per field. Defaults to False.
+            validate (bool, optional): Check every deserialized value against its field's annotation and raise
+                ValueError on a mismatch. Defaults to False.
+        """
+        self.codec = record_codec(record_type, validate)
+        self.record_type = record_type
+        self.serializing_strategy = serializing_strategy if serializing_strategy is not None else JsonSerializer()
+        self.columnar = columnar
+        self.validate = validate
+        inner_id = self.serializing_strategy.strategy_id
+        self.strategy_id = None if inner_id is None else RECORD_STRATEGY_OFFSET + inner_id
+
+    def encode(self, data: typing.Any) -> dict:
+        """
+        The wire form of a record or an iterable of records, before the wrapped strategy serializes it.
+
+        Args:
+            data (record or iterable): Data to be encoded.
+
+        Returns:
+            dict: 'fields' with the field names, and 'record' with one row, 'rows' with a row per record or
+                'columns' with an array per field.
+        """
+        if self.codec.is_record(data):
+            return {'fields': self.codec.names, 'record': self.codec.encode_row(data)}
+        if not isinstance(data, collections.abc.Iterable) or isinstance(data, (str, bytes, dict)):
+            raise ValueError(f'Type: {type(data)} cannot be serialized as {self.record_type.__name__} records')
+        if self.columnar:
+            return {'fields': self.codec.names, 'columns': self.codec.encode_columns(data)}
+        return {'fields': self.codec.names, 'rows': self.codec.encode_rows(data)}
+
+    def decode(self, payload: typing.Any) -> typing.Any:
+        """
+        Records from a wire form produced by encode, in either layout.
+
+        Args:
+            payload (dict): Deserialized wire form.
+
+        Returns:
+            record or list: The record, or the list of records.
+        """
+        if not isinstance(payload, dict) or 'fields' not in payload:
+            raise ValueError(f'Type: {type(payload)} is not a {self.record_type.__name__} payload')
+        if list(payload['fields']) != self.codec.names:
+            raise ValueError(f"Fields {list(payload['fields'])} do not match {self.record_type.__name__} fields "
+                             f"{self.codec.names}")
+        if 'rows' in payload:
+            return self.codec.decode_rows(payload['rows'])
+        if 'columns' in payload:
+            return self.codec.decode_columns(payload['columns'])
+        if 'record' in payload:
+            return self.codec.decode_row(payload['record'])
+        raise ValueError(f'No records in {self.record_type.__name__} payload')
+
+    def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
+        """
+        Callable method for RecordSerializer class that serializes
+            or deserializes data depending on the deserialize flag.
+
+        Args:
+            data (record or iterable of records for serializing, the wrapped strategy's output for deserializing):
+                Data to be serialized or deserialized.
+            deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
+
+        Returns:
+            The wrapped strategy's output, a record or a list of records: Serialized or deserialized data.
+        """
+        if deserialize:
+            return self.decode(self.serializing_strategy(data, deserialize=True))
+        return self.serializing_strategy(self.encode(data))
+
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Serializes a record or records to a stream with the wrapped strategy.
+
+        Args:
+            data (record or iterable): Data to be serialized.
+            fileobj (file-like): Writable stream.
+        """
+        self.serializing_strategy.dump(self.encode(data), fileobj)
+
+    def load(self, fileobj: typing.IO) -> typing.Any:
+        """
+        Deserializes a record or records from a stream with the wrapped strategy.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            record or list: Deserialized data.
+        """
+        return self.decode(self.serializing_strategy.load(fileobj))
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Writes each record as a bare row through the wrapped strategy's record stream.
+
+        Args:
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable stream.
+        """
+        self.serializing_strategy.dump_records(map(self.codec.encode_row, records), fileobj)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily reads records written by dump_records.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            iterator: Deserialized records.
+        """
+        return map(self.codec.decode_row, self.serializing_strategy.load_records(fileobj))
+
+    def __str__(self):
+        """
+        String representation of RecordSerializer object.
+
+        Returns:
+            str: RecordSerializer class in string format.
+        """
+        return repr(self)
+
+    def __repr__(self):
+        """
+        Formal string representation of RecordSerializer object.
+
+        Returns:
+            str: RecordSerializer class in formal string format, showing the record type, wrapped strategy and
+                options.
+        """
+        return (f"RecordSerializer({self.record_type.__qualname__}, {self.serializing_strategy!r}, "
+                f"columnar={self.columnar}, validate={self.validate})")
+
+
+class RecordPayloadSerializer(SerializingStrategy):
+    """
+    This class reads and writes RecordSerializer payloads as dicts keyed by field name, without a record type.
+    It decodes record frames received without the record type at hand, and is what strategy_for_id returns for
+        their strategy ids. Nested records stay rows, as lists.
+    """
+
+    def __init__(self, serializing_strategy: typing.Optional[SerializingStrategy] = None):
+        """
+        Constructor for RecordPayloadSerializer class.
+
+        Args:
+            serializing_strategy (SerializingStrategy, optional): Strategy encoding the rows. Defaults to
+                JsonSerializer().
+        """
+        self.serializing_strategy = serializing_strategy if serializing_strategy is not None else JsonSerializer()
+        inner_id = self.serializing_strategy.strategy_id
+        self.strategy_id = None if inner_id is None else RECORD_STRATEGY_OFFSET + inner_id
+
+    @staticmethod
+    def encode(data: typing.Any) -> dict:
+        """
+        The wire form of a dict or a list of dicts sharing their keys.
+
+        Args:
+            data (dict or list): Data to be encoded.
+
+        Returns:
+            dict: 'fields' with the keys, and 'record' with one row or 'rows' with a row per dict.
+        """
+        if isinstance(data, dict):
+            return {'fields': list(data), 'record': list(data.values())}
+        records = list(data)
+        fields = list(records[0]) if records else []
+        if any(list(record) != fields for record in records):
+            raise ValueError('Records must all have the same keys, in the same order')
+        return {'fields': fields, 'rows': [list(record.values()) for record in records]}
+
+    @staticmethod
+    def decode(payload: typing.Any) -> typing.Any:
+        """
+        Dicts from a wire form produced by RecordSerializer or encode, in either layout.
+
+        Args:
+            payload (dict): Deserialized wire form.
+
+        Returns:
+            dict or list: The record, or the list of records.
+        """
+        if not isinstance(payload, dict) or 'fields' not in payload:
+            raise ValueError(f'Type: {type(payload)} is not a record payload')
+        fields = list(payload['fields'])
+        if 'rows' in payload:
+            rows = payload['rows']
+        elif 'columns' in payload:
+            rows = zip(*payload['columns'])
+        elif 'record' in payload:
+            rows = [payload['record']]
+        else:
+            raise ValueError('No records in record payload')
+        records = [dict(zip(fields, row)) for row in rows]
+        if fields and fields[-1] == MISSING_FIELD:
+            for record in records:
+                missing = record.pop(MISSING_FIELD)
+                for index, name in enumerate(fields[:-1]):
+                    if missing & (1 << index):
+                        del record[name]
+        return records[0] if 'record' in payload else records
+
+    def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
+        """
+        Callable method for RecordPayloadSerializer class that serializes
+            or deserializes data depending on the deserialize flag.
+
+        Args:
+            data (dict or list of dicts for serializing, the wrapped strategy's output for deserializing):
+                Data to be serialized or deserialized.
+            deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
+
+        Returns:
+            The wrapped strategy's output, a dict or a list of dicts: Serialized or deserialized data.
+        """
+        if deserialize:
+            return self.decode(self.serializing_strategy(data, deserialize=True))
+        return self.serializing_strategy(self.encode(data))
+
+    def __str__(self):
+        """
+        String representation of RecordPayloadSerializer object.
+
+        Returns:
+            str: RecordPayloadSerializer class in string format.
+        """
+        return repr(self)
+
+    def __repr__(self):
+        """
+        Formal string representation of RecordPayloadSerializer object.
+
+        Returns:
+            str: RecordPayloadSerializer class in formal string format, showing the wrapped strategy.
+        """
+        return f"RecordPayloadSerializer({self.serializing_strategy!r})"
+
+
+def _record_payloads(strategy_class: type) -> RecordPayloadSerializer:
+    """ The decoder registered for record frames whose rows strategy_class encodes"""
+    return RecordPayloadSerializer(strategy_class())
+
+
+for _strategy in (JsonSerializer, YamlSerializer, PickleSerializer, MsgpackSerializer, CborSerializer):
+    register_strategy(RECORD_STRATEGY_OFFSET + _strategy.strategy_id, functools.partial(_record_payloads, _strategy))
@@ -1,47 +1,434 @@
 """
-Provides serializers with choice of JSON, YAML or pickle via strategy pattern
+Provides serializers with choice of JSON, YAML, pickle, MessagePack or CBOR via strategy pattern
 As more processes become long-running daemons instead of short-lived batch calls then we need strong capabilities
     to pass objects around CIDW servers.
 Also intended somewhat to provide example of using interfaces, inheritance, typing etal.
 """
 import abc
+import bisect
+import bz2
+import collections
+import concurrent.futures
+import contextlib
+import datetime
+import decimal
+import functools
+import hashlib
+import importlib
+import importlib.util
 import io
+import itertools
 import json
-import pickle
+import logging
+import lzma
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import traceback
+import types
 import typing
+import zlib
 
-import yaml
+
+class _LazyModule:
+    """
+    Stand-in for a module that is installed but not imported yet.
+    The first attribute access imports the module and rebinds the global it was assigned to, so only that first
+        access pays for the import or the indirection. Imports go through the import system's own locking, which
+        makes a first use from several threads at once safe.
+    """
+
+    __slots__ = ('_name', '_alias')
+
+    def __init__(self, name: str, alias: str):
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attr: str) -> typing.Any:
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f'<lazy module {self._name!r}>'
+
+
+def _lazy_import(name: str, alias: typing.Optional[str] = None) -> typing.Union[types.ModuleType, _LazyModule, None]:
+    """
+    Find a module without importing it, so importing this module does not pay for backends a process never uses.
+    Only the top level package is looked up, the module itself is imported on first use.
+
+    Args:
+        name (str): Absolute module name, e.g. 'yaml' or 'lz4.frame'.
+        alias (str, optional): Global name the module is assigned to here. Defaults to name.
+
+    Returns:
+        module, _LazyModule or None: The module if it was already imported, a stand-in that imports it on first
+            attribute access, or None when it is not installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name.partition('.')[0]) is None:
+        return None
+    return _LazyModule(name, alias or name)
+
+
+# stdlib modules that only some strategies and methods need, and the optional backends, are imported on first use
+asyncio = _lazy_import('asyncio')
+pickle = _lazy_import('pickle')
+socket = _lazy_import('socket')
+yaml = _lazy_import('yaml')
+cbor2 = _lazy_import('cbor2')
+lz4_frame = _lazy_import('lz4.frame', 'lz4_frame')
+msgpack = _lazy_import('msgpack')
+orjson = _lazy_import('orjson')
+rapidjson = _lazy_import('rapidjson')
+ujson = _lazy_import('ujson')
+zstandard = _lazy_import('zstandard')
+
+
+def _is_binary_stream(fileobj: typing.IO) -> bool:
+    """ True when fileobj reads or writes bytes rather than str"""
+    return isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase))
+
+
+def _read_exactly(fileobj: typing.IO, size: int, what: str, at_boundary: bool = False) -> bytes:
+    """ Read size bytes from a binary stream, or b'' when at_boundary and the stream has already ended"""
+    data = fileobj.read(size)
+    while len(data) < size:
+        if not data and at_boundary:
+            return b''
+        more = fileobj.read(size - len(data))
+        if not more:
+            raise EOFError(f'Stream ended inside a {what}')
+        data += more
+    return data
+
+
+# length prefix of each record written by the default SerializingStrategy.dump_records
+_RECORD_LENGTH = struct.Struct('!Q')
+
+
+@contextlib.contextmanager
+def _text_stream(fileobj: typing.IO) -> typing.Iterator[typing.TextIO]:
+    """
+    Yield a text view of fileobj, wrapping binary streams in a UTF-8 TextIOWrapper that is detached afterwards
+        so the caller's stream is left open.
+    """
+    if not _is_binary_stream(fileobj):
+        yield fileobj
+        return
+    wrapper = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+    try:
+        yield wrapper
+    finally:
+        wrapper.flush()
+        wrapper.detach()
 
 
 class SerializingStrategy(abc.ABC):
     """ specify the simple interface (1 method :/ ) for serializging strategies"""
 
+    # identifies the strategy in frame headers, see register_strategy; None means it cannot be framed
+    strategy_id: typing.Optional[int] = None
+
     @abc.abstractmethod
     def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
         pass
 
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Serializes data straight to a stream. Strategies override this to avoid building the full payload;
+            the default writes the result of __call__.
+
+        Args:
+            data (Any): Data to be serialized.
+            fileobj (file-like): Writable text or binary stream.
+        """
+        payload = self(data)
+        if isinstance(payload, str) and _is_binary_stream(fileobj):
+            payload = payload.encode('utf-8')
+        fileobj.write(payload)
+
+    def load(self, fileobj: typing.IO) -> typing.Any:
+        """
+        Deserializes data read from a stream. The default reads the whole stream and passes it to __call__.
+
+        Args:
+            fileobj (file-like): Readable text or binary stream.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        return self(fileobj.read(), deserialize=True)
+
+    def to_parts(self, data: typing.Any) -> typing.List[typing.Union[bytes, memoryview]]:
+        """
+        Serializes data to a list of buffers that are sent together, see MultipartPayload. Strategies that can keep
+            large buffers out of the main payload override this; the default is the single serialized payload.
+
+        Args:
+            data (Any): Data to be serialized.
+
+        Returns:
+            list: Buffers, the first being the main payload.
+        """
+        payload = self(data)
+        return [payload.encode('utf-8') if isinstance(payload, str) else payload]
+
+    def from_parts(self, parts: typing.Sequence[typing.Union[bytes, bytearray, memoryview]]) -> typing.Any:
+        """
+        Deserializes the buffers produced by to_parts.
+
+        Args:
+            parts (sequence): Buffers, the first being the main payload.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        if len(parts) != 1:
+            raise ValueError(f'{self} expects a single part, got {len(parts)}')
+        return self(parts[0], deserialize=True)
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Serializes each record to a stream as its own self-contained document. Strategies with a natural record
+            format override this; the default writes each result of __call__ after its length, str as UTF-8.
+
+        Args:
+            records (iterable): Records to be serialized, consumed lazily.
+            fileobj (file-like): Writable stream, binary for the default.
+        """
+        for record in records:
+            payload = self(record)
+            if isinstance(payload, str):
+                payload = payload.encode('utf-8')
+            fileobj.write(_RECORD_LENGTH.pack(len(payload)))
+            fileobj.write(payload)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily deserializes records written by dump_records. The default hands each payload to __call__ as bytes.
+
+        Args:
+            fileobj (file-like): Readable stream, binary for the default.
+
+        Returns:
+            iterator: Deserialized records, one at a time.
+        """
+        while True:
+            prefix = _read_exactly(fileobj, _RECORD_LENGTH.size, 'record', at_boundary=True)
+            if not prefix:
+                return
+            payload = _read_exactly(fileobj, _RECORD_LENGTH.unpack(prefix)[0], 'record')
+            yield self(payload, deserialize=True)
+
+
+class JsonBackend(typing.NamedTuple):
+    """
+    A JSON implementation usable by JsonSerializer.
+
+    dumps(data, sort_keys) returns str or bytes, loads accepts str, bytes or bytearray.
+    """
+    name: str
+    dumps: typing.Callable[[typing.Any, bool], typing.Union[str, bytes]]
+    loads: typing.Callable[[typing.Union[str, bytes, bytearray]], typing.Any]
+
+
+# registered backends by name, and the order 'auto' tries them in
+_JSON_BACKENDS: typing.Dict[str, JsonBackend] = {}
+JSON_BACKEND_PREFERENCE = ('orjson', 'rapidjson', 'ujson', 'stdlib')
+
+# installed backends that are registered, importing their package, the first time a JsonSerializer asks for them
+_PENDING_JSON_BACKENDS: typing.Dict[str, typing.Callable[[], JsonBackend]] = {}
+
+
+def register_json_backend(name: str, dumps: typing.Callable[[typing.Any, bool], typing.Union[str, bytes]],
+                          loads: typing.Callable[[typing.Union[str, bytes, bytearray]], typing.Any]) -> JsonBackend:
+    """
+    Register a JSON implementation so JsonSerializer(backend=name) can use it.
+
+    Args:
+        name (str): Name to select the backend by, replaces any existing backend of that name.
+        dumps (callable): Takes the data and a sort_keys flag and returns str or bytes.
+        loads (callable): Takes str, bytes or bytearray and returns the decoded data.
+
+    Returns:
+        JsonBackend: The registered backend.
+    """
+    backend = JsonBackend(name, dumps, loads)
+    _JSON_BACKENDS[name] = backend
+    _PENDING_JSON_BACKENDS.pop(name, None)
+    return backend
+
+
+def _json_backend(name: str) -> JsonBackend:
+    """ The registered backend of that name, registering an installed one on first use. KeyError if unknown"""
+    register = _PENDING_JSON_BACKENDS.get(name)
+    if register is not None and name not in _JSON_BACKENDS:
+        register()
+    return _JSON_BACKENDS[name]
+
+
+def available_json_backends() -> typing.List[str]:
+    """
+    Names of the registered JSON backends, preferred ones first.
+
+    Returns:
+        list: Backend names usable with JsonSerializer.
+    """
+    names = set(_JSON_BACKENDS) | set(_PENDING_JSON_BACKENDS)
+    preferred = [name for name in JSON_BACKEND_PREFERENCE if name in names]
+    return preferred + sorted(names - set(preferred))
+
+
+def _stdlib_dumps(data: typing.Any, sort_keys: bool) -> str:
+    return json.dumps(data, sort_keys=sort_keys)
+
+
+register_json_backend('stdlib', _stdlib_dumps, json.loads)
+
+if orjson is not None:
+    def _orjson_dumps(data: typing.Any, sort_keys: bool) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(data, option=option)
+
+    _PENDING_JSON_BACKENDS['orjson'] = lambda: register_json_backend('orjson', _orjson_dumps, orjson.loads)
+
+if rapidjson is not None:
+    def _rapidjson_dumps(data: typing.Any, sort_keys: bool) -> str:
+        return rapidjson.dumps(data, sort_keys=sort_keys, mapping_mode=rapidjson.MM_COERCE_KEYS_TO_STRINGS)
+
+    _PENDING_JSON_BACKENDS['rapidjson'] = lambda: register_json_backend('rapidjson', _rapidjson_dumps,
+                                                                        rapidjson.loads)
+
+if ujson is not None:
+    def _ujson_dumps(data: typing.Any, sort_keys: bool) -> str:
+        return ujson.dumps(data, sort_keys=sort_keys, escape_forward_slashes=False)
+
+    _PENDING_JSON_BACKENDS['ujson'] = lambda: register_json_backend('ujson', _ujson_dumps, ujson.loads)
+
 
 class JsonSerializer(SerializingStrategy):
     """
     This class implements JSON serialization and deserialization.
+    The encoding is done by a pluggable backend, the stdlib json module by default or orjson, rapidjson or ujson
+        when they are installed. backend='auto' picks the fastest one available.
+    Backends agree on the decoded value, floats included, but not on the exact text: stdlib, rapidjson and ujson
+        escape non-ASCII characters as json.dumps does, while orjson has no such option and writes them as UTF-8.
+        Only stdlib puts spaces after separators, and exponents are spelled 1e-07 or 1e-7 depending on the backend.
     """
 
+    strategy_id = 1
+
+    def __init__(self, backend: str = 'stdlib', sort_keys: bool = False, binary: bool = False):
+        """
+        Constructor for JsonSerializer class.
+
+        Args:
+            backend (str, optional): Name of a registered backend, or 'auto' for the first available one in
+                JSON_BACKEND_PREFERENCE. Defaults to 'stdlib', whose output is byte for byte json.dumps.
+            sort_keys (bool, optional): Sort object keys in the output. Defaults to False, keeping insertion order.
+            binary (bool, optional): Return UTF-8 bytes from serialize instead of str, which saves a decode
+                with backends such as orjson that produce bytes natively. Defaults to False.
+        """
+        if backend == 'auto':
+            backend = available_json_backends()[0]
+        if backend not in _JSON_BACKENDS and backend not in _PENDING_JSON_BACKENDS:
+            raise ValueError(f'Unknown or unavailable JSON backend: {backend!r}, '
+                             f'expected one of {available_json_backends()}')
+        self.backend = backend
+        self.sort_keys = sort_keys
+        self.binary = binary
+        self._backend = _json_backend(backend)
+
+    def _encode(self, data: typing.Any, binary: bool) -> typing.Union[str, bytes]:
+        """ Encode with the backend, converting between str and bytes only when the backend's type differs"""
+        payload = self._backend.dumps(data, self.sort_keys)
+        if binary != isinstance(payload, bytes):
+            payload = payload.encode('utf-8') if binary else payload.decode('utf-8')
+        return payload
+
     def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
         """
         Callable method for JsonSerializer class that serializes or deserializes data depending on the deserialize flag.
 
         Args:
-            data (type Any for serializing, str for deserializing): Data to be serialized or deserialized.
+            data (type Any for serializing, str or bytes-like for deserializing): Data to be serialized or
+                deserialized. Bytes are handed to the backend as is, without decoding to str first.
             deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
 
         Returns:
-            str or dict: Serialized or deserialized data.
+            str, bytes or dict: Serialized or deserialized data.
         """
         if deserialize:
-            if not isinstance(data, str):
+            if isinstance(data, memoryview):
+                data = data.tobytes()
+            if not isinstance(data, (str, bytes, bytearray)):
                 raise ValueError(f'Type: {type(data)} cannot be deserialized')
-            return json.loads(data)
-        return json.dumps(data)
+            return self._backend.loads(data)
+        return self._encode(data, self.binary)
+
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Writes data as a JSON document to a text or binary stream. The stdlib backend encodes chunk by chunk,
+            other backends write their complete output in one call.
+
+        Args:
+            data (Any): Data to be serialized.
+            fileobj (file-like): Writable stream.
+        """
+        if self.backend != 'stdlib':
+            fileobj.write(self._encode(data, _is_binary_stream(fileobj)))
+            return
+        with _text_stream(fileobj) as stream:
+            json.dump(data, stream, sort_keys=self.sort_keys)
+
+    def load(self, fileobj: typing.IO) -> typing.Any:
+        """
+        Reads a JSON document from a text or binary stream.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        if self.backend != 'stdlib':
+            return self._backend.loads(fileobj.read())
+        with _text_stream(fileobj) as stream:
+            return json.load(stream)
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Writes records as JSON Lines, one compact document per line.
+
+        Args:
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable stream.
+        """
+        binary = _is_binary_stream(fileobj)
+        newline = b'\n' if binary else '\n'
+        for record in records:
+            fileobj.write(self._encode(record, binary) + newline)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily reads JSON Lines records, skipping blank lines.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            iterator: Deserialized records.
+        """
+        loads = self._backend.loads
+        for line in fileobj:
+            if line.strip():
+                yield loads(line)
 
     def __str__(self):
         """
@@ -50,39 +437,134 @@ class JsonSerializer(SerializingStrategy):
         Returns:
             str: JsonSerializer class in string format.
         """
-        return "JsonSerializer()"
+        return repr(self)
 
     def __repr__(self):
         """
         Formal string representation of JsonSerializer object.
 
         Returns:
-            str: JsonSerializer class in formal string format.
+            str: JsonSerializer class in formal string format, showing any non-default options.
         """
-        return "JsonSerializer()"
+        options = []
+        if self.backend != 'stdlib':
+            options.append(f'backend={self.backend!r}')
+        if self.sort_keys:
+            options.append('sort_keys=True')
+        if self.binary:
+            options.append('binary=True')
+        return f"JsonSerializer({', '.join(options)})"
+
+
+# loader choice -> (libyaml loader, pure python loader, libyaml dumper, pure python dumper) attribute names in yaml
+_YAML_CLASSES = {
+    'full': ('CFullLoader', 'FullLoader', 'CDumper', 'Dumper'),
+    'safe': ('CSafeLoader', 'SafeLoader', 'CSafeDumper', 'SafeDumper'),
+}
 
 
 class YamlSerializer(SerializingStrategy):
     """
     This class implements YAML serialization and deserialization.
+    Uses the libyaml backed CLoader/CDumper classes when PyYAML was built with them, falling back to the pure
+        python implementations otherwise.
     """
 
+    strategy_id = 2
+
+    def __init__(self, loader: str = 'full', use_libyaml: bool = True):
+        """
+        Constructor for YamlSerializer class.
+
+        Args:
+            loader (str, optional): 'full' to load the full YAML language or 'safe' to only build simple python
+                objects, use 'safe' for untrusted input. Defaults to 'full'.
+            use_libyaml (bool, optional): Use the C accelerated loader and dumper when available. Defaults to True.
+        """
+        if loader not in _YAML_CLASSES:
+            raise ValueError(f'Unknown YAML loader: {loader!r}, expected one of {sorted(_YAML_CLASSES)}')
+        c_loader, py_loader, c_dumper, py_dumper = _YAML_CLASSES[loader]
+        self.loader = loader
+        self.use_libyaml = use_libyaml
+        self._loader = (use_libyaml and getattr(yaml, c_loader, None)) or getattr(yaml, py_loader)
+        self._dumper = (use_libyaml and getattr(yaml, c_dumper, None)) or getattr(yaml, py_dumper)
+
+    @property
+    def libyaml(self) -> bool:
+        """
+        Whether this serializer is running on the libyaml C extension.
+
+        Returns:
+            bool: True if both the loader and dumper are the C implementations.
+        """
+        return self._loader.__name__.startswith('C') and self._dumper.__name__.startswith('C')
+
     def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
         """
         Callable method for YamlSerializer class that serializes or deserializes data depending on the deserialize flag.
 
         Args:
-            data (str or dict): Data to be serialized or deserialized.
+            data (str or dict): Data to be serialized or deserialized, UTF-8 bytes are also accepted.
             deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
 
         Returns:
             str or dict: Serialized or deserialized data.
         """
         if deserialize:
-            if not isinstance(data, str):
+            if isinstance(data, (bytearray, memoryview)):
+                data = bytes(data)
+            if not isinstance(data, (str, bytes)):
                 raise ValueError(f'Type: {type(data)} cannot be deserialized')
-            return yaml.full_load(data)
-        return yaml.dump(data)
+            return yaml.load(data, Loader=self._loader)
+        return yaml.dump(data, Dumper=self._dumper)
+
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Emits data as a YAML document directly to a text or binary stream.
+
+        Args:
+            data (Any): Data to be serialized.
+            fileobj (file-like): Writable stream.
+        """
+        with _text_stream(fileobj) as stream:
+            yaml.dump(data, stream, Dumper=self._dumper)
+
+    def load(self, fileobj: typing.IO) -> typing.Any:
+        """
+        Parses a YAML document from a text or binary stream.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        with _text_stream(fileobj) as stream:
+            return yaml.load(stream, Loader=self._loader)
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Writes records as a YAML multi-document stream.
+
+        Args:
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable stream.
+        """
+        with _text_stream(fileobj) as stream:
+            yaml.dump_all(records, stream, Dumper=self._dumper, explicit_start=True)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily parses each document of a YAML multi-document stream.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            iterator: Deserialized records.
+        """
+        with _text_stream(fileobj) as stream:
+            yield from yaml.load_all(stream, Loader=self._loader)
 
     def __str__(self):
         """
@@ -91,23 +573,124 @@ class YamlSerializer(SerializingStrategy):
         Returns:
             str: YamlSerializer class in string format.
         """
-        return f"YamlSerializer()"
+        return repr(self)
 
     def __repr__(self):
         """
         Formal string representation of YamlSerializer object.
 
         Returns:
-            str: YamlSerializer class in formal string format.
+            str: YamlSerializer class in formal string format, showing any non-default options.
+        """
+        options = []
+        if self.loader != 'full':
+            options.append(f'loader={self.loader!r}')
+        if not self.use_libyaml:
+            options.append('use_libyaml=False')
+        return f"YamlSerializer({', '.join(options)})"
+
+
+def _rebuild_buffer(cls: type, buffer: typing.Any) -> typing.Union[bytes, bytearray]:
+    """
+    Rebuild a bytes or bytearray pickled out of band, reusing the received object, or the object a memoryview
+        covers in full, when it already is one
+    """
+    # pylint: disable=unidiomatic-typecheck
+    if type(buffer) is cls:
+        return buffer
+    if isinstance(buffer, memoryview) and type(buffer.obj) is cls and buffer.nbytes == len(buffer.obj):
+        return buffer.obj
+    return cls(buffer)
+
+
+class _BufferReader:
+    """
+    Read-only file over a buffer whose reads return memoryview slices, so an Unpickler can read a pickle stream held
+        in a bytearray or shared memory without the copy io.BytesIO makes of anything but bytes.
+    The C unpickler accepts any buffer from read and peek, and peeks ahead so it calls read once per chunk.
+    """
+
+    def __init__(self, buffer: typing.Union[bytes, bytearray, memoryview]):
+        self._view = memoryview(buffer).cast('B')
+        self._position = 0
+
+    def read(self, size: int = -1) -> memoryview:
+        start = self._position
+        self._position = len(self._view) if size is None or size < 0 else min(start + size, len(self._view))
+        return self._view[start:self._position]
+
+    def readinto(self, buffer: typing.Union[bytearray, memoryview]) -> int:
+        data = self.read(len(memoryview(buffer).cast('B')))
+        memoryview(buffer).cast('B')[:len(data)] = data
+        return len(data)
+
+    def peek(self, size: int = 0) -> memoryview:
+        return self._view[self._position:]
+
+    def readline(self, size: int = -1) -> bytes:
+        # only the text protocols read lines, and to_parts always writes protocol 5, so a copy is fine here
+        rest = self._view[self._position:].tobytes()
+        end = rest.find(b'\n') + 1 or len(rest)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        self._position += end
+        return rest[:end]
+
+
+@functools.lru_cache(maxsize=None)
+def _out_of_band_classes() -> typing.Tuple[type, type]:
+    """ The pickler and unpickler behind to_parts and from_parts, defined on first use since they subclass pickle's"""
+
+    class OutOfBandPickler(pickle.Pickler):
+        """
+        Protocol 5 pickler that also sends plain bytes and bytearray objects of at least min_size out of band.
+        The C pickler never offers those types to reducer_override, so they are swapped for a persistent id holding a
+            PickleBuffer, which pickle then hands to buffer_callback like any other out-of-band buffer.
         """
-        return f"YamlSerializer()"
+
+        def __init__(self, file: typing.IO, min_size: int, buffer_callback: typing.Callable):
+            super().__init__(file, protocol=5, buffer_callback=buffer_callback)
+            self.min_size = min_size
+
+        def persistent_id(self, obj: typing.Any) -> typing.Any:
+            # pylint: disable=unidiomatic-typecheck
+            if (type(obj) is bytes or type(obj) is bytearray) and len(obj) >= self.min_size:
+                return type(obj) is bytearray, pickle.PickleBuffer(obj)
+            return None
+
+    class OutOfBandUnpickler(pickle.Unpickler):
+        """ Unpickler for streams written by OutOfBandPickler"""
+
+        def persistent_load(self, pid: typing.Any) -> typing.Any:
+            is_bytearray, buffer = pid
+            return _rebuild_buffer(bytearray if is_bytearray else bytes, buffer)
+
+    return OutOfBandPickler, OutOfBandUnpickler
 
 
 class PickleSerializer(SerializingStrategy):
     """
     This class implements Pickle serialization and deserialization.
+    to_parts/from_parts use protocol 5 out-of-band buffers, so large bytes, bytearray and NumPy buffers are passed
+        by reference instead of being copied into the pickle stream.
     """
 
+    strategy_id = 3
+
+    def __init__(self, protocol: typing.Optional[int] = None, oob_min_size: int = 64 * 1024):
+        """
+        Constructor for PickleSerializer class.
+
+        Args:
+            protocol (int, optional): Pickle protocol for __call__, dump and dump_records. Defaults to
+                pickle.DEFAULT_PROTOCOL.
+            oob_min_size (int, optional): Plain bytes and bytearray objects at least this large are sent out of band
+                by to_parts. Objects that provide their own PickleBuffer, such as NumPy arrays, always are.
+                Defaults to 64 KiB.
+        """
+        self.protocol = protocol
+        self.oob_min_size = oob_min_size
+
     def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
         """
         Callable method for PickleSerializer class that serializes
@@ -121,68 +704,2057 @@ class PickleSerializer(SerializingStrategy):
             str or dict: Serialized or deserialized data.
         """
         if deserialize:
-            if not isinstance(data, bytes):
+            if not isinstance(data, (bytes, bytearray, memoryview)):
                 raise ValueError(f'Type: {type(data)} cannot be deserialized')
-            return pickle.load(io.BytesIO(data))
-        return pickle.dumps(data)
+            return pickle.loads(data)
+        return pickle.dumps(data, protocol=self.protocol)
 
-    def __str__(self):
+    def to_parts(self, data: typing.Any) -> typing.List[typing.Union[bytes, memoryview]]:
         """
-        String representation of PickleSerializer object.
+        Pickles data with protocol 5, keeping large buffers out of band as zero-copy memoryviews.
+
+        Args:
+            data (Any): Data to be serialized.
 
         Returns:
-            str: PickleSerializer class in string format.
+            list: The pickle stream followed by one memoryview per out-of-band buffer. The views reference data's
+                own memory, so data must not be modified until the parts have been written.
         """
-        return f"PickleSerializer()"
+        buffers = []
 
-    def __repr__(self):
+        def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+            try:
+                buffers.append(buffer.raw())
+            except BufferError:
+                return True  # not contiguous, pickle it in band
+            return False
+
+        pickler, _ = _out_of_band_classes()
+        stream = io.BytesIO()
+        pickler(stream, self.oob_min_size, buffer_callback).dump(data)
+        return [stream.getbuffer()] + buffers
+
+    def from_parts(self, parts: typing.Sequence[typing.Union[bytes, bytearray, memoryview]]) -> typing.Any:
         """
-        Formal string representation of PickleSerializer object.
+        Unpickles the parts produced by to_parts, handing the out-of-band buffers to pickle without copying.
+
+        Args:
+            parts (sequence): The pickle stream followed by the out-of-band buffers.
 
         Returns:
-            str: PickleSerializer class in formal string format.
+            Any: Deserialized data.
         """
-        return f"PickleSerializer()"
+        if not parts:
+            raise ValueError('No parts to deserialize')
+        _, unpickler = _out_of_band_classes()
+        return unpickler(_BufferReader(parts[0]), buffers=parts[1:]).load()
 
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Pickles data directly to a binary stream.
 
-class DataSerializer:
-    """
-    This class implements a strategy pattern for serialization and deserialization using different formats.
-    Our primary usage will be in passing objects between servers, to cache or to Redis
-    """
+        Args:
+            data (Any): Data to be serialized.
+            fileobj (file-like): Writable binary stream.
+        """
+        pickle.dump(data, fileobj, protocol=self.protocol)
 
-    def __init__(self, serializing_strategy: SerializingStrategy):
+    def load(self, fileobj: typing.IO) -> typing.Any:
         """
-        Constructor for DataSerializer class.
+        Unpickles data from a binary stream.
 
         Args:
-            serializing_strategy (object): An instance of JsonSerializer, YamlSerializer, or PickleSerializer.
+            fileobj (file-like): Readable binary stream.
+
+        Returns:
+            Any: Deserialized data.
         """
-        self.serializing_strategy = serializing_strategy
+        return pickle.load(fileobj)
 
-    def serialize(self, data: typing.Any) -> typing.Union[str, bytes]:
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
         """
-        Serializes data using the provided serialization strategy.
+        Writes records as consecutive, independent pickle frames.
 
         Args:
-            data (str or dict): Data to be serialized.
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable binary stream.
+        """
+        for record in records:
+            pickle.dump(record, fileobj, protocol=self.protocol)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily reads consecutive pickle frames until the end of the stream.
+
+        Args:
+            fileobj (file-like): Readable binary stream.
 
         Returns:
-            str: Serialized data.
+            iterator: Deserialized records.
         """
-        return self.serializing_strategy(data)
+        while True:
+            try:
+                yield pickle.load(fileobj)
+            except EOFError:
+                return
 
-    def deserialize(self, data: typing.Union[str, bytes]) -> typing.Any:
+    def __str__(self):
         """
-        Deserializes data using the provided deserialization strategy.
+        String representation of PickleSerializer object.
 
-        Args:
-            data (str): Serialized data.
+        Returns:
+            str: PickleSerializer class in string format.
+        """
+        return repr(self)
+
+    def __repr__(self):
+        """
+        Formal string representation of PickleSerializer object.
 
         Returns:
-            dict: Deserialized data.
+            str: PickleSerializer class in formal string format, showing any non-default options.
         """
-        return self.serializing_strategy(data, deserialize=True)
+        options = []
+        if self.protocol is not None:
+            options.append(f'protocol={self.protocol}')
+        if self.oob_min_size != 64 * 1024:
+            options.append(f'oob_min_size={self.oob_min_size}')
+        return f"PickleSerializer({', '.join(options)})"
+
+
+class MsgpackSerializer(SerializingStrategy):
+    """
+    This class implements MessagePack serialization and deserialization, a compact binary format that is safe to
+        load from untrusted sources. Needs the msgpack package.
+    bytes are native to MessagePack, datetime, date, set, frozenset and Decimal are carried as extension types.
+    """
+
+    strategy_id = 4
+
+    # MessagePack extension type codes, application codes must be 0-127
+    EXT_DATETIME = 1
+    EXT_DATE = 2
+    EXT_SET = 3
+    EXT_FROZENSET = 4
+    EXT_DECIMAL = 5
+
+    def __init__(self):
+        """
+        Constructor for MsgpackSerializer class.
+        """
+        if msgpack is None:
+            raise ImportError('MsgpackSerializer requires the msgpack package')
+
+    def _default(self, obj: typing.Any) -> typing.Any:
+        """ Pack the types MessagePack has no native representation for as extension types"""
+        if isinstance(obj, datetime.datetime):
+            return msgpack.ExtType(self.EXT_DATETIME, obj.isoformat().encode('ascii'))
+        if isinstance(obj, datetime.date):
+            return msgpack.ExtType(self.EXT_DATE, obj.isoformat().encode('ascii'))
+        if isinstance(obj, (set, frozenset)):
+            code = self.EXT_FROZENSET if isinstance(obj, frozenset) else self.EXT_SET
+            return msgpack.ExtType(code, msgpack.packb(list(obj), default=self._default, use_bin_type=True))
+        if isinstance(obj, decimal.Decimal):
+            return msgpack.ExtType(self.EXT_DECIMAL, str(obj).encode('ascii'))
+        raise TypeError(f'Type: {type(obj)} cannot be serialized by {self}')
+
+    def _ext_hook(self, code: int, data: bytes) -> typing.Any:
+        """ Rebuild the extension types packed by _default"""
+        if code == self.EXT_DATETIME:
+            return datetime.datetime.fromisoformat(data.decode('ascii'))
+        if code == self.EXT_DATE:
+            return datetime.date.fromisoformat(data.decode('ascii'))
+        if code in (self.EXT_SET, self.EXT_FROZENSET):
+            items = self._unpackb(data)
+            return frozenset(items) if code == self.EXT_FROZENSET else set(items)
+        if code == self.EXT_DECIMAL:
+            return decimal.Decimal(data.decode('ascii'))
+        return msgpack.ExtType(code, data)
+
+    def _unpackb(self, data: typing.Union[bytes, bytearray, memoryview]) -> typing.Any:
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+    def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
+        """
+        Callable method for MsgpackSerializer class that serializes
+            or deserializes data depending on the deserialize flag.
+
+        Args:
+            data (Any for serializing, bytes-like for deserializing): Data to be serialized or deserialized.
+            deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
+
+        Returns:
+            bytes or Any: Serialized or deserialized data.
+        """
+        if deserialize:
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                raise ValueError(f'Type: {type(data)} cannot be deserialized')
+            return self._unpackb(data)
+        return msgpack.packb(data, default=self._default, use_bin_type=True)
+
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Packs data to a binary stream.
+
+        Args:
+            data (Any): Data to be serialized.
+            fileobj (file-like): Writable binary stream.
+        """
+        msgpack.pack(data, fileobj, default=self._default, use_bin_type=True)
+
+    def load(self, fileobj: typing.IO) -> typing.Any:
+        """
+        Unpacks data from a binary stream.
+
+        Args:
+            fileobj (file-like): Readable binary stream.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        return self._unpackb(fileobj.read())
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Writes records as consecutive MessagePack objects.
+
+        Args:
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable binary stream.
+        """
+        packer = msgpack.Packer(default=self._default, use_bin_type=True)
+        for record in records:
+            fileobj.write(packer.pack(record))
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily unpacks consecutive MessagePack objects, reading the stream in chunks.
+
+        Args:
+            fileobj (file-like): Readable binary stream.
+
+        Returns:
+            iterator: Deserialized records.
+        """
+        yield from msgpack.Unpacker(fileobj, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+    def __str__(self):
+        """
+        String representation of MsgpackSerializer object.
+
+        Returns:
+            str: MsgpackSerializer class in string format.
+        """
+        return "MsgpackSerializer()"
+
+    def __repr__(self):
+        """
+        Formal string representation of MsgpackSerializer object.
+
+        Returns:
+            str: MsgpackSerializer class in formal string format.
+        """
+        return "MsgpackSerializer()"
+
+
+class CborSerializer(SerializingStrategy):
+    """
+    This class implements CBOR (RFC 8949) serialization and deserialization, a compact binary format that is safe
+        to load from untrusted sources. Needs the cbor2 package.
+    bytes, datetime, date, set, frozenset and Decimal use the standard CBOR tags, frozensets come back as sets.
+    """
+
+    strategy_id = 5
+
+    def __init__(self, timezone: typing.Optional[datetime.tzinfo] = datetime.timezone.utc):
+        """
+        Constructor for CborSerializer class.
+
+        Args:
+            timezone (tzinfo, optional): Timezone assumed for naive datetimes, which CBOR cannot represent, so they
+                come back timezone aware. None makes naive datetimes an error. Defaults to UTC.
+        """
+        if cbor2 is None:
+            raise ImportError('CborSerializer requires the cbor2 package')
+        self.timezone = timezone
+
+    def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
+        """
+        Callable method for CborSerializer class that serializes
+            or deserializes data depending on the deserialize flag.
+
+        Args:
+            data (Any for serializing, bytes-like for deserializing): Data to be serialized or deserialized.
+            deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
+
+        Returns:
+            bytes or Any: Serialized or deserialized data.
+        """
+        if deserialize:
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                raise ValueError(f'Type: {type(data)} cannot be deserialized')
+            return cbor2.loads(data)
+        return cbor2.dumps(data, timezone=self.timezone)
+
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Encodes data to a binary stream.
+
+        Args:
+            data (Any): Data to be serialized.
+            fileobj (file-like): Writable binary stream.
+        """
+        cbor2.dump(data, fileobj, timezone=self.timezone)
+
+    def load(self, fileobj: typing.IO) -> typing.Any:
+        """
+        Decodes data from a binary stream.
+
+        Args:
+            fileobj (file-like): Readable binary stream.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        return cbor2.load(fileobj)
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Writes records as a CBOR sequence (RFC 8742), consecutive items with no framing.
+
+        Args:
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable binary stream.
+        """
+        encoder = cbor2.CBOREncoder(fileobj, timezone=self.timezone)
+        for record in records:
+            encoder.encode(record)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily decodes the items of a CBOR sequence until the end of the stream.
+
+        Args:
+            fileobj (file-like): Readable binary stream.
+
+        Returns:
+            iterator: Deserialized records.
+        """
+        decoder = cbor2.CBORDecoder(fileobj)
+        while True:
+            try:
+                yield decoder.decode()
+            except cbor2.CBORDecodeEOF:
+                return
+
+    def __str__(self):
+        """
+        String representation of CborSerializer object.
+
+        Returns:
+            str: CborSerializer class in string format.
+        """
+        return "CborSerializer()"
+
+    def __repr__(self):
+        """
+        Formal string representation of CborSerializer object.
+
+        Returns:
+            str: CborSerializer class in formal string format.
+        """
+        return "CborSerializer()"
+
+
+class Codec(typing.NamedTuple):
+    """
+    A compression codec usable by CompressingSerializer.
+
+    codec_id is written in the payload header so it must be unique and stable, 0-255.
+    compress(data, level) takes the level or None for the codec default.
+    """
+    name: str
+    codec_id: int
+    compress: typing.Callable[[bytes, typing.Optional[int]], bytes]
+    decompress: typing.Callable[[bytes], bytes]
+
+
+_CODECS_BY_NAME: typing.Dict[str, Codec] = {}
+_CODECS_BY_ID: typing.Dict[int, Codec] = {}
+
+
+def register_codec(name: str, codec_id: int, compress: typing.Callable[[bytes, typing.Optional[int]], bytes],
+                   decompress: typing.Callable[[bytes], bytes]) -> Codec:
+    """
+    Register a compression codec so CompressingSerializer(codec=name) can use it.
+
+    Args:
+        name (str): Name to select the codec by.
+        codec_id (int): Id written to the payload header, 0-255 and not used by another codec.
+        compress (callable): Takes the data and a level (None for the default) and returns compressed bytes.
+        decompress (callable): Takes compressed data and returns the original bytes.
+
+    Returns:
+        Codec: The registered codec.
+    """
+    if not 0 <= codec_id <= 255:
+        raise ValueError(f'Codec id {codec_id} must fit in a byte')
+    if codec_id in _CODECS_BY_ID and _CODECS_BY_ID[codec_id].name != name:
+        raise ValueError(f'Codec id {codec_id} already used by {_CODECS_BY_ID[codec_id].name}')
+    codec = Codec(name, codec_id, compress, decompress)
+    _CODECS_BY_NAME[name] = codec
+    _CODECS_BY_ID[codec_id] = codec
+    return codec
+
+
+def available_codecs() -> typing.List[str]:
+    """
+    Names of the registered compression codecs.
+
+    Returns:
+        list: Codec names usable with CompressingSerializer.
+    """
+    return list(_CODECS_BY_NAME)
+
+
+def _leveled(func: typing.Callable[..., bytes], keyword: str) -> typing.Callable[[bytes, typing.Optional[int]], bytes]:
+    """ Adapt a compress function taking its level as keyword to the Codec.compress signature"""
+    def compress(data: bytes, level: typing.Optional[int]) -> bytes:
+        return func(data) if level is None else func(data, **{keyword: level})
+    return compress
+
+
+register_codec('none', 0, lambda data, level: data, bytes)
+register_codec('zlib', 1, _leveled(zlib.compress, 'level'), zlib.decompress)
+register_codec('lzma', 2, _leveled(lzma.compress, 'preset'), lzma.decompress)
+register_codec('bz2', 3, _leveled(bz2.compress, 'compresslevel'), bz2.decompress)
+if zstandard is not None:
+    register_codec('zstd', 4, lambda data, level: zstandard.ZstdCompressor(level=3 if level is None else level)
+                   .compress(data), lambda data: zstandard.ZstdDecompressor().decompress(data))
+if lz4_frame is not None:
+    register_codec('lz4', 5, _leveled(lambda data, **options: lz4_frame.compress(data, **options), 'compression_level'),
+                   lambda data: lz4_frame.decompress(data))
+
+
+class CompressingSerializer(SerializingStrategy):
+    """
+    This class wraps any other strategy and compresses its output once it exceeds a size threshold.
+    Every payload starts with a small header naming the codec, so deserialize picks the right decompressor and
+        payloads written with a different codec, or left uncompressed, still load. Input without the header is
+        handed to the wrapped strategy unchanged, so existing uncompressed blobs keep working.
+    The header is MAGIC, the codec id byte and a flags byte.
+    """
+
+    MAGIC = b'\x00WZ'
+    FLAG_TEXT = 0x01
+    HEADER_SIZE = len(MAGIC) + 2
+
+    def __init__(self, serializing_strategy: SerializingStrategy, codec: str = 'zlib', threshold: int = 1024,
+                 level: typing.Optional[int] = None):
+        """
+        Constructor for CompressingSerializer class.
+
+        Args:
+            serializing_strategy (SerializingStrategy): Strategy producing the payload to compress.
+            codec (str, optional): Name of a registered codec: none, zlib, lzma, bz2, and zstd or lz4 when their
+                packages are installed. Defaults to 'zlib'.
+            threshold (int, optional): Payloads smaller than this many bytes are stored uncompressed.
+                Defaults to 1024.
+            level (int, optional): Compression level passed to the codec. Defaults to the codec's own default.
+        """
+        if codec not in _CODECS_BY_NAME:
+            raise ValueError(f'Unknown or unavailable codec: {codec!r}, expected one of {available_codecs()}')
+        self.serializing_strategy = serializing_strategy
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+
+    def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
+        """
+        Callable method for CompressingSerializer class that serializes and compresses,
+            or decompresses and deserializes, data depending on the deserialize flag.
+
+        Args:
+            data (Any for serializing, bytes-like for deserializing): Data to be serialized or deserialized.
+            deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
+
+        Returns:
+            bytes or Any: Serialized or deserialized data.
+        """
+        if deserialize:
+            return self.serializing_strategy(self.decompress(data), deserialize=True)
+        return self.compress(self.serializing_strategy(data))
+
+    def compress(self, payload: typing.Union[str, bytes]) -> bytes:
+        """
+        Compress a payload produced by the wrapped strategy and prefix the header. Payloads below the threshold,
+            or that do not shrink, are stored as is.
+
+        Args:
+            payload (str or bytes): Output of the wrapped strategy, str is encoded as UTF-8.
+
+        Returns:
+            bytes: Header and payload.
+        """
+        flags = 0
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+            flags |= self.FLAG_TEXT
+        codec = _CODECS_BY_NAME['none']
+        if len(payload) >= self.threshold:
+            compressed = _CODECS_BY_NAME[self.codec].compress(payload, self.level)
+            if len(compressed) < len(payload):
+                codec, payload = _CODECS_BY_NAME[self.codec], compressed
+        return b''.join((self.MAGIC, bytes((codec.codec_id, flags)), payload))
+
+    def decompress(self, data: typing.Union[str, bytes, bytearray, memoryview]) -> typing.Union[str, bytes]:
+        """
+        Strip the header and decompress with the codec it names. Input without the header is returned as is.
+
+        Args:
+            data (bytes-like): Compressed payload.
+
+        Returns:
+            str or bytes: Payload in the form the wrapped strategy produced it.
+        """
+        if isinstance(data, str):
+            return data
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise ValueError(f'Type: {type(data)} cannot be deserialized')
+        view = memoryview(data)
+        if view[:len(self.MAGIC)] != self.MAGIC:
+            return data
+        if len(view) < self.HEADER_SIZE:
+            raise ValueError('Compressed payload is truncated')
+        codec_id, flags = view[len(self.MAGIC)], view[len(self.MAGIC) + 1]
+        if codec_id not in _CODECS_BY_ID:
+            raise ValueError(f'Payload compressed with unknown or unavailable codec id {codec_id}')
+        payload = _CODECS_BY_ID[codec_id].decompress(view[self.HEADER_SIZE:])
+        return bytes(payload).decode('utf-8') if flags & self.FLAG_TEXT else payload
+
+    def __str__(self):
+        """
+        String representation of CompressingSerializer object.
+
+        Returns:
+            str: CompressingSerializer class in string format.
+        """
+        return repr(self)
+
+    def __repr__(self):
+        """
+        Formal string representation of CompressingSerializer object.
+
+        Returns:
+            str: CompressingSerializer class in formal string format, showing the wrapped strategy and options.
+        """
+        level = '' if self.level is None else f', level={self.level}'
+        return (f"CompressingSerializer({self.serializing_strategy!r}, codec={self.codec!r}, "
+                f"threshold={self.threshold}{level})")
+
+
+# strategy id -> factory building a default instance, used to decode frames written by any strategy
+_STRATEGY_FACTORIES: typing.Dict[int, typing.Callable[[], SerializingStrategy]] = {}
+_STRATEGY_INSTANCES: typing.Dict[int, SerializingStrategy] = {}
+
+
+def register_strategy(strategy_id: int, factory: typing.Callable[[], SerializingStrategy]) -> None:
+    """
+    Register the strategy that decodes frames carrying strategy_id.
+
+    Args:
+        strategy_id (int): Id written to frame headers, 1-255 and not used by another strategy.
+        factory (callable): Returns a strategy instance able to deserialize those frames, called on first use.
+    """
+    if not 0 < strategy_id <= 255:
+        raise ValueError(f'Strategy id {strategy_id} must be between 1 and 255')
+    _STRATEGY_FACTORIES[strategy_id] = factory
+    _STRATEGY_INSTANCES.pop(strategy_id, None)
+
+
+def strategy_for_id(strategy_id: int) -> SerializingStrategy:
+    """
+    The shared strategy instance that decodes frames carrying strategy_id.
+
+    Args:
+        strategy_id (int): Id from a frame header.
+
+    Returns:
+        SerializingStrategy: Strategy registered for the id.
+    """
+    if strategy_id not in _STRATEGY_INSTANCES:
+        if strategy_id not in _STRATEGY_FACTORIES:
+            raise ValueError(f'No strategy registered for id {strategy_id}')
+        _STRATEGY_INSTANCES[strategy_id] = _STRATEGY_FACTORIES[strategy_id]()
+    return _STRATEGY_INSTANCES[strategy_id]
+
+
+for _strategy in (JsonSerializer, YamlSerializer, PickleSerializer, MsgpackSerializer, CborSerializer):
+    register_strategy(_strategy.strategy_id, _strategy)
+
+
+class FrameHeader(typing.NamedTuple):
+    """
+    The decoded fixed-size header at the start of every frame.
+    """
+    strategy_id: int
+    flags: int
+    schema_version: int
+    length: int
+    checksum: int
+
+
+FRAME_MAGIC = b'\x00WF'
+FRAME_VERSION = 1
+# magic, frame format version, strategy id, flags, schema version, payload length, crc32 of the payload
+_FRAME_HEADER = struct.Struct('!3sBBBHQI')
+FRAME_HEADER_SIZE = _FRAME_HEADER.size
+FRAME_FLAG_CHECKSUM = 0x01
+FRAME_FLAG_TEXT = 0x02
+FRAME_FLAG_COMPRESSED = 0x04
+
+
+def is_frame(data: typing.Any) -> bool:
+    """
+    Whether data starts with the frame magic.
+
+    Args:
+        data (Any): Candidate serialized data.
+
+    Returns:
+        bool: True for bytes-like data that looks like a frame.
+    """
+    return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:len(FRAME_MAGIC)]) == FRAME_MAGIC
+
+
+def pack_frame(payload: typing.Union[str, bytes], strategy_id: int, schema_version: int = 0,
+               checksum: bool = True, compressed: bool = False) -> bytes:
+    """
+    Wrap a serialized payload in a frame.
+
+    Args:
+        payload (str or bytes): Output of the strategy, str is encoded as UTF-8 and flagged as text.
+        strategy_id (int): Id of the strategy that produced the payload.
+        schema_version (int, optional): Application defined version of the payload layout, 0-65535. Defaults to 0.
+        checksum (bool, optional): Store a CRC32 of the payload, verified on decode. Defaults to True.
+        compressed (bool, optional): The payload came from a CompressingSerializer. Defaults to False.
+
+    Returns:
+        bytes: Header followed by the payload.
+    """
+    flags = (FRAME_FLAG_CHECKSUM if checksum else 0) | (FRAME_FLAG_COMPRESSED if compressed else 0)
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+        flags |= FRAME_FLAG_TEXT
+    crc = zlib.crc32(payload) if checksum else 0
+    return _FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, strategy_id, flags, schema_version, len(payload),
+                              crc) + payload
+
+
+def read_frame_header(buffer: typing.Union[bytes, bytearray, memoryview], offset: int = 0) -> FrameHeader:
+    """
+    Decode the frame header at offset without touching the payload.
+
+    Args:
+        buffer (bytes-like): Buffer holding at least a header at offset.
+        offset (int, optional): Position of the frame in buffer. Defaults to 0.
+
+    Returns:
+        FrameHeader: The decoded header.
+    """
+    if len(buffer) - offset < FRAME_HEADER_SIZE:
+        raise ValueError('Frame header is truncated')
+    magic, version, strategy_id, flags, schema_version, length, crc = _FRAME_HEADER.unpack_from(buffer, offset)
+    if magic != FRAME_MAGIC:
+        raise ValueError(f'Not a frame, bad magic {magic!r} at offset {offset}')
+    if version != FRAME_VERSION:
+        raise ValueError(f'Unsupported frame version {version}')
+    return FrameHeader(strategy_id, flags, schema_version, length, crc)
+
+
+def decode_frame(buffer: typing.Union[bytes, bytearray, memoryview],
+                 offset: int = 0) -> typing.Tuple[FrameHeader, memoryview]:
+    """
+    Decode the frame at offset and verify its checksum.
+
+    Args:
+        buffer (bytes-like): Buffer holding the frame.
+        offset (int, optional): Position of the frame in buffer. Defaults to 0.
+
+    Returns:
+        tuple: The header and a zero-copy memoryview of the payload.
+    """
+    header = read_frame_header(buffer, offset)
+    start = offset + FRAME_HEADER_SIZE
+    if len(buffer) - start < header.length:
+        raise ValueError(f'Frame payload is truncated, expected {header.length} bytes')
+    payload = memoryview(buffer)[start:start + header.length]
+    if header.flags & FRAME_FLAG_CHECKSUM and zlib.crc32(payload) != header.checksum:
+        raise ValueError('Frame checksum mismatch')
+    return header, payload
+
+
+def iter_frames(buffer: typing.Union[bytes, bytearray, memoryview],
+                allow_partial: bool = False) -> typing.Iterator[typing.Tuple[FrameHeader, memoryview]]:
+    """
+    Iterate over back-to-back frames in one buffer, such as the bytes read from a socket, slicing payloads
+        out as memoryviews without copying.
+
+    Args:
+        buffer (bytes-like): Buffer holding consecutive frames.
+        allow_partial (bool, optional): Stop quietly at an incomplete trailing frame instead of raising, so the
+            rest can be read once more data arrives. Defaults to False.
+
+    Returns:
+        iterator: (header, payload memoryview) for each complete frame.
+    """
+    offset = 0
+    while offset < len(buffer):
+        if allow_partial and frame_size(buffer, offset) is None:
+            return
+        header, payload = decode_frame(buffer, offset)
+        yield header, payload
+        offset += FRAME_HEADER_SIZE + header.length
+
+
+def frame_size(buffer: typing.Union[bytes, bytearray, memoryview], offset: int = 0) -> typing.Optional[int]:
+    """
+    Total size of the frame at offset, or None if buffer does not yet hold all of it.
+
+    Args:
+        buffer (bytes-like): Buffer holding the start of a frame.
+        offset (int, optional): Position of the frame in buffer. Defaults to 0.
+
+    Returns:
+        int or None: Header plus payload size in bytes, None when incomplete.
+    """
+    if len(buffer) - offset < FRAME_HEADER_SIZE:
+        return None
+    size = FRAME_HEADER_SIZE + read_frame_header(buffer, offset).length
+    return size if len(buffer) - offset >= size else None
+
+
+def _strategy_ident(serializing_strategy: SerializingStrategy) -> typing.Tuple[int, bool]:
+    """ The frame strategy id and compressed flag for a strategy, looking through CompressingSerializer"""
+    if isinstance(serializing_strategy, CachingSerializer):
+        serializing_strategy = serializing_strategy.serializing_strategy
+    compressed = isinstance(serializing_strategy, CompressingSerializer)
+    if compressed:
+        serializing_strategy = serializing_strategy.serializing_strategy
+    if serializing_strategy.strategy_id is None:
+        raise ValueError(f'{serializing_strategy} has no strategy_id and cannot be framed')
+    return serializing_strategy.strategy_id, compressed
+
+
+def unframe(data: typing.Union[bytes, bytearray, memoryview],
+            serializing_strategy: typing.Optional[SerializingStrategy] = None) -> typing.Any:
+    """
+    Deserialize a frame with the strategy named in its header.
+
+    Args:
+        data (bytes-like): A complete frame.
+        serializing_strategy (SerializingStrategy, optional): Used instead of the registered default when its
+            strategy id matches the header, so its options apply. Defaults to None.
+
+    Returns:
+        Any: Deserialized data.
+    """
+    header, payload = decode_frame(data)
+    return _decode_payload(header, payload, serializing_strategy)
+
+
+def _decode_payload(header: FrameHeader, payload: memoryview,
+                    serializing_strategy: typing.Optional[SerializingStrategy] = None) -> typing.Any:
+    """ Hand a frame payload to the strategy for its header, looking through the wrappers _strategy_ident does"""
+    while isinstance(serializing_strategy, (FramedSerializer, CachingSerializer, CompressingSerializer)):
+        serializing_strategy = serializing_strategy.serializing_strategy
+    if serializing_strategy is None or serializing_strategy.strategy_id != header.strategy_id:
+        serializing_strategy = strategy_for_id(header.strategy_id)
+    if header.flags & FRAME_FLAG_COMPRESSED:
+        payload = CompressingSerializer(serializing_strategy).decompress(payload)
+    if header.flags & FRAME_FLAG_TEXT:
+        payload = str(payload, 'utf-8')
+    return serializing_strategy(payload, deserialize=True)
+
+
+def _check_and_decode_payload(header: FrameHeader, serializing_strategy: typing.Optional[SerializingStrategy],
+                              payload: typing.Union[bytes, memoryview]) -> typing.Any:
+    """ Verify a frame payload read separately from its header, then decode it"""
+    if header.flags & FRAME_FLAG_CHECKSUM and zlib.crc32(payload) != header.checksum:
+        raise ValueError('Frame checksum mismatch')
+    return _decode_payload(header, payload, serializing_strategy)
+
+
+class FramedSerializer(SerializingStrategy):
+    """
+    This class wraps another strategy, or a CompressingSerializer around one, and puts each payload in a
+        self-describing frame: magic bytes, strategy id, schema version, payload length and an optional CRC32.
+    A frame from any registered strategy deserializes, the header says which one to use, and frames can be
+        read back to back from one buffer with iter_frames.
+    """
+
+    def __init__(self, serializing_strategy: SerializingStrategy, schema_version: int = 0, checksum: bool = True):
+        """
+        Constructor for FramedSerializer class.
+
+        Args:
+            serializing_strategy (SerializingStrategy): Strategy producing the payload, needs a strategy_id.
+            schema_version (int, optional): Application defined version of the payload layout, 0-65535.
+                Defaults to 0.
+            checksum (bool, optional): Store and verify a CRC32 of the payload. Defaults to True.
+        """
+        self._strategy_id, self._compressed = _strategy_ident(serializing_strategy)
+        self.serializing_strategy = serializing_strategy
+        self.schema_version = schema_version
+        self.checksum = checksum
+
+    def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
+        """
+        Callable method for FramedSerializer class that serializes data into a frame
+            or deserializes a frame depending on the deserialize flag.
+
+        Args:
+            data (Any for serializing, bytes-like for deserializing): Data to be serialized or deserialized.
+            deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
+
+        Returns:
+            bytes or Any: Serialized or deserialized data.
+        """
+        if deserialize:
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                raise ValueError(f'Type: {type(data)} cannot be deserialized')
+            return unframe(data, self.serializing_strategy)
+        return pack_frame(self.serializing_strategy(data), self._strategy_id, self.schema_version, self.checksum,
+                          self._compressed)
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Writes records as back-to-back frames, which need no separator as each header carries the length.
+
+        Args:
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable binary stream.
+        """
+        for record in records:
+            fileobj.write(self(record))
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily reads back-to-back frames until the end of the stream, each decoded with the strategy it names.
+
+        Args:
+            fileobj (file-like): Readable binary stream.
+
+        Returns:
+            iterator: Deserialized records.
+        """
+        while True:
+            head = _read_exactly(fileobj, FRAME_HEADER_SIZE, 'frame', at_boundary=True)
+            if not head:
+                return
+            header = read_frame_header(head)
+            payload = _read_exactly(fileobj, header.length, 'frame')
+            yield _check_and_decode_payload(header, self.serializing_strategy, payload)
+
+    def __str__(self):
+        """
+        String representation of FramedSerializer object.
+
+        Returns:
+            str: FramedSerializer class in string format.
+        """
+        return repr(self)
+
+    def __repr__(self):
+        """
+        Formal string representation of FramedSerializer object.
+
+        Returns:
+            str: FramedSerializer class in formal string format, showing the wrapped strategy and options.
+        """
+        return (f"FramedSerializer({self.serializing_strategy!r}, schema_version={self.schema_version}, "
+                f"checksum={self.checksum})")
+
+
+def _iov_max() -> int:
+    """ Maximum number of buffers one writev/sendmsg call accepts"""
+    try:
+        return os.sysconf('SC_IOV_MAX')
+    except (AttributeError, OSError, ValueError):
+        return 1024
+
+
+def _vectored_write(write: typing.Callable[[typing.List[memoryview]], int],
+                    buffers: typing.Iterable[typing.Union[bytes, bytearray, memoryview]]) -> int:
+    """ Call a writev style function until every buffer has been written, resuming after partial writes"""
+    views = collections.deque(memoryview(buffer).cast('B') for buffer in buffers if len(buffer))
+    iov_max = _iov_max()
+    total = 0
+    while views:
+        written = write(list(itertools.islice(views, iov_max)))
+        total += written
+        while views and written >= views[0].nbytes:
+            written -= views.popleft().nbytes
+        if written:
+            views[0] = views[0][written:]
+    return total
+
+
+class MultipartPayload:
+    """
+    A serialized object made of several buffers, as produced by DataSerializer.serialize_parts, that can be written
+        with a single writev/sendmsg or copied into a shared memory segment without first joining the buffers.
+    On the wire it is a small header, MAGIC, the part count and each part's length, followed by the parts.
+    """
+
+    MAGIC = b'\x00WM'
+    _COUNT = struct.Struct('!3sI')
+    _LENGTH = struct.Struct('!Q')
+
+    def __init__(self, parts: typing.Sequence[typing.Union[bytes, bytearray, memoryview]]):
+        """
+        Constructor for MultipartPayload class.
+
+        Args:
+            parts (sequence): Buffers making up the payload, the first being the main payload.
+        """
+        self.parts = list(parts)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Size of the parts, not counting the header.
+
+        Returns:
+            int: Total bytes in all parts.
+        """
+        return sum(memoryview(part).nbytes for part in self.parts)
+
+    def header(self) -> bytes:
+        """
+        The header describing the parts, written before them by writev, sendmsg and write_into.
+
+        Returns:
+            bytes: Magic, part count and part lengths.
+        """
+        lengths = b''.join(self._LENGTH.pack(memoryview(part).nbytes) for part in self.parts)
+        return self._COUNT.pack(self.MAGIC, len(self.parts)) + lengths
+
+    def writev(self, fd: int) -> int:
+        """
+        Write header and parts to a file descriptor with os.writev, without joining them first.
+
+        Args:
+            fd (int): Open file descriptor, e.g. a pipe or file.
+
+        Returns:
+            int: Bytes written.
+        """
+        return _vectored_write(functools.partial(os.writev, fd), [self.header(), *self.parts])
+
+    def sendmsg(self, sock: 'socket.socket') -> int:
+        """
+        Send header and parts on a connected socket with socket.sendmsg, without joining them first.
+
+        Args:
+            sock (socket.socket): Connected stream socket.
+
+        Returns:
+            int: Bytes sent.
+        """
+        return _vectored_write(sock.sendmsg, [self.header(), *self.parts])
+
+    def write_into(self, buffer: typing.Union[bytearray, memoryview], offset: int = 0) -> int:
+        """
+        Copy header and parts into a writable buffer, such as SharedMemory.buf.
+
+        Args:
+            buffer (writable bytes-like): Destination, must have room for header and parts after offset.
+            offset (int, optional): Position to start writing at. Defaults to 0.
+
+        Returns:
+            int: Bytes written.
+        """
+        target = memoryview(buffer).cast('B')
+        position = offset
+        for part in [self.header(), *self.parts]:
+            part = memoryview(part).cast('B')
+            target[position:position + part.nbytes] = part
+            position += part.nbytes
+        return position - offset
+
+    @classmethod
+    def from_buffer(cls, buffer: typing.Union[bytes, bytearray, memoryview], offset: int = 0) -> 'MultipartPayload':
+        """
+        Rebuild a payload from a buffer holding header and parts, slicing parts out as memoryviews without copying.
+
+        Args:
+            buffer (bytes-like): Buffer written by write_into, or read from a pipe or socket.
+            offset (int, optional): Position of the header in buffer. Defaults to 0.
+
+        Returns:
+            MultipartPayload: Payload whose parts are views into buffer.
+        """
+        view = memoryview(buffer).cast('B')
+        magic, count = cls._COUNT.unpack_from(view, offset)
+        if magic != cls.MAGIC:
+            raise ValueError(f'Not a multipart payload, bad magic {magic!r}')
+        position = offset + cls._COUNT.size
+        lengths = [cls._LENGTH.unpack_from(view, position + i * cls._LENGTH.size)[0] for i in range(count)]
+        position += count * cls._LENGTH.size
+        parts = []
+        for length in lengths:
+            if position + length > len(view):
+                raise ValueError('Multipart payload is truncated')
+            parts.append(view[position:position + length])
+            position += length
+        return cls(parts)
+
+    @classmethod
+    def read(cls, fileobj: typing.IO) -> 'MultipartPayload':
+        """
+        Read a payload from a binary stream, reading each part straight into its own buffer.
+
+        Args:
+            fileobj (file-like): Readable binary stream, e.g. from socket.makefile('rb') or a pipe.
+
+        Returns:
+            MultipartPayload: Payload whose parts are bytearrays.
+        """
+        def read_exactly(size: int) -> bytearray:
+            data = bytearray(size)
+            view, position = memoryview(data), 0
+            while position < size:
+                count = fileobj.readinto(view[position:])
+                if not count:
+                    raise EOFError('Stream ended inside a multipart payload')
+                position += count
+            return data
+
+        magic, count = cls._COUNT.unpack(read_exactly(cls._COUNT.size))
+        if magic != cls.MAGIC:
+            raise ValueError(f'Not a multipart payload, bad magic {magic!r}')
+        lengths = struct.unpack(f'!{count}Q', read_exactly(count * cls._LENGTH.size))
+        return cls([read_exactly(length) for length in lengths])
+
+    def __len__(self):
+        """
+        Number of parts.
+
+        Returns:
+            int: Part count.
+        """
+        return len(self.parts)
+
+    def __repr__(self):
+        """
+        Formal string representation of MultipartPayload object.
+
+        Returns:
+            str: MultipartPayload class in formal string format, showing part count and size.
+        """
+        return f"MultipartPayload(parts={len(self.parts)}, nbytes={self.nbytes})"
+
+
+class CacheStats:
+    """
+    Counters for one cache of a CachingSerializer.
+    """
+    __slots__ = ('hits', 'misses', 'evictions', 'entries', 'nbytes')
+
+    def __init__(self):
+        """
+        Constructor for CacheStats class, all counters start at zero.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = 0
+        self.nbytes = 0
+
+    def as_dict(self) -> typing.Dict[str, int]:
+        """
+        The counters as a dict.
+
+        Returns:
+            dict: Counter name to value.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        """
+        Formal string representation of CacheStats object.
+
+        Returns:
+            str: CacheStats class in formal string format, showing the counters.
+        """
+        return f"CacheStats({', '.join(f'{k}={v}' for k, v in self.as_dict().items())})"
+
+
+_MISSING = object()
+
+
+class _LruCache:
+    """ Thread safe LRU mapping bounded by entry count and by the total of the sizes given to put"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: 'collections.OrderedDict[typing.Hashable, typing.Tuple[typing.Any, int]]' = \
+            collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: typing.Hashable) -> typing.Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.stats.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def put(self, key: typing.Hashable, value: typing.Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.stats.nbytes -= old[1]
+            self._entries[key] = (value, size)
+            self.stats.nbytes += size
+            while len(self._entries) > self.max_entries or self.stats.nbytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.stats.nbytes -= evicted_size
+                self.stats.evictions += 1
+            self.stats.entries = len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats.entries = self.stats.nbytes = 0
+
+
+def content_key(data: typing.Any) -> typing.Optional[bytes]:
+    """
+    A stable digest of data's content, from its highest-protocol pickle.
+
+    Args:
+        data (Any): Object to key.
+
+    Returns:
+        bytes or None: 16 byte BLAKE2b digest, None if data cannot be pickled.
+    """
+    try:
+        return hashlib.blake2b(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+def freeze(data: typing.Any) -> typing.Any:
+    """
+    A read-only copy of a decoded structure: dicts become MappingProxyType, lists tuples and sets frozensets.
+
+    Args:
+        data (Any): Decoded data.
+
+    Returns:
+        Any: The frozen equivalent, other values are returned as is.
+    """
+    if isinstance(data, dict):
+        return types.MappingProxyType({key: freeze(value) for key, value in data.items()})
+    if isinstance(data, (list, tuple)):
+        return tuple(freeze(value) for value in data)
+    if isinstance(data, set):
+        return frozenset(data)
+    return data
+
+
+class CachingSerializer(SerializingStrategy):
+    """
+    This class wraps any other strategy with bounded LRU caches on both sides.
+    Serialize results are keyed on a content digest of the input (see content_key) or on a key_func of your own,
+        deserialize results on a digest of the blob. Deserialized results are handed out frozen (see freeze) so the
+        same cached object can be shared safely between callers and threads.
+    Keying on content costs a pickle dump of the input, which pays off for the JSON and YAML strategies; give a
+        cheaper key_func, or call serialize_with_key, when you have an id for the object.
+    """
+
+    def __init__(self, serializing_strategy: SerializingStrategy, max_entries: int = 1024,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 key_func: typing.Optional[typing.Callable[[typing.Any], typing.Optional[typing.Hashable]]] = None,
+                 cache_deserialize: bool = True):
+        """
+        Constructor for CachingSerializer class.
+
+        Args:
+            serializing_strategy (SerializingStrategy): Strategy doing the actual work on a cache miss.
+            max_entries (int, optional): Entries kept in each cache. Defaults to 1024.
+            max_bytes (int, optional): Serialized bytes kept in each cache, results larger than this are not
+                cached. Defaults to 64 MiB.
+            key_func (callable, optional): Maps data to a hashable cache key, or None to bypass the cache.
+                Defaults to content_key.
+            cache_deserialize (bool, optional): Also cache deserialized results, frozen. Defaults to True.
+        """
+        self.serializing_strategy = serializing_strategy
+        self.key_func = key_func or content_key
+        self.cache_deserialize = cache_deserialize
+        self._serialized = _LruCache(max_entries, max_bytes)
+        self._deserialized = _LruCache(max_entries, max_bytes)
+
+    @property
+    def serialize_stats(self) -> CacheStats:
+        """
+        Counters of the serialize side cache.
+
+        Returns:
+            CacheStats: Hits, misses, evictions, entries and bytes held.
+        """
+        return self._serialized.stats
+
+    @property
+    def deserialize_stats(self) -> CacheStats:
+        """
+        Counters of the deserialize side cache.
+
+        Returns:
+            CacheStats: Hits, misses, evictions, entries and bytes held.
+        """
+        return self._deserialized.stats
+
+    def clear(self) -> None:
+        """
+        Empty both caches, counters other than entries and bytes are kept.
+        """
+        self._serialized.clear()
+        self._deserialized.clear()
+
+    def __call__(self, data: typing.Any, deserialize: bool = False) -> typing.Any:
+        """
+        Callable method for CachingSerializer class that serializes or deserializes data depending on the
+            deserialize flag, answering from the caches when it can.
+
+        Args:
+            data (Any for serializing, str or bytes-like for deserializing): Data to be serialized or deserialized.
+            deserialize (bool, optional): Flag to indicate if data should be deserialized. Defaults to False.
+
+        Returns:
+            str, bytes or Any: Serialized data, or frozen deserialized data.
+        """
+        if deserialize:
+            return self._deserialize(data)
+        return self.serialize_with_key(data, self.key_func(data))
+
+    def serialize_with_key(self, data: typing.Any, key: typing.Optional[typing.Hashable]) -> typing.Union[str, bytes]:
+        """
+        Serialize data, caching the result under an explicit key.
+
+        Args:
+            data (Any): Data to be serialized.
+            key (hashable): Cache key standing for data's current content, None to bypass the cache.
+
+        Returns:
+            str or bytes: Serialized data.
+        """
+        if key is None:
+            return self.serializing_strategy(data)
+        payload = self._serialized.get(key)
+        if payload is _MISSING:
+            payload = self.serializing_strategy(data)
+            self._serialized.put(key, payload, len(payload))
+        return payload
+
+    def _deserialize(self, data: typing.Union[str, bytes, bytearray, memoryview]) -> typing.Any:
+        """ Deserialize through the blob digest keyed cache"""
+        if not self.cache_deserialize:
+            return self.serializing_strategy(data, deserialize=True)
+        blob = data.encode('utf-8') if isinstance(data, str) else data
+        key = hashlib.blake2b(blob, digest_size=16).digest()
+        result = self._deserialized.get(key)
+        if result is _MISSING:
+            result = freeze(self.serializing_strategy(data, deserialize=True))
+            self._deserialized.put(key, result, len(blob))
+        return result
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Writes records with the wrapped strategy, bypassing the caches as streamed records are rarely repeated.
+
+        Args:
+            records (iterable): Records to be serialized.
+            fileobj (file-like): Writable stream.
+        """
+        self.serializing_strategy.dump_records(records, fileobj)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily reads records with the wrapped strategy, bypassing the caches.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            iterator: Deserialized records.
+        """
+        return self.serializing_strategy.load_records(fileobj)
+
+    def __reduce__(self):
+        """ Pickle the configuration only, so the serializer can go to process pool workers with empty caches"""
+        return (type(self), (self.serializing_strategy, self._serialized.max_entries, self._serialized.max_bytes,
+                             self.key_func, self.cache_deserialize))
+
+    def __str__(self):
+        """
+        String representation of CachingSerializer object.
+
+        Returns:
+            str: CachingSerializer class in string format.
+        """
+        return repr(self)
+
+    def __repr__(self):
+        """
+        Formal string representation of CachingSerializer object.
+
+        Returns:
+            str: CachingSerializer class in formal string format, showing the wrapped strategy and limits.
+        """
+        return (f"CachingSerializer({self.serializing_strategy!r}, max_entries={self._serialized.max_entries}, "
+                f"max_bytes={self._serialized.max_bytes})")
+
+
+def estimate_size(data: typing.Any, limit: int) -> int:
+    """
+    Rough serialized size of data in bytes, used to decide whether serializing it is worth offloading.
+    Walks containers and object __dict__s counting string and buffer lengths plus a few bytes per item, and stops
+        as soon as the running total reaches limit, so a huge structure costs no more to estimate than a small one.
+
+    Args:
+        data (Any): Object about to be serialized.
+        limit (int): Stop counting once the estimate reaches this many bytes.
+
+    Returns:
+        int: Estimated size, at least limit when the walk was cut short.
+    """
+    total = 0
+    pending = [data]
+    while pending and total < limit:
+        obj = pending.pop()
+        if isinstance(obj, (str, bytes, bytearray)):
+            total += len(obj)
+        elif isinstance(obj, memoryview):
+            total += obj.nbytes
+        elif isinstance(obj, dict):
+            total += 16 * len(obj)
+            if total < limit:
+                pending.extend(obj.keys())
+                pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            total += 8 * len(obj)
+            if total < limit:
+                pending.extend(obj)
+        elif hasattr(obj, 'nbytes'):
+            total += obj.nbytes
+        elif hasattr(obj, '__dict__'):
+            total += 16
+            pending.append(vars(obj))
+        else:
+            total += 8
+    return total
+
+
+def _payload_size(payload: typing.Union[str, bytes, bytearray, memoryview]) -> int:
+    """ Size in bytes of a serialized payload, str counted as its UTF-8 encoding"""
+    if isinstance(payload, str):
+        return len(payload) if payload.isascii() else len(payload.encode('utf-8'))
+    return payload.nbytes if isinstance(payload, memoryview) else len(payload)
+
+
+def _stream_offset(fileobj: typing.IO) -> typing.Optional[int]:
+    """ Byte position of a stream, of the binary buffer under a text wrapper, or None when it cannot be told"""
+    try:
+        if not _is_binary_stream(fileobj):
+            if not hasattr(fileobj, 'buffer'):
+                return None
+            fileobj.flush()
+            fileobj = fileobj.buffer
+        return fileobj.tell() if fileobj.seekable() else None
+    except (OSError, ValueError):
+        return None
+
+
+def _offset_change(start: typing.Optional[int], end: typing.Optional[int]) -> typing.Optional[int]:
+    """ Bytes between two stream positions, None when either is unknown"""
+    return None if start is None or end is None else end - start
+
+
+class MetricEvent(typing.NamedTuple):
+    """ One instrumented DataSerializer call, as passed to every metrics sink"""
+    operation: str
+    strategy: str
+    nbytes: typing.Optional[int]
+    seconds: float
+    error: typing.Optional[BaseException]
+    items: int = 1
+
+
+# upper bounds in seconds of the latency histogram buckets, a last bucket catches everything slower
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2,
+                   5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Aggregate:
+    """ Running totals and latency histogram of one (strategy, operation) pair"""
+    __slots__ = ('calls', 'items', 'errors', 'nbytes', 'seconds', 'max_seconds', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+        self.errors = 0
+        self.nbytes = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, event: MetricEvent) -> None:
+        self.calls += 1
+        self.items += event.items
+        self.errors += event.error is not None
+        self.nbytes += event.nbytes or 0
+        self.seconds += event.seconds
+        self.max_seconds = max(self.max_seconds, event.seconds)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, event.seconds)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """ Upper bound of the bucket holding the given fraction of calls, max_seconds for the last bucket"""
+        rank = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return self.max_seconds
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        totals = {name: getattr(self, name) for name in self.__slots__ if name != 'buckets'}
+        totals['histogram'] = {bound: count for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.buckets)
+                               if count}
+        totals['p50'] = self.percentile(0.5)
+        totals['p99'] = self.percentile(0.99)
+        return totals
+
+
+class InMemoryMetrics:
+    """
+    Metrics sink aggregating call counts, items, error counts, bytes and a latency histogram per strategy and
+        operation, for tests, debugging endpoints or periodic export.
+    """
+
+    def __init__(self):
+        """
+        Constructor for InMemoryMetrics class, every total starts at zero.
+        """
+        self._aggregates = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: MetricEvent) -> None:
+        key = (event.strategy, event.operation)
+        with self._lock:
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = _Aggregate()
+            aggregate.add(event)
+
+    def snapshot(self) -> typing.Dict[str, typing.Dict[str, typing.Dict[str, typing.Any]]]:
+        """
+        The totals so far.
+
+        Returns:
+            dict: Strategy name to operation to totals: calls, items, errors, nbytes, seconds, max_seconds,
+                p50, p99 and a histogram of bucket upper bound to call count.
+        """
+        with self._lock:
+            snapshot = {}
+            for (strategy, operation), aggregate in self._aggregates.items():
+                snapshot.setdefault(strategy, {})[operation] = aggregate.as_dict()
+        return snapshot
+
+    def reset(self) -> None:
+        """
+        Forget every total.
+        """
+        with self._lock:
+            self._aggregates.clear()
+
+    def __repr__(self):
+        """
+        Formal string representation of InMemoryMetrics object.
+
+        Returns:
+            str: InMemoryMetrics class in formal string format, showing how many calls it has seen.
+        """
+        with self._lock:
+            calls = sum(aggregate.calls for aggregate in self._aggregates.values())
+        return f"InMemoryMetrics(calls={calls})"
+
+
+class LoggingMetricsSink:
+    """
+    Metrics sink writing one log record per call, failed calls at WARNING.
+    """
+
+    def __init__(self, logger: typing.Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        """
+        Constructor for LoggingMetricsSink class.
+
+        Args:
+            logger (Logger, optional): Where to log. Defaults to this module's logger.
+            level (int, optional): Level of successful calls. Defaults to DEBUG.
+        """
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, event: MetricEvent) -> None:
+        if event.error is not None:
+            self.logger.warning('%s %s failed after %.3f ms: %r', event.strategy, event.operation,
+                                event.seconds * 1000, event.error)
+        elif self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, '%s %s %s items, %s bytes in %.3f ms', event.strategy, event.operation,
+                            event.items, event.nbytes, event.seconds * 1000)
+
+
+class SlowCall(typing.NamedTuple):
+    """ A call captured by SlowCallSampler, with the stack that made it"""
+    event: MetricEvent
+    stack: typing.List[str]
+
+
+class SlowCallSampler:
+    """
+    Metrics sink keeping the most recent calls slower than a threshold, with their payload size and the stack of
+        the caller, to find which call sites and payload shapes are expensive.
+    """
+
+    def __init__(self, threshold: float, max_samples: int = 100,
+                 callback: typing.Optional[typing.Callable[[SlowCall], None]] = None, stack_depth: int = 8):
+        """
+        Constructor for SlowCallSampler class.
+
+        Args:
+            threshold (float): Calls taking at least this many seconds are captured.
+            max_samples (int, optional): Captured calls kept, oldest dropped first. Defaults to 100.
+            callback (callable, optional): Also called with every captured SlowCall.
+            stack_depth (int, optional): Caller frames kept per capture, 0 for none. Defaults to 8.
+        """
+        self.threshold = threshold
+        self.callback = callback
+        self.stack_depth = stack_depth
+        self.samples = collections.deque(maxlen=max_samples)
+
+    def __call__(self, event: MetricEvent) -> None:
+        if event.seconds < self.threshold:
+            return
+        # drop the frames of the sink machinery itself
+        stack = traceback.format_stack(limit=self.stack_depth + 3)[:-3] if self.stack_depth else []
+        sample = SlowCall(event, stack)
+        self.samples.append(sample)
+        if self.callback is not None:
+            self.callback(sample)
+
+    def __repr__(self):
+        """
+        Formal string representation of SlowCallSampler object.
+
+        Returns:
+            str: SlowCallSampler class in formal string format, showing the threshold.
+        """
+        return f"SlowCallSampler(threshold={self.threshold})"
+
+
+class _MeasuredCall:
+    """ Context manager timing one call and emitting its MetricEvent on exit"""
+    __slots__ = ('metrics', 'operation', 'strategy', 'nbytes', 'items', 'started')
+
+    def __init__(self, metrics: 'SerializerMetrics', operation: str, strategy: str):
+        self.metrics = metrics
+        self.operation = operation
+        self.strategy = strategy
+        self.nbytes = None
+        self.items = 1
+        self.started = 0.0
+
+    def __enter__(self) -> '_MeasuredCall':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback_) -> bool:
+        self.metrics.emit(MetricEvent(self.operation, self.strategy, self.nbytes, time.perf_counter() - self.started,
+                                      exc_value, self.items))
+        return False
+
+
+class _UnmeasuredCall:
+    """ Stand-in for _MeasuredCall on calls left out by sampling"""
+    __slots__ = ('nbytes', 'items')
+
+    def __enter__(self) -> '_UnmeasuredCall':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback_) -> bool:
+        return False
+
+
+class SerializerMetrics:
+    """
+    Instrumentation for DataSerializer: each measured call becomes a MetricEvent passed to every sink. A sink is
+        any callable taking the event, such as InMemoryMetrics, LoggingMetricsSink, SlowCallSampler or an exporter
+        callback. A DataSerializer without metrics pays a single attribute check per call.
+    """
+
+    def __init__(self, *sinks: typing.Callable[[MetricEvent], None], sample_rate: float = 1.0):
+        """
+        Constructor for SerializerMetrics class.
+
+        Args:
+            sinks (callable): Receivers of every event.
+            sample_rate (float, optional): Fraction of calls measured, the rest run untimed. Defaults to all calls.
+        """
+        assert 0 < sample_rate <= 1, "Sample rate should be in (0, 1]."
+        self.sinks = list(sinks)
+        self.sample_rate = sample_rate
+        # exceptions raised by sinks, which never reach the serializing caller
+        self.sink_errors = 0
+
+    def add_sink(self, sink: typing.Callable[[MetricEvent], None]) -> None:
+        """
+        Add a receiver of every subsequent event.
+
+        Args:
+            sink (callable): Called with each MetricEvent.
+        """
+        self.sinks.append(sink)
+
+    def measure(self, operation: str, strategy: typing.Any) -> typing.Union[_MeasuredCall, _UnmeasuredCall]:
+        """
+        A context manager timing one call. Set nbytes (and items for batches) on it before it exits.
+
+        Args:
+            operation (str): Name of the operation, e.g. 'serialize'.
+            strategy (object): The serializing strategy, reported by class name.
+
+        Returns:
+            context manager: Emits the event on exit, failed calls with their exception.
+        """
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return _UnmeasuredCall()
+        return _MeasuredCall(self, operation, strategy.__class__.__name__)
+
+    def emit(self, event: MetricEvent) -> None:
+        """
+        Pass an event to every sink, counting rather than raising sink failures.
+
+        Args:
+            event (MetricEvent): The event.
+        """
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception:  # pylint: disable=broad-except
+                self.sink_errors += 1
+
+    def __repr__(self):
+        """
+        Formal string representation of SerializerMetrics object.
+
+        Returns:
+            str: SerializerMetrics class in formal string format, showing the sinks and sample rate.
+        """
+        return f"SerializerMetrics(sinks={self.sinks!r}, sample_rate={self.sample_rate})"
+
+
+# pool name -> executor class name in concurrent.futures, looked up when used since the process pool import is slow
+_POOL_EXECUTORS = {
+    'thread': 'ThreadPoolExecutor',
+    'process': 'ProcessPoolExecutor',
+}
+
+
+class DataSerializer:
+    """
+    This class implements a strategy pattern for serialization and deserialization using different formats.
+    Our primary usage will be in passing objects between servers, to cache or to Redis
+    """
+
+    def __init__(self, serializing_strategy: SerializingStrategy,
+                 executor: typing.Optional[concurrent.futures.Executor] = None, offload_threshold: int = 256 * 1024,
+                 metrics: typing.Optional[SerializerMetrics] = None):
+        """
+        Constructor for DataSerializer class.
+
+        Args:
+            serializing_strategy (object): An instance of JsonSerializer, YamlSerializer, PickleSerializer,
+                MsgpackSerializer or CborSerializer.
+            executor (Executor, optional): Where the async methods run large payloads, and the batch methods run
+                with pool='executor', a process pool needs a picklable strategy. Defaults to the event loop's default
+                executor.
+            offload_threshold (int, optional): Payloads estimated at this many bytes or more are run in the executor
+                by the async methods, smaller ones inline on the event loop. Defaults to 256 KiB.
+            metrics (SerializerMetrics, optional): Receives a MetricEvent for every serialize, deserialize, batch,
+                async, dump and load call. Defaults to no instrumentation.
+        """
+        self.serializing_strategy = serializing_strategy
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+        self.metrics = metrics
+        # (pool, max_workers) -> executor started by the batch methods, kept until close
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+
+    def serialize(self, data: typing.Any) -> typing.Union[str, bytes]:
+        """
+        Serializes data using the provided serialization strategy.
+
+        Args:
+            data (str or dict): Data to be serialized.
+
+        Returns:
+            str: Serialized data.
+        """
+        if self.metrics is None:
+            return self.serializing_strategy(data)
+        with self.metrics.measure('serialize', self.serializing_strategy) as call:
+            result = self.serializing_strategy(data)
+            call.nbytes = _payload_size(result)
+        return result
+
+    def deserialize(self, data: typing.Union[str, bytes]) -> typing.Any:
+        """
+        Deserializes data using the provided deserialization strategy.
+        Frames (see FramedSerializer) are recognised by their magic bytes and decoded with the strategy their
+            header names, whatever strategy this DataSerializer was built with.
+
+        Args:
+            data (str): Serialized data.
+
+        Returns:
+            dict: Deserialized data.
+        """
+        if self.metrics is not None:
+            with self.metrics.measure('deserialize', self.serializing_strategy) as call:
+                call.nbytes = _payload_size(data)
+                return self._deserialize(data)
+        return self._deserialize(data)
+
+    def _deserialize(self, data: typing.Union[str, bytes]) -> typing.Any:
+        """
+        Deserializes a frame with the strategy its header names, anything else with the serializing strategy.
+        """
+        if is_frame(data):
+            return unframe(data, self.serializing_strategy)
+        return self.serializing_strategy(data, deserialize=True)
+
+    def deserialize_frames(self, buffer: typing.Union[bytes, bytearray, memoryview]) -> typing.Iterator[typing.Any]:
+        """
+        Lazily deserializes back-to-back frames from one buffer, each with the strategy its header names.
+
+        Args:
+            buffer (bytes-like): Consecutive complete frames, e.g. as read from a socket.
+
+        Returns:
+            iterator: Deserialized data, one item per frame.
+        """
+        for header, payload in iter_frames(buffer):
+            yield _decode_payload(header, payload, self.serializing_strategy)
+
+    def serialize_many(self, items: typing.Iterable[typing.Any], pool: typing.Optional[str] = None,
+                       max_workers: typing.Optional[int] = None,
+                       chunksize: typing.Optional[int] = None) -> typing.List[typing.Union[str, bytes]]:
+        """
+        Serializes a batch of objects, optionally spreading the work over a thread or process pool.
+
+        Args:
+            items (iterable): Objects to be serialized.
+            pool (str, optional): None or 'serial' to run in this thread, 'thread' or 'process' to use a
+                concurrent.futures pool started on first use and reused until close, 'executor' to use the executor
+                given to the constructor. Defaults to None.
+            max_workers (int, optional): Number of pool workers, ignored with 'executor'. Defaults to the executor's
+                own default.
+            chunksize (int, optional): Items handed to a process worker at a time. Defaults to spreading the
+                batch as roughly four chunks per worker.
+
+        Returns:
+            list: Serialized data, in the same order as the input.
+        """
+        if self.metrics is None:
+            return self._map(self.serializing_strategy, items, pool, max_workers, chunksize)
+        with self.metrics.measure('serialize_many', self.serializing_strategy) as call:
+            results = self._map(self.serializing_strategy, items, pool, max_workers, chunksize)
+            call.items = len(results)
+            call.nbytes = sum(map(_payload_size, results))
+        return results
+
+    def deserialize_many(self, items: typing.Iterable[typing.Union[str, bytes]], pool: typing.Optional[str] = None,
+                         max_workers: typing.Optional[int] = None,
+                         chunksize: typing.Optional[int] = None) -> typing.List[typing.Any]:
+        """
+        Deserializes a batch of serialized objects, optionally spreading the work over a thread or process pool.
+
+        Args:
+            items (iterable): Serialized data.
+            pool (str, optional): None or 'serial' to run in this thread, 'thread' or 'process' to use a
+                concurrent.futures pool started on first use and reused until close, 'executor' to use the executor
+                given to the constructor. Defaults to None.
+            max_workers (int, optional): Number of pool workers, ignored with 'executor'. Defaults to the executor's
+                own default.
+            chunksize (int, optional): Items handed to a process worker at a time. Defaults to spreading the
+                batch as roughly four chunks per worker.
+
+        Returns:
+            list: Deserialized data, in the same order as the input.
+        """
+        func = functools.partial(self.serializing_strategy, deserialize=True)
+        if self.metrics is None:
+            return self._map(func, items, pool, max_workers, chunksize)
+        items = list(items)
+        with self.metrics.measure('deserialize_many', self.serializing_strategy) as call:
+            call.items = len(items)
+            call.nbytes = sum(map(_payload_size, items))
+            return self._map(func, items, pool, max_workers, chunksize)
+
+    def serialize_parts(self, data: typing.Any) -> MultipartPayload:
+        """
+        Serializes data to a multi-part payload. With PickleSerializer large buffers such as bytes, bytearray and
+            NumPy arrays are kept out of band and referenced rather than copied; other strategies give one part.
+
+        Args:
+            data (Any): Data to be serialized.
+
+        Returns:
+            MultipartPayload: Parts ready for writev, sendmsg or a shared memory segment.
+        """
+        return MultipartPayload(self.serializing_strategy.to_parts(data))
+
+    def deserialize_parts(self, payload: typing.Union[MultipartPayload,
+                                                      typing.Sequence[typing.Union[bytes, memoryview]]]) -> typing.Any:
+        """
+        Deserializes a multi-part payload produced by serialize_parts.
+
+        Args:
+            payload (MultipartPayload or sequence): The payload or its list of parts.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        parts = payload.parts if isinstance(payload, MultipartPayload) else payload
+        return self.serializing_strategy.from_parts(parts)
+
+    async def _run(self, func: typing.Callable[[typing.Any], typing.Any], data: typing.Any, size: int) -> typing.Any:
+        """
+        Calls func(data) inline when size is under offload_threshold, otherwise in the executor.
+        """
+        if size < self.offload_threshold:
+            return func(data)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, data)
+
+    async def aserialize(self, data: typing.Any) -> typing.Union[str, bytes]:
+        """
+        Serializes data without blocking the event loop: payloads estimated at offload_threshold bytes or more are
+            serialized in the executor, smaller ones inline. See estimate_size.
+
+        Args:
+            data (Any): Data to be serialized.
+
+        Returns:
+            str or bytes: Serialized data.
+        """
+        if self.metrics is None:
+            return await self._run(self.serializing_strategy, data, estimate_size(data, self.offload_threshold))
+        with self.metrics.measure('aserialize', self.serializing_strategy) as call:
+            result = await self._run(self.serializing_strategy, data, estimate_size(data, self.offload_threshold))
+            call.nbytes = _payload_size(result)
+        return result
+
+    async def adeserialize(self, data: typing.Union[str, bytes, bytearray, memoryview]) -> typing.Any:
+        """
+        Deserializes data without blocking the event loop: blobs of offload_threshold bytes or more are
+            deserialized in the executor, smaller ones inline. Frames are recognised as in deserialize.
+
+        Args:
+            data (str or bytes-like): Serialized data.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        if is_frame(data):
+            func = functools.partial(unframe, serializing_strategy=self.serializing_strategy)
+        else:
+            func = functools.partial(self.serializing_strategy, deserialize=True)
+        if self.metrics is None:
+            return await self._run(func, data, len(data))
+        with self.metrics.measure('adeserialize', self.serializing_strategy) as call:
+            call.nbytes = _payload_size(data)
+            return await self._run(func, data, len(data))
+
+    async def adump(self, data: typing.Any, writer: 'asyncio.StreamWriter', schema_version: int = 0,
+                    checksum: bool = True) -> None:
+        """
+        Serializes data as one frame (see FramedSerializer) and writes it to an asyncio stream, waiting for the
+            transport to drain. Large payloads are serialized in the executor.
+
+        Args:
+            data (Any): Data to be serialized.
+            writer (asyncio.StreamWriter): Stream to write the frame to.
+            schema_version (int, optional): Schema version for the frame header. Defaults to 0.
+            checksum (bool, optional): Include a CRC32 of the payload. Defaults to True.
+        """
+        if isinstance(self.serializing_strategy, FramedSerializer):
+            frame = await self.aserialize(data)
+        else:
+            strategy_id, compressed = _strategy_ident(self.serializing_strategy)
+            payload = await self.aserialize(data)
+            frame = pack_frame(payload, strategy_id, schema_version, checksum, compressed)
+        writer.write(frame)
+        await writer.drain()
+
+    async def aload(self, reader: 'asyncio.StreamReader') -> typing.Any:
+        """
+        Reads one frame from an asyncio stream and deserializes it with the strategy its header names.
+            Large payloads are deserialized in the executor.
+
+        Args:
+            reader (asyncio.StreamReader): Stream positioned at the start of a frame.
+
+        Returns:
+            Any: Deserialized data. asyncio.IncompleteReadError is raised if the stream ends first.
+        """
+        header = read_frame_header(await reader.readexactly(FRAME_HEADER_SIZE))
+        payload = await reader.readexactly(header.length)
+        func = functools.partial(_check_and_decode_payload, header, self.serializing_strategy)
+        return await self._run(func, payload, len(payload))
+
+    async def aiter_frames(self, reader: 'asyncio.StreamReader') -> typing.AsyncIterator[typing.Any]:
+        """
+        Reads and deserializes frames from an asyncio stream until it ends cleanly at a frame boundary.
+
+        Args:
+            reader (asyncio.StreamReader): Stream of back-to-back frames.
+
+        Returns:
+            async iterator: Deserialized data, one item per frame.
+        """
+        while True:
+            try:
+                yield await self.aload(reader)
+            except asyncio.IncompleteReadError as error:
+                if error.partial:
+                    raise
+                return
+
+    def dump(self, data: typing.Any, fileobj: typing.IO) -> None:
+        """
+        Serializes data straight to a file or stream without building the whole payload in memory first.
+        Metrics count the bytes the stream position moved by, or none for streams that cannot tell their position.
+
+        Args:
+            data (Any): Data to be serialized.
+            fileobj (file-like): Writable stream; binary for pickle, text or binary for JSON and YAML.
+        """
+        if self.metrics is None:
+            self.serializing_strategy.dump(data, fileobj)
+            return
+        with self.metrics.measure('dump', self.serializing_strategy) as call:
+            start = _stream_offset(fileobj)
+            self.serializing_strategy.dump(data, fileobj)
+            call.nbytes = _offset_change(start, _stream_offset(fileobj))
+
+    def load(self, fileobj: typing.IO) -> typing.Any:
+        """
+        Deserializes data read from a file or stream.
+        Metrics count the bytes the stream position moved by, or none for streams that cannot tell their position.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            Any: Deserialized data.
+        """
+        if self.metrics is None:
+            return self.serializing_strategy.load(fileobj)
+        with self.metrics.measure('load', self.serializing_strategy) as call:
+            start = _stream_offset(fileobj)
+            result = self.serializing_strategy.load(fileobj)
+            call.nbytes = _offset_change(start, _stream_offset(fileobj))
+        return result
+
+    def dump_records(self, records: typing.Iterable[typing.Any], fileobj: typing.IO) -> None:
+        """
+        Serializes records one at a time to a stream: JSON Lines, YAML multi-document or consecutive pickle frames.
+
+        Args:
+            records (iterable): Records to be serialized, consumed lazily.
+            fileobj (file-like): Writable stream.
+        """
+        self.serializing_strategy.dump_records(records, fileobj)
+
+    def load_records(self, fileobj: typing.IO) -> typing.Iterator[typing.Any]:
+        """
+        Lazily deserializes records written by dump_records.
+
+        Args:
+            fileobj (file-like): Readable stream.
+
+        Returns:
+            iterator: Deserialized records, one at a time.
+        """
+        return self.serializing_strategy.load_records(fileobj)
+
+    def close(self):
+        """
+        Shuts down the pools started by serialize_many and deserialize_many, waiting for their workers.
+        The executor given to the constructor belongs to the caller and is left running.
+        """
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for executor in pools.values():
+            executor.shutdown()
+
+    def __enter__(self) -> 'DataSerializer':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback_) -> None:
+        self.close()
+
+    def _executor(self, pool: str, max_workers: typing.Optional[int]) -> concurrent.futures.Executor:
+        """
+        Returns the executor for a batch pool mode, starting the pool on first use.
+        """
+        if pool == 'executor':
+            if self.executor is None:
+                raise ValueError("pool='executor' needs an executor given to the DataSerializer constructor")
+            return self.executor
+        with self._pools_lock:
+            executor = self._pools.get((pool, max_workers))
+            if executor is None:
+                executor = getattr(concurrent.futures, _POOL_EXECUTORS[pool])(max_workers=max_workers)
+                self._pools[pool, max_workers] = executor
+            return executor
+
+    def _map(self, func: typing.Callable, items: typing.Iterable[typing.Any], pool: typing.Optional[str],
+             max_workers: typing.Optional[int], chunksize: typing.Optional[int]) -> typing.List[typing.Any]:
+        """
+        Applies func to every item, serially or through an executor, preserving input order.
+        """
+        if pool in (None, 'serial'):
+            return [func(item) for item in items]
+        if pool != 'executor' and pool not in _POOL_EXECUTORS:
+            raise ValueError(f'Unknown pool type: {pool!r}, expected one of {sorted(_POOL_EXECUTORS) + ["executor"]}')
+        items = list(items)
+        if not items:
+            return []
+        if chunksize is None:
+            chunksize = max(1, len(items) // ((max_workers or os.cpu_count() or 1) * 4))
+        return list(self._executor(pool, max_workers).map(func, items, chunksize=chunksize))
 
     def __str__(self):
         """
@@ -0,0 +1,554 @@
+"""
+Passes objects between processes on the same host through named shared memory segments, built on DataSerializer
+A producer serializes into a segment and consumers deserialize from a memoryview of it, so the payload is not copied
+    through the kernel as it is through a pipe or socket. Segments count the handles attached to them and the last
+    one to be released unlinks the segment. SharedRingBuffer carries a continuous stream of objects from one
+    producer to one consumer through a single segment.
+Segments are POSIX shared memory, the files under /dev/shm that multiprocessing.shared_memory also uses, mapped
+    directly rather than through SharedMemory: before Python 3.13 every SharedMemory registers with the resource
+    tracker, which unlinks segments when a process exits and is shared with child processes, so it fights the
+    reference count. Uses flock on the segment's file, so it is Linux only like the CIDW servers it runs on.
+"""
+import fcntl
+import mmap
+import os
+import secrets
+import struct
+import time
+import typing
+
+from lib.serialization_utils import DataSerializer, MultipartPayload
+
+# where POSIX shared memory segments appear as files on Linux
+SHM_DIR = '/dev/shm'
+
+# what a segment holds, stored in its header
+KIND_OBJECT = 1
+KIND_RING = 2
+
+
+class _FileLock:
+    """ flock of a descriptor as a reusable context manager, cheaper than a generator based one on hot paths"""
+
+    __slots__ = ('fd',)
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def __enter__(self) -> None:
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+class SharedSegment:
+    """
+    A named shared memory segment whose header counts the handles attached to it.
+    create makes a segment with one reference, attach adds one from any process that knows the name and release
+        drops one, the last release unlinking the segment. The header is read and written with pread and pwrite
+        under an flock of the segment's file, so references are counted correctly across processes. Handles that
+        are never released, such as those of a process that crashed, leave the segment behind in SHM_DIR.
+    """
+
+    MAGIC = b'WSHM'
+    VERSION = 1
+    # magic, version, kind, reference count, length of the data written
+    HEADER = struct.Struct('=4sHHqQ')
+    # the header is padded to a cache line, buf starts after it
+    HEADER_SIZE = 64
+    _REFCOUNT = struct.Struct('=q')
+    _REFCOUNT_OFFSET = 8
+    _LENGTH = struct.Struct('=Q')
+    _LENGTH_OFFSET = 16
+
+    def __init__(self, name: str, fd: int, kind: int, populate: bool = False):
+        """
+        Constructor for SharedSegment class, use create or attach.
+
+        Args:
+            name (str): Segment name.
+            fd (int): Open descriptor of the segment's file, owned by the segment from now on.
+            kind (int): KIND_OBJECT or KIND_RING.
+            populate (bool, optional): Fault the whole mapping in at once, for a writer about to fill it. Defaults
+                to False.
+        """
+        self.name = name
+        self.kind = kind
+        self._fd = fd
+        self._lock = _FileLock(fd)
+        flags = mmap.MAP_SHARED | (mmap.MAP_POPULATE if populate else 0)
+        self._mmap = mmap.mmap(fd, os.fstat(fd).st_size, flags=flags)
+        self.buf = memoryview(self._mmap)[self.HEADER_SIZE:]
+        self.closed = False
+
+    @classmethod
+    def create(cls, size: int, name: typing.Optional[str] = None, kind: int = KIND_OBJECT) -> 'SharedSegment':
+        """
+        Create a segment holding one reference, the caller's.
+
+        Args:
+            size (int): Bytes available in buf.
+            name (str, optional): Segment name, must not exist yet. Defaults to a random name.
+            kind (int, optional): KIND_OBJECT or KIND_RING, checked by the readers. Defaults to KIND_OBJECT.
+
+        Returns:
+            SharedSegment: The new segment.
+        """
+        name = name or f'wsm_{secrets.token_hex(8)}'
+        path = os.path.join(SHM_DIR, name)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            os.ftruncate(fd, cls.HEADER_SIZE + max(size, 1))
+            os.pwrite(fd, cls.HEADER.pack(cls.MAGIC, cls.VERSION, kind, 1, 0), 0)
+            return cls(name, fd, kind, populate=True)
+        except BaseException:
+            os.close(fd)
+            os.unlink(path)
+            raise
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedSegment':
+        """
+        Attach to an existing segment, adding a reference.
+
+        Args:
+            name (str): Segment name.
+
+        Returns:
+            SharedSegment: Handle on the segment, release it when done.
+        """
+        fd = os.open(os.path.join(SHM_DIR, name), os.O_RDWR)
+        try:
+            header = os.pread(fd, cls.HEADER.size, 0)
+            if len(header) < cls.HEADER.size or cls.HEADER.unpack(header)[:2] != (cls.MAGIC, cls.VERSION):
+                raise ValueError(f'{name} is not a version {cls.VERSION} shared segment')
+            segment = cls(name, fd, cls.HEADER.unpack(header)[2])
+        except BaseException:
+            os.close(fd)
+            raise
+        try:
+            with segment.locked():
+                refcount = segment._read(cls._REFCOUNT, cls._REFCOUNT_OFFSET)
+                if refcount <= 0:
+                    # the last reference was released, the segment is being unlinked
+                    raise FileNotFoundError(f'Shared segment {name} has been released')
+                segment._write(cls._REFCOUNT, cls._REFCOUNT_OFFSET, refcount + 1)
+        except BaseException:
+            segment.buf.release()
+            segment._mmap.close()
+            os.close(fd)
+            raise
+        return segment
+
+    def _read(self, field: struct.Struct, offset: int) -> int:
+        return field.unpack(os.pread(self._fd, field.size, offset))[0]
+
+    def _write(self, field: struct.Struct, offset: int, value: int) -> None:
+        os.pwrite(self._fd, field.pack(value), offset)
+
+    def locked(self) -> typing.ContextManager[None]:
+        """
+        The segment's lock, shared by every process attached to it, to hold in a with statement. The lock's system
+            calls also order memory writes made before it is released ahead of those made after another process
+            acquires it.
+
+        Returns:
+            context manager: Holds the lock while entered.
+        """
+        return self._lock
+
+    @property
+    def refcount(self) -> int:
+        """
+        Handles attached to the segment, in every process.
+
+        Returns:
+            int: Reference count.
+        """
+        with self.locked():
+            return self._read(self._REFCOUNT, self._REFCOUNT_OFFSET)
+
+    @property
+    def length(self) -> int:
+        """
+        Bytes of buf holding data, as set by the writer.
+
+        Returns:
+            int: Data length.
+        """
+        return self._read(self._LENGTH, self._LENGTH_OFFSET)
+
+    @length.setter
+    def length(self, value: int) -> None:
+        self._write(self._LENGTH, self._LENGTH_OFFSET, value)
+
+    def load(self, serializer: DataSerializer, copy: bool = False) -> typing.Any:
+        """
+        Deserialize the object written by share_object, straight from the segment's memory.
+
+        Args:
+            serializer (DataSerializer): Built with the strategy the object was written with.
+            copy (bool, optional): Copy the buffers passed out of band into memory of their own. Defaults to False.
+
+        Returns:
+            Any: Deserialized data. Without copy, objects that pickle protocol 5 passes out of band by reference,
+                such as NumPy arrays, keep using the segment's memory, and release fails with BufferError until
+                they are gone.
+        """
+        return _load_parts(self.buf[:self.length], serializer, copy)
+
+    def release(self) -> None:
+        """
+        Drop this handle's reference, unlinking the segment when it was the last one. Does nothing once released.
+        Raises BufferError, keeping the reference, while objects still use the segment's memory.
+        """
+        if self.closed:
+            return
+        # buf is itself an export of the mapping, so it goes first, and comes back if views taken from it remain
+        self.buf.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            self.buf = memoryview(self._mmap)[self.HEADER_SIZE:]
+            raise
+        with self.locked():
+            refcount = self._read(self._REFCOUNT, self._REFCOUNT_OFFSET) - 1
+            self._write(self._REFCOUNT, self._REFCOUNT_OFFSET, refcount)
+            if refcount <= 0:
+                os.unlink(os.path.join(SHM_DIR, self.name))
+        os.close(self._fd)
+        self.closed = True
+
+    def __enter__(self) -> 'SharedSegment':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+    def __repr__(self):
+        """
+        Formal string representation of SharedSegment object.
+
+        Returns:
+            str: SharedSegment class in formal string format, showing the name and size.
+        """
+        if self.closed:
+            return f"SharedSegment(name={self.name!r}, closed=True)"
+        return f"SharedSegment(name={self.name!r}, size={self.buf.nbytes})"
+
+
+def _load_parts(buffer: memoryview, serializer: DataSerializer, copy: bool) -> typing.Any:
+    """ Deserialize a MultipartPayload from shared memory, copying the out-of-band parts out of it if asked to"""
+    payload = MultipartPayload.from_buffer(buffer)
+    if copy:
+        payload.parts[1:] = map(bytearray, payload.parts[1:])
+    try:
+        return serializer.deserialize_parts(payload)
+    finally:
+        buffer.release()
+
+
+def share_object(data: typing.Any, serializer: DataSerializer, name: typing.Optional[str] = None) -> SharedSegment:
+    """
+    Serialize data into a new shared memory segment, for other processes to attach to by name and load.
+    Uses DataSerializer.serialize_parts, so with PickleSerializer large buffers are copied once, from the object
+        into the segment, and consumers load them without a copy.
+
+    Args:
+        data (Any): Data to be shared.
+        serializer (DataSerializer): Serializer to write it with.
+        name (str, optional): Segment name. Defaults to a random name.
+
+    Returns:
+        SharedSegment: The segment, holding the producer's reference. Release it once consumers have attached, or
+            keep it to keep the segment alive.
+    """
+    payload = serializer.serialize_parts(data)
+    size = len(payload.header()) + payload.nbytes
+    segment = SharedSegment.create(size, name)
+    try:
+        payload.write_into(segment.buf)
+        segment.length = size
+    except BaseException:
+        segment.release()
+        raise
+    return segment
+
+
+def load_object(name: str, serializer: DataSerializer) -> typing.Any:
+    """
+    Attach to a segment written by share_object, load its object and release the reference again.
+
+    Args:
+        name (str): Segment name.
+        serializer (DataSerializer): Built with the strategy the object was written with.
+
+    Returns:
+        Any: Deserialized data, not using the segment's memory. To load buffers passed out of band without
+            copying them, use SharedSegment.attach and load instead.
+    """
+    with SharedSegment.attach(name) as segment:
+        return segment.load(serializer, copy=True)
+
+
+class SharedRingBuffer:
+    """
+    A stream of serialized objects from one producer process to one consumer process through a shared segment.
+    Each record is a length, flags and the payload, aligned to 8 bytes, and a record that does not fit before the
+        end of the ring is written at its start after a wrap marker. head and tail count the bytes ever written and
+        read, only the producer moves head and only the consumer moves tail, and both are published under the
+        segment's lock. Each side remembers the other's counter and only takes the lock to read it again once the
+        ring looks full or empty. put waits while the ring is full and get while it is empty, polling.
+    Records are DataSerializer.serialize payloads, or MultipartPayloads in an out_of_band ring: the out-of-band
+        pickler costs more per object but large buffers are copied into the ring without being pickled in band.
+    """
+
+    # ring header at the start of the segment's buf: head, tail, capacity, finished and out_of_band, each a uint64
+    HEADER_SIZE = 64
+    _HEAD, _TAIL, _CAPACITY, _FINISHED, _OUT_OF_BAND = range(5)
+    # per record: payload length, or WRAP for the marker sending the reader back to the start of the ring, and flags
+    RECORD = struct.Struct('=II')
+    WRAP = 0xFFFFFFFF
+    FLAG_TEXT = 0x01
+    FLAG_PARTS = 0x02
+
+    def __init__(self, segment: SharedSegment, serializer: DataSerializer, poll_interval: float = 0.0005):
+        """
+        Constructor for SharedRingBuffer class, use create or attach.
+
+        Args:
+            segment (SharedSegment): A segment of KIND_RING, whose reference the ring takes over.
+            serializer (DataSerializer): Serializes put objects and deserializes got ones.
+            poll_interval (float, optional): Longest sleep between checks while full or empty. Defaults to 0.5 ms.
+        """
+        if segment.kind != KIND_RING:
+            raise ValueError(f'{segment} does not hold a ring buffer')
+        self.segment = segment
+        self.serializer = serializer
+        self.poll_interval = poll_interval
+        self._counters = segment.buf[:self.HEADER_SIZE].cast('Q')
+        self.capacity = self._counters[self._CAPACITY]
+        self.out_of_band = bool(self._counters[self._OUT_OF_BAND])
+        self._data = segment.buf[self.HEADER_SIZE:self.HEADER_SIZE + self.capacity]
+        with segment.locked():
+            # the consumer's last known head and the producer's last known tail
+            self._seen_head, self._seen_tail = self._counters[self._HEAD], self._counters[self._TAIL]
+
+    @classmethod
+    def create(cls, capacity: int, serializer: DataSerializer, name: typing.Optional[str] = None,
+               out_of_band: bool = False, poll_interval: float = 0.0005) -> 'SharedRingBuffer':
+        """
+        Create a ring buffer in a new segment.
+
+        Args:
+            capacity (int): Bytes of records the ring holds, rounded down to a multiple of 8 and under 4 GiB, as
+                record lengths are 32 bits. A record takes its payload plus 8 bytes.
+            serializer (DataSerializer): Serializes put objects and deserializes got ones.
+            name (str, optional): Segment name. Defaults to a random name.
+            out_of_band (bool, optional): Send records as DataSerializer.serialize_parts payloads, for streams of
+                large buffers. Defaults to False.
+            poll_interval (float, optional): Longest sleep between checks while full or empty. Defaults to 0.5 ms.
+
+        Returns:
+            SharedRingBuffer: The ring buffer.
+        """
+        capacity -= capacity % 8
+        if capacity < 2 * cls.RECORD.size:
+            raise ValueError(f'Ring buffer capacity {capacity} is too small')
+        if capacity >= cls.WRAP:
+            raise ValueError(f'Ring buffer capacity {capacity} is too large, records hold 32 bit lengths')
+        segment = SharedSegment.create(cls.HEADER_SIZE + capacity, name, kind=KIND_RING)
+        counters = segment.buf[:cls.HEADER_SIZE].cast('Q')
+        counters[cls._CAPACITY] = capacity
+        counters[cls._OUT_OF_BAND] = out_of_band
+        counters.release()
+        return cls(segment, serializer, poll_interval)
+
+    @classmethod
+    def attach(cls, name: str, serializer: DataSerializer, poll_interval: float = 0.0005) -> 'SharedRingBuffer':
+        """
+        Attach to a ring buffer created by another process.
+
+        Args:
+            name (str): Segment name.
+            serializer (DataSerializer): Built with the strategy the producer uses.
+            poll_interval (float, optional): Longest sleep between checks while full or empty. Defaults to 0.5 ms.
+
+        Returns:
+            SharedRingBuffer: The ring buffer.
+        """
+        segment = SharedSegment.attach(name)
+        try:
+            return cls(segment, serializer, poll_interval)
+        except BaseException:
+            segment.release()
+            raise
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the segment, for the other side to attach to.
+
+        Returns:
+            str: Segment name.
+        """
+        return self.segment.name
+
+    def _wait(self, spins: int, deadline: typing.Optional[float], waiting_for: str) -> int:
+        """ Back off while full or empty: yield first, then sleep up to poll_interval, until the deadline"""
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f'Timed out waiting for {waiting_for} in {self}')
+        if spins < 100:
+            os.sched_yield()
+        else:
+            time.sleep(self.poll_interval)
+        return spins + 1
+
+    def put(self, data: typing.Any, timeout: typing.Optional[float] = None) -> int:
+        """
+        Serialize data into the ring, waiting while it is full.
+
+        Args:
+            data (Any): Data to be sent.
+            timeout (float, optional): Seconds to wait for room before raising TimeoutError. Defaults to waiting
+                forever.
+
+        Returns:
+            int: Ring bytes the record took.
+        """
+        if self.out_of_band:
+            payload = self.serializer.serialize_parts(data)
+            length, flags = len(payload.header()) + payload.nbytes, self.FLAG_PARTS
+        else:
+            payload, flags = self.serializer.serialize(data), 0
+            if isinstance(payload, str):
+                payload, flags = payload.encode('utf-8'), self.FLAG_TEXT
+            length = len(payload)
+        size = (self.RECORD.size + length + 7) & ~7
+        if size > self.capacity:
+            raise ValueError(f'Payload of {length} bytes does not fit {self}')
+        head = self._counters[self._HEAD]
+        position = head % self.capacity
+        skip = self.capacity - position if size > self.capacity - position else 0
+        if head + skip + size - self._seen_tail > self.capacity:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            spins = 0
+            while True:
+                with self.segment.locked():
+                    self._seen_tail = self._counters[self._TAIL]
+                if head + skip + size - self._seen_tail <= self.capacity:
+                    break
+                spins = self._wait(spins, deadline, 'room')
+        # only this producer moves head, so the room found stays free while the record is written
+        if skip:
+            self.RECORD.pack_into(self._data, position, self.WRAP, 0)
+            position = 0
+        self.RECORD.pack_into(self._data, position, length, flags)
+        start = position + self.RECORD.size
+        if flags & self.FLAG_PARTS:
+            payload.write_into(self._data, start)
+        else:
+            self._data[start:start + length] = payload
+        with self.segment.locked():
+            self._counters[self._HEAD] = head + skip + size
+        return skip + size
+
+    def get(self, timeout: typing.Optional[float] = None) -> typing.Any:
+        """
+        Deserialize the next object from the ring, waiting while it is empty.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a record before raising TimeoutError. Defaults to waiting
+                forever.
+
+        Returns:
+            Any: Deserialized data. EOFError is raised once the producer has called finish and the ring is drained.
+        """
+        tail = self._counters[self._TAIL]
+        if tail == self._seen_head:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            spins = 0
+            while True:
+                with self.segment.locked():
+                    self._seen_head, finished = self._counters[self._HEAD], self._counters[self._FINISHED]
+                if tail != self._seen_head:
+                    break
+                if finished:
+                    raise EOFError(f'{self} is finished')
+                spins = self._wait(spins, deadline, 'a record')
+        position = tail % self.capacity
+        length, flags = self.RECORD.unpack_from(self._data, position)
+        if length == self.WRAP:
+            tail += self.capacity - position
+            position = 0
+            length, flags = self.RECORD.unpack_from(self._data, position)
+        start = position + self.RECORD.size
+        payload = self._data[start:start + length]
+        if flags & self.FLAG_PARTS:
+            # the record's memory is reused once tail moves past it, so out-of-band buffers must not keep using it
+            data = _load_parts(payload, self.serializer, copy=True)
+        else:
+            try:
+                data = self.serializer.deserialize(str(payload, 'utf-8') if flags & self.FLAG_TEXT else payload)
+            finally:
+                payload.release()
+        with self.segment.locked():
+            self._counters[self._TAIL] = tail + ((self.RECORD.size + length + 7) & ~7)
+        return data
+
+    def finish(self) -> None:
+        """
+        Mark the stream as complete: the consumer's get raises EOFError, and iteration stops, once it is drained.
+        """
+        with self.segment.locked():
+            self._counters[self._FINISHED] = 1
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        """
+        Get objects until the producer has finished and the ring is drained.
+
+        Returns:
+            iterator: Deserialized data.
+        """
+        while True:
+            try:
+                yield self.get()
+            except EOFError:
+                return
+
+    @property
+    def pending(self) -> int:
+        """
+        Ring bytes written and not read yet.
+
+        Returns:
+            int: Bytes in use.
+        """
+        with self.segment.locked():
+            return self._counters[self._HEAD] - self._counters[self._TAIL]
+
+    def close(self) -> None:
+        """
+        Release the ring's reference to the segment. Does nothing once closed.
+        """
+        if self.segment.closed:
+            return
+        self._counters.release()
+        self._data.release()
+        self.segment.release()
+
+    def __enter__(self) -> 'SharedRingBuffer':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __repr__(self):
+        """
+        Formal string representation of SharedRingBuffer object.
+
+        Returns:
+            str: SharedRingBuffer class in formal string format, showing the segment name and capacity.
+        """
+        return f"SharedRingBuffer(name={self.name!r}, capacity={self.capacity}, out_of_band={self.out_of_band})"
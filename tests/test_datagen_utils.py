@@ -0,0 +1,139 @@
+""" Unit tests for the datagen_utils module. """
+import csv
+import datetime
+import io
+import json
+import pickle
+
+import pytest
+
+from lib.datagen_utils import ChoiceField, DataGenerator, DateField, FloatField, IntField, RecordSchema, StringField
+from lib.serialization_utils import DataSerializer, JsonSerializer, PickleSerializer
+
+
+def make_schema():
+    """ A schema using every field type"""
+    return RecordSchema({
+        'name': StringField(10, include_digits=False),
+        'age': IntField(18, 90),
+        'score': FloatField(0.0, 1.0, digits=3),
+        'joined': DateField(datetime.date(2020, 1, 1), datetime.date(2020, 12, 31), iso_format=True),
+        'plan': ChoiceField(['free', 'pro', 'team'], weights=[8, 1, 1]),
+    })
+
+
+class TestDataGenerator:
+    """
+    Test cases for schema driven record generation.
+    """
+
+    def test_records(self):
+        """
+        Test that generated records follow the schema.
+        """
+        records = list(DataGenerator(make_schema(), seed=1, batch_size=7).records(50))
+        assert len(records) == 50
+        for record in records:
+            assert list(record) == ['name', 'age', 'score', 'joined', 'plan']
+            assert len(record['name']) == 10 and record['name'].isalpha()
+            assert 18 <= record['age'] <= 90
+            assert 0.0 <= record['score'] <= 1.0
+            assert '2020-01-01' <= record['joined'] <= '2020-12-31'
+            assert record['plan'] in ('free', 'pro', 'team')
+
+    def test_batches(self):
+        """
+        Test that batches never exceed the batch size and restart at shard boundaries.
+        """
+        batches = list(DataGenerator(make_schema(), seed=1, batch_size=4, shard_size=10).iter_batches(25))
+        assert [len(batch) for batch in batches] == [4, 4, 2, 4, 4, 2, 4, 1]
+
+    def test_reproducible(self):
+        """
+        Test that the same seed gives the same records and a different seed different ones.
+        """
+        first = list(DataGenerator(make_schema(), seed=42).records(20))
+        assert list(DataGenerator(make_schema(), seed=42).records(20)) == first
+        assert list(DataGenerator(make_schema(), seed=43).records(20)) != first
+
+    def test_date_objects(self):
+        """
+        Test that dates are date objects unless ISO strings are asked for.
+        """
+        schema = RecordSchema({'day': DateField(datetime.date(2021, 3, 1), datetime.date(2021, 3, 1))})
+        assert list(DataGenerator(schema).records(2)) == [{'day': datetime.date(2021, 3, 1)}] * 2
+
+    def test_write_jsonl(self):
+        """
+        Test writing JSON Lines that read back through DataSerializer.
+        """
+        generator = DataGenerator(make_schema(), seed=5, shard_size=16)
+        stream = io.BytesIO()
+        assert generator.write(stream, 40, 'jsonl', max_workers=1) == len(stream.getvalue())
+        stream.seek(0)
+        records = list(DataSerializer(JsonSerializer()).load_records(stream))
+        assert records == list(generator.records(40))
+
+    def test_jsonl_bytes(self):
+        """
+        Test that JSON Lines output is the stdlib encoding, escaping non-ASCII, with date objects as ISO strings.
+        """
+        schema = RecordSchema({
+            'name': ChoiceField(['Zoë']),
+            'score': FloatField(0.0, 1.0, digits=3),
+            'day': DateField(datetime.date(2021, 3, 1), datetime.date(2021, 3, 1)),
+        })
+        generator = DataGenerator(schema, seed=5)
+        stream = io.BytesIO()
+        generator.write(stream, 3, 'jsonl', max_workers=1)
+        expected = ''.join(json.dumps({**record, 'day': '2021-03-01'}) + '\n' for record in generator.records(3))
+        assert stream.getvalue() == expected.encode('ascii')
+        assert stream.getvalue().startswith(b'{"name": "Zo\\u00eb", "score": 0.')
+
+    def test_write_pickle(self, tmp_path):
+        """
+        Test writing pickle frames to a path.
+        """
+        generator = DataGenerator(make_schema(), seed=5, shard_size=16)
+        path = tmp_path / 'records.pickle'
+        generator.write(path, 40, 'pickle', max_workers=1)
+        with open(path, 'rb') as stream:
+            assert list(DataSerializer(PickleSerializer()).load_records(stream)) == list(generator.records(40))
+
+    def test_write_csv(self):
+        """
+        Test writing CSV with a single header row.
+        """
+        generator = DataGenerator(make_schema(), seed=5, shard_size=16)
+        stream = io.BytesIO()
+        generator.write(stream, 40, 'csv', max_workers=1)
+        rows = list(csv.reader(io.StringIO(stream.getvalue().decode('utf-8'))))
+        assert rows[0] == ['name', 'age', 'score', 'joined', 'plan']
+        assert len(rows) == 41
+        assert rows[1][0] == next(generator.records(1))['name']
+
+    def test_write_parallel_matches_serial(self):
+        """
+        Test that a process pool writes exactly what a single process writes.
+        """
+        generator = DataGenerator(make_schema(), seed=9, batch_size=10, shard_size=25)
+        serial, parallel = io.BytesIO(), io.BytesIO()
+        generator.write(serial, 130, 'csv', max_workers=1)
+        generator.write(parallel, 130, 'csv', max_workers=2)
+        assert parallel.getvalue() == serial.getvalue()
+
+    def test_write_unknown_format(self):
+        """
+        Test that an unknown format is rejected.
+        """
+        with pytest.raises(ValueError):
+            DataGenerator(make_schema()).write(io.BytesIO(), 1, 'xml')
+
+    def test_pickle_generator(self):
+        """
+        Test that generators pickle, as process pool workers need.
+        """
+        generator = DataGenerator(make_schema(), seed=3)
+        copy = pickle.loads(pickle.dumps(generator))
+        assert list(copy.records(5)) == list(generator.records(5))
+        assert repr(copy) == repr(generator)
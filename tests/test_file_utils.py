@@ -1,10 +1,17 @@
+import asyncio
+import itertools
 import os
+import stat
+import struct
 import sys
 import tempfile
+import time
 
 import pytest
 
-from lib.file_utils import check_permissions  # Assuming the function is in permissions.py
+from lib import file_utils
+from lib.file_utils import AccessContext, PermissionCache, PermissionTable, Permissions, check_permissions, \
+    effective_access, get_permissions, scan_permissions, _inotify_libc  # Assuming the function is in permissions.py
 
 pytestmark = pytest.mark.skipif(sys.platform != 'linux', reason="runs only on linux")
 
@@ -51,3 +58,395 @@ def test_check_permissions_non_existent_path():
     # Assert a FileNotFoundError is raised when trying to get the permissions of a non-existent path
     with pytest.raises(FileNotFoundError):
         check_permissions(non_existent_path)
+
+
+def make_tree(root):
+    # Build root/a/b with a few files of different modes
+    os.makedirs(os.path.join(root, 'a', 'b'))
+    files = {
+        os.path.join(root, 'top.txt'): 0o644,
+        os.path.join(root, 'a', 'open.txt'): 0o666,
+        os.path.join(root, 'a', 'b', 'secret.txt'): 0o200,
+    }
+    for path, mode in files.items():
+        with open(path, 'w') as handle:
+            handle.write('x')
+        os.chmod(path, mode)
+    return files
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_scan_permissions(max_workers):
+    with tempfile.TemporaryDirectory() as temp:
+        files = make_tree(temp)
+        entries = {entry.path: entry for entry in scan_permissions(temp, max_workers=max_workers)}
+
+        # Every file and directory is reported once, root included
+        expected = set(files) | {temp, os.path.join(temp, 'a'), os.path.join(temp, 'a', 'b')}
+        assert set(entries) == expected
+        assert entries[temp].is_dir
+        for path, mode in files.items():
+            assert stat.S_IMODE(entries[path].mode) == mode
+            assert not entries[path].is_dir
+        assert entries[os.path.join(temp, 'top.txt')].permissions() == \
+            check_permissions(os.path.join(temp, 'top.txt'))
+
+
+def test_scan_permissions_close_early(monkeypatch):
+    with tempfile.TemporaryDirectory() as temp:
+        for index in range(100):
+            os.makedirs(os.path.join(temp, f'd{index}', 'sub'))
+        listed = []
+        original = file_utils._scan_directory
+
+        def scan_directory(path, follow_symlinks, onerror):
+            listed.append(path)
+            return original(path, follow_symlinks, onerror)
+
+        monkeypatch.setattr(file_utils, '_scan_directory', scan_directory)
+        scan = scan_permissions(temp, max_workers=2)
+        assert len(list(itertools.islice(scan, 20))) == 20
+        scan.close()
+
+        # Only the directories handed to the pool were listed, not the whole queued tree
+        assert len(listed) <= 1 + 2 * 2 * file_utils.SCAN_QUEUE_PER_WORKER
+        assert len(list(scan_permissions(temp, max_workers=2))) == 201
+
+
+def test_scan_permissions_filters():
+    with tempfile.TemporaryDirectory() as temp:
+        make_tree(temp)
+        world_writable = [entry.path for entry in scan_permissions(temp, 'world_writable')]
+        assert world_writable == [os.path.join(temp, 'a', 'open.txt')]
+        unreadable = [entry.path for entry in scan_permissions(temp, 'not_user_readable')]
+        assert unreadable == [os.path.join(temp, 'a', 'b', 'secret.txt')]
+        files = [entry.path for entry in scan_permissions(temp, lambda entry: not entry.is_dir)]
+        assert len(files) == 3
+
+        with pytest.raises(ValueError):
+            list(scan_permissions(temp, 'no_such_filter'))
+
+
+def test_scan_permissions_symlink_cycle():
+    with tempfile.TemporaryDirectory() as temp:
+        make_tree(temp)
+        os.symlink(temp, os.path.join(temp, 'a', 'loop'))
+
+        # Not followed: the link is reported as itself
+        entries = {entry.path: entry for entry in scan_permissions(temp)}
+        assert stat.S_ISLNK(entries[os.path.join(temp, 'a', 'loop')].mode)
+
+        # Followed: the cycle is descended into only once
+        followed = [entry.path for entry in scan_permissions(temp, follow_symlinks=True)]
+        assert len(followed) == len(entries)
+
+
+def test_scan_permissions_non_existent_path():
+    with pytest.raises(FileNotFoundError):
+        list(scan_permissions(os.path.join(tempfile.gettempdir(), 'non_existent_path')))
+
+
+def test_check_permissions_not_a_directory():
+    # A path through a regular file is reported as missing, as before
+    with tempfile.NamedTemporaryFile() as temp:
+        with pytest.raises(FileNotFoundError):
+            check_permissions(os.path.join(temp.name, 'child'))
+
+
+def test_get_permissions():
+    with tempfile.NamedTemporaryFile() as temp:
+        os.chmod(temp.name, 0o640)
+        perm = get_permissions(temp.name)
+
+        # Same answers as the nested dictionary, from one int
+        assert perm.to_dict() == check_permissions(temp.name)
+        assert perm.user.read and perm.user.write and not perm.user.execute
+        assert perm.group.read and not perm.group.write
+        assert not perm.others.read
+        assert perm & stat.S_IRGRP
+        assert str(perm) == 'rw-r-----'
+        assert repr(perm) == 'Permissions(0o640)'
+
+        # The bits objects are shared, not allocated per access
+        assert perm.user is Permissions(0o600).user
+
+    with pytest.raises(FileNotFoundError):
+        get_permissions(os.path.join(tempfile.gettempdir(), 'non_existent_path'))
+
+
+def test_permission_table():
+    with tempfile.TemporaryDirectory() as temp:
+        files = make_tree(temp)
+        os.chmod(os.path.join(temp, 'top.txt'), 0o664)
+        table = PermissionTable.from_scan(temp, max_workers=1)
+        assert len(table) == 6
+
+        assert table.filter('group_writable') == [path for path in table.paths
+                                                  if path.endswith(('top.txt', 'open.txt'))]
+        assert table.filter('world_writable') == [os.path.join(temp, 'a', 'open.txt')]
+        assert table.where(stat.S_IRUSR, present=False) == [os.path.join(temp, 'a', 'b', 'secret.txt')]
+        assert len(table.owned_by(os.getuid())) == 6
+        with pytest.raises(ValueError):
+            table.filter('no_such_filter')
+
+        # Backward compatible export
+        exported = table.to_dict()
+        for path in files:
+            assert exported[path] == check_permissions(path)
+        assert [entry.path for entry in table] == table.paths
+        assert table[0].perm == table.modes[0]
+        assert table.nbytes == 6 * 12
+
+
+def wait_for(condition, timeout=5.0):
+    # Poll a condition set by a background thread
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_permission_cache_hits():
+    with tempfile.NamedTemporaryFile() as temp:
+        os.chmod(temp.name, 0o600)
+        with PermissionCache(watch=None) as cache:
+            assert cache.check(temp.name) == check_permissions(temp.name)
+            for _ in range(5):
+                assert cache.get(temp.name) == get_permissions(temp.name)
+            assert cache.stats.as_dict() == {'hits': 5, 'misses': 1, 'expirations': 0, 'invalidations': 0}
+
+            # Without invalidation a change is not seen until the entry is dropped
+            os.chmod(temp.name, 0o640)
+            assert not cache.get(temp.name).group.read
+            cache.invalidate(temp.name)
+            assert stat.S_IMODE(cache.get(temp.name)) == 0o640
+
+        with pytest.raises(FileNotFoundError):
+            PermissionCache(watch=None).get(os.path.join(tempfile.gettempdir(), 'non_existent_path'))
+
+
+def test_permission_cache_ttl():
+    with tempfile.NamedTemporaryFile() as temp:
+        with PermissionCache(ttl=0.05, watch=None) as cache:
+            cache.get(temp.name)
+            time.sleep(0.06)
+            cache.get(temp.name)
+            assert cache.stats.expirations == 1
+            assert cache.stats.misses == 2
+
+
+def test_permission_cache_validate():
+    with tempfile.NamedTemporaryFile() as temp:
+        os.chmod(temp.name, 0o600)
+        with PermissionCache(validate=True, watch=None) as cache:
+            assert not cache.get(temp.name).group.read
+            os.chmod(temp.name, 0o640)
+            assert cache.get(temp.name).group.read
+            assert cache.stats.invalidations == 1
+
+
+@pytest.mark.parametrize('watch', ['inotify', 'poll'])
+def test_permission_cache_watch(watch):
+    if watch == 'inotify' and _inotify_libc() is None:
+        pytest.skip("inotify is not available")
+    with tempfile.NamedTemporaryFile() as temp:
+        os.chmod(temp.name, 0o600)
+        with PermissionCache(watch=watch, poll_interval=0.01) as cache:
+            assert cache.watch == watch
+            assert not cache.get(temp.name).group.read
+            os.chmod(temp.name, 0o640)
+            assert wait_for(lambda: len(cache) == 0)
+            assert cache.get(temp.name).group.read
+            assert cache.stats.invalidations == 1
+
+
+def test_permission_cache_failed_watch(monkeypatch):
+    if _inotify_libc() is None:
+        pytest.skip("inotify is not available")
+    with tempfile.NamedTemporaryFile() as temp:
+        os.chmod(temp.name, 0o600)
+        with PermissionCache(watch='inotify') as cache:
+            # A path inotify refused is validated on every hit instead
+            monkeypatch.setattr(cache._watcher, 'watch', lambda path: False)
+            assert not cache.get(temp.name).group.read
+            os.chmod(temp.name, 0o640)
+            assert cache.get(temp.name).group.read
+            assert cache.stats.invalidations == 1
+
+
+def test_permission_cache_invalidated_during_miss(monkeypatch):
+    with tempfile.NamedTemporaryFile() as temp:
+        os.chmod(temp.name, 0o600)
+        with PermissionCache(watch=None) as cache:
+            stat_path = cache._stat
+
+            # A change reported while the miss is in flight must not leave the result it raced with cached
+            def racing_stat(path):
+                result = stat_path(path)
+                os.chmod(temp.name, 0o640)
+                cache.invalidate(path)
+                return result
+
+            monkeypatch.setattr(cache, '_stat', racing_stat)
+            assert not cache.get(temp.name).group.read
+            assert len(cache) == 0
+            monkeypatch.setattr(cache, '_stat', stat_path)
+            assert cache.get(temp.name).group.read
+            assert len(cache) == 1
+
+
+def bits(access):
+    # PermissionBits as an 'rwx' string
+    return ''.join(flag if granted else '-' for flag, granted in zip('rwx', (access.read, access.write,
+                                                                             access.execute)))
+
+
+def test_effective_access_current_process():
+    with tempfile.NamedTemporaryFile() as temp:
+        os.chmod(temp.name, 0o600)
+        access = effective_access(temp.name)
+        assert access.read == os.access(temp.name, os.R_OK)
+        assert access.write == os.access(temp.name, os.W_OK)
+        assert access.execute == os.access(temp.name, os.X_OK)
+
+    with pytest.raises(FileNotFoundError):
+        effective_access(os.path.join(tempfile.gettempdir(), 'non_existent_path'))
+
+
+def test_access_context_mode_bits():
+    owner, group = 1000, 2000
+    mode = stat.S_IFREG | 0o754
+    assert AccessContext(uid=owner).mode_bits(mode, owner, group) == 0o7
+    assert AccessContext(uid=1, gids=[group]).mode_bits(mode, owner, group) == 0o5
+    assert AccessContext(uid=1, gids=[3]).mode_bits(mode, owner, group) == 0o4
+    # root reads and writes anything, but only executes what has an execute bit
+    assert AccessContext(uid=0).mode_bits(stat.S_IFREG | 0o600, owner, group) == 0o6
+    assert AccessContext(uid=0).mode_bits(stat.S_IFDIR | 0o000, owner, group) == 0o7
+
+
+def test_access_context_acl_bits():
+    owner, group = 1000, 2000
+    mode = stat.S_IFREG | 0o640
+    acl = [(0x01, 6, 0), (0x02, 6, 1234), (0x04, 0, 0), (0x08, 7, 3000), (0x10, 4, 0), (0x20, 0, 0)]
+    # The mask limits named users and groups
+    assert AccessContext(uid=1234).mode_bits(mode, owner, group, acl) == 0o4
+    assert AccessContext(uid=1, gids=[3000]).mode_bits(mode, owner, group, acl) == 0o4
+    assert AccessContext(uid=1, gids=[group]).mode_bits(mode, owner, group, acl) == 0o0
+    assert AccessContext(uid=1, gids=[4000]).mode_bits(mode, owner, group, acl) == 0o0
+    assert AccessContext(uid=owner).mode_bits(mode, owner, group, acl) == 0o6
+
+
+def test_access_many():
+    with tempfile.TemporaryDirectory() as temp:
+        files = make_tree(temp)
+        os.chmod(temp, 0o755)
+        missing = os.path.join(temp, 'missing')
+        context = AccessContext(uid=12345)
+        results = context.access_many(list(files) + [missing])
+        assert results[missing] is None
+        assert bits(results[os.path.join(temp, 'top.txt')]) == 'r--'
+        assert bits(results[os.path.join(temp, 'a', 'open.txt')]) == 'rw-'
+        assert bits(results[os.path.join(temp, 'a', 'b', 'secret.txt')]) == '---'
+
+        # Entries from a scan are evaluated without another stat
+        from_scan = context.access_many(scan_permissions(temp))
+        assert {path: bits(access) for path, access in from_scan.items() if path in files} == \
+            {path: bits(access) for path, access in results.items() if path in files}
+
+        # A closed parent directory closes everything below it
+        os.chmod(os.path.join(temp, 'a'), 0o700)
+        closed = context.access_many(files, check_parents=True)
+        assert bits(closed[os.path.join(temp, 'a', 'open.txt')]) == '---'
+        assert bits(closed[os.path.join(temp, 'top.txt')]) == 'r--'
+
+
+def test_access_acls():
+    acl = struct.pack('<I', 2) + b''.join(struct.pack('<HHI', *entry) for entry in [
+        (0x01, 6, 0xffffffff), (0x02, 6, 12345), (0x04, 0, 0xffffffff), (0x10, 6, 0xffffffff),
+        (0x20, 0, 0xffffffff)])
+    with tempfile.NamedTemporaryFile() as temp:
+        try:
+            os.setxattr(temp.name, 'system.posix_acl_access', acl)
+        except OSError:
+            pytest.skip("POSIX ACLs are not supported here")
+        context = AccessContext(uid=12345)
+        assert bits(context.access(temp.name)) == '---'
+        assert bits(context.access(temp.name, acls=True)) == 'rw-'
+        assert bits(AccessContext(uid=54321).access(temp.name, acls=True)) == '---'
+
+
+def test_acheck_permissions():
+    with tempfile.NamedTemporaryFile() as temp:
+        assert asyncio.run(file_utils.acheck_permissions(temp.name)) == check_permissions(temp.name)
+        assert asyncio.run(file_utils.aget_permissions(temp.name, timeout=5)) == get_permissions(temp.name)
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(file_utils.acheck_permissions(os.path.join(tempfile.gettempdir(), 'non_existent_path')))
+
+
+def test_aiter_permissions(monkeypatch):
+    with tempfile.TemporaryDirectory() as temp:
+        files = list(make_tree(temp))
+        slow = files[0]
+        missing = os.path.join(temp, 'missing')
+        original = file_utils.check_permissions
+
+        # One path hangs like a dead network mount
+        def check(path):
+            if path == slow:
+                time.sleep(0.5)
+            return original(path)
+
+        monkeypatch.setattr(file_utils, 'check_permissions', check)
+
+        async def scenario():
+            return [result async for result in file_utils.aiter_permissions([slow, missing] + files[1:],
+                                                                            max_concurrency=2, timeout=0.1)]
+
+        results = asyncio.run(scenario())
+        by_path = {result.path: result for result in results}
+        assert len(results) == 4
+        assert isinstance(by_path[slow].error, TimeoutError)
+        assert isinstance(by_path[missing].error, FileNotFoundError)
+        assert by_path[files[1]].permissions == original(files[1]) and by_path[files[1]].error is None
+        # The slow path does not hold back the others
+        assert results[-1].path == slow
+
+
+def test_aiter_permissions_hanging_paths(monkeypatch):
+    with tempfile.TemporaryDirectory() as temp:
+        files = list(make_tree(temp))
+        hanging = [os.path.join(temp, f'hang{index}') for index in range(2)]
+        original = file_utils.check_permissions
+
+        # Both worker threads get stuck, the healthy paths must wait for them rather than time out in the queue
+        def check(path):
+            if path in hanging:
+                time.sleep(0.6)
+                raise FileNotFoundError(path)
+            return original(path)
+
+        monkeypatch.setattr(file_utils, 'check_permissions', check)
+
+        async def scenario():
+            return [result async for result in file_utils.aiter_permissions(hanging + files, max_concurrency=2,
+                                                                            timeout=0.2)]
+
+        results = asyncio.run(scenario())
+        assert sorted(result.path for result in results[:2]) == hanging
+        assert all(isinstance(result.error, TimeoutError) for result in results[:2])
+        assert sorted(result.path for result in results[2:]) == sorted(files)
+        assert all(result.error is None for result in results[2:])
+
+
+def test_aiter_permissions_compact():
+    with tempfile.TemporaryDirectory() as temp:
+        files = list(make_tree(temp))
+
+        async def scenario():
+            return [result async for result in file_utils.aiter_permissions(iter(files), compact=True)]
+
+        results = asyncio.run(scenario())
+        assert sorted(result.path for result in results) == sorted(files)
+        assert all(result.permissions == get_permissions(result.path) for result in results)
+        with pytest.raises(ValueError):
+            asyncio.run(file_utils.aiter_permissions(files, max_concurrency=0).__anext__())
@@ -1,5 +1,10 @@
 """ Unit tests for the random_utils module. """
+import collections
+import pickle
+import random
 import string
+import threading
+import time
 
 import pytest
 
@@ -135,3 +140,290 @@ def test_random_uppercase_string_no_digits():
     """
     t_val = random_utils.random_uppercase_string(10, include_digits=False)
     assert len(t_val) == 10 and all(c in string.ascii_uppercase for c in t_val)
+
+
+def test_random_strings():
+    """
+    Test the bulk generation of random strings.
+
+    This test checks the count, that every string has the requested length and that only the requested character
+    sets are used.
+    """
+    t_vals = random_utils.random_strings(1000, 12, include_punctuation=False)
+    assert len(t_vals) == 1000
+    assert all(len(t_val) == 12 and all(c in string.ascii_letters + string.digits for c in t_val) for t_val in t_vals)
+
+
+def test_random_strings_every_character_used():
+    """
+    Test that bulk generation reaches every character of the charset, including the last ones of the table.
+    """
+    t_vals = random_utils.random_strings(1000, 100)
+    assert set(''.join(t_vals)) == set(string.ascii_letters + string.digits + string.punctuation)
+
+
+def test_random_strings_uniform():
+    """
+    Test that no character is drawn noticeably more often than the others.
+
+    With 94 characters the byte mapping would favour the first 68 of them if rejected byte values were not dropped.
+    """
+    counts = collections.Counter(''.join(random_utils.random_strings(100, 9400)))
+    assert max(counts.values()) < 1.15 * min(counts.values())
+
+
+def test_random_strings_empty():
+    """
+    Test that a count of zero gives an empty list.
+    """
+    assert not random_utils.random_strings(0, 5)
+
+
+def test_random_strings_reproducible():
+    """
+    Test that bulk generation follows the seed of the random module.
+    """
+    random.seed(1234)
+    first = random_utils.random_strings(10, 8)
+    random.seed(1234)
+    assert random_utils.random_strings(10, 8) == first
+
+
+def test_iter_random_strings():
+    """
+    Test generating random strings in fixed-size chunks.
+    """
+    chunks = list(random_utils.iter_random_strings(25, 6, chunk_size=10, include_uppercase=False,
+                                                   include_digits=False, include_punctuation=False))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert all(len(t_val) == 6 and t_val.islower() for chunk in chunks for t_val in chunk)
+
+
+def test_seeded_generator_reproducible():
+    """
+    Test that a seeded generator replays the same strings and does not touch the global random module.
+    """
+    random.seed(99)
+    expected = random.random()
+    first = random_utils.RandomGenerator.seeded(1234)
+    random.seed(99)
+    assert first.random_strings(5, 12) == random_utils.RandomGenerator.seeded(1234).random_strings(5, 12)
+    assert random.random() == expected
+    assert random_utils.RandomGenerator.seeded(1234).random_string(12) != \
+        random_utils.RandomGenerator.seeded(4321).random_string(12)
+
+
+def test_seeded_generator_default_seed():
+    """
+    Test that a generator without a seed records the fresh one it drew, so the run can be replayed.
+    """
+    generator = random_utils.RandomGenerator.seeded()
+    strings = generator.random_strings(3, 10)
+    assert random_utils.RandomGenerator.seeded(generator.seed).random_strings(3, 10) == strings
+
+
+def test_secure_generator():
+    """
+    Test the cryptographically secure generator.
+    """
+    generator = random_utils.RandomGenerator.secure()
+    t_val = generator.random_digits_string(40)
+    assert len(t_val) == 40 and t_val.isdigit()
+    assert generator.seed is None
+    assert generator.random_string(32) != generator.random_string(32)
+
+
+def test_generator_children():
+    """
+    Test that children are reproducible per index and independent of each other.
+    """
+    parent = random_utils.RandomGenerator.seeded(7)
+    children = parent.spawn(3)
+    assert [child.spawn_key for child in children] == [(0,), (1,), (2,)]
+    assert len({child.random_string(16) for child in children}) == 3
+    assert random_utils.RandomGenerator.seeded(7).child(1).random_string(16) == \
+        random_utils.RandomGenerator.seeded(7).spawn(3)[1].random_string(16)
+    assert parent.child(1).child(0).spawn_key == (1, 0)
+
+
+def test_generator_for_thread():
+    """
+    Test that each thread gets its own generator.
+    """
+    generator = random_utils.RandomGenerator.seeded(5)
+    results = {}
+
+    def worker(index):
+        results[index] = generator.for_thread()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(t_val) for t_val in results.values()}) == 3
+    assert generator.for_thread() is generator.for_thread()
+
+
+def test_generator_pickle():
+    """
+    Test that a pickled generator restarts its stream from the seed.
+    """
+    generator = random_utils.RandomGenerator.seeded(11).child(2)
+    copy = pickle.loads(pickle.dumps(generator))
+    assert repr(copy) == 'RandomGenerator(kind=\'random\', seed=11, spawn_key=(2,))'
+    assert copy.random_letters_string(20) == generator.random_letters_string(20)
+
+
+def test_numpy_generator():
+    """
+    Test the NumPy source.
+    """
+    pytest.importorskip('numpy')
+    generator = random_utils.RandomGenerator('numpy', seed=3)
+    strings = generator.random_strings(4, 9, include_punctuation=False)
+    assert strings == random_utils.RandomGenerator('numpy', seed=3).random_strings(4, 9, include_punctuation=False)
+    assert all(t_val.isalnum() for t_val in strings)
+    assert generator.child(0).random_string(16) != generator.child(1).random_string(16)
+
+
+def test_collision_probability():
+    """
+    Test the birthday bound estimate.
+    """
+    assert random_utils.id_space(3, include_uppercase=False, include_digits=False, include_punctuation=False) == 26 ** 3
+    assert random_utils.collision_probability(1, 8) == 0
+    assert random_utils.collision_probability(11, 1, include_lowercase=False, include_uppercase=False,
+                                              include_punctuation=False) == 1.0
+    # 38 draws from 1000 three digit strings collide about half the time
+    assert 0.45 < random_utils.collision_probability(38, 3, include_lowercase=False, include_uppercase=False,
+                                                     include_punctuation=False) < 0.55
+    assert 0 < random_utils.collision_probability(10 ** 6, 32) < 1e-40
+
+
+def test_bloom_filter():
+    """
+    Test that the Bloom filter never misses an added value and stays near its false positive rate.
+    """
+    bloom = random_utils.BloomFilter(2000, error_rate=0.01)
+    values = [str(t_val) for t_val in range(2000)]
+    assert all(bloom.add(t_val) for t_val in values[:10])
+    assert not bloom.add(values[0])
+    for t_val in values:
+        bloom.add(t_val)
+    assert all(t_val in bloom for t_val in values)
+    false_positives = sum(f'x{t_val}' in bloom for t_val in range(10000))
+    assert false_positives < 300
+    assert len(bloom) <= 2000 and bloom.nbytes < 2500
+
+
+@pytest.mark.parametrize('index', ['set', 'bloom'])
+def test_unique_ids(index):
+    """
+    Test that minted IDs are distinct and never clash with IDs added from elsewhere.
+    """
+    minter = random_utils.UniqueIdGenerator(2, index=index, capacity=200,
+                                            generator=random_utils.RandomGenerator.seeded(3),
+                                            include_uppercase=False, include_punctuation=False)
+    minter.add(['aa', 'bb'])
+    ids = minter.mint_batch(150) + [minter.mint() for _ in range(20)]
+    assert len(set(ids)) == 170
+    assert not {'aa', 'bb'} & set(ids)
+    assert all(len(t_val) == 2 and t_val.isalnum() for t_val in ids)
+    assert len(minter) == 172
+    assert ids[0] in minter
+    assert minter.rejected > 0
+
+
+def test_unique_ids_exhausted():
+    """
+    Test that minting from a used up space fails instead of looping forever.
+    """
+    minter = random_utils.UniqueIdGenerator(1, include_lowercase=False, include_uppercase=False)
+    assert sorted(minter.mint_batch(10)) == list(string.digits)
+    with pytest.raises(RuntimeError):
+        minter.mint()
+
+
+def test_string_pool_manual_refill():
+    """
+    Test a pool without a background thread: prefill, low water refill and exhaustion.
+    """
+    pool = random_utils.StringPool(capacity=10, low_water=4, background=False)
+    pool.prefill(6, include_uppercase=False, include_digits=False)
+    assert len(pool) == 10
+    values = [pool.get(6, include_uppercase=False, include_digits=False) for _ in range(7)]
+    assert all(len(t_val) == 6 and t_val.islower() for t_val in values)
+    assert pool.refill() == 7
+    assert len(pool) == 10
+    assert pool.get(3) and pool.stats.exhausted == 1
+    stats = pool.stats.as_dict()
+    assert stats['hits'] == 7 and stats['refills'] == 2 and stats['refilled'] == 17
+    assert stats['refill_rate'] > 0 and stats['wait_seconds'] > 0
+
+
+def test_string_pool_concurrent_refill():
+    """
+    Test that prefills racing each other and the background thread fill a buffer to capacity exactly once.
+    """
+    class SlowGenerator(random_utils.RandomGenerator):
+        def random_strings(self, count, *args, **kwargs):
+            time.sleep(0.01)
+            return super().random_strings(count, *args, **kwargs)
+
+    with random_utils.StringPool(capacity=100, generator=SlowGenerator()) as pool:
+        threads = [threading.Thread(target=pool.prefill, args=(5,)) for _ in range(4)]
+        pool.get(5)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert pool._buffers[(5, True, True, True, False)].maxlen == 100
+        assert len(pool) == pool.stats.refilled == 100
+
+
+def test_string_pool_invalid_and_failing_configurations():
+    """
+    Test that invalid configurations are refused by the caller, and that a failing refill is recorded without
+    stopping the refills of other configurations or the background thread.
+    """
+    class FailingGenerator(random_utils.RandomGenerator):
+        def random_strings(self, count, length, *args, **kwargs):
+            if length == 13:
+                raise RuntimeError('unlucky')
+            return super().random_strings(count, length, *args, **kwargs)
+
+    with random_utils.StringPool(capacity=20, generator=FailingGenerator()) as pool:
+        with pytest.raises(AssertionError):
+            pool.get(0)
+        with pytest.raises(AssertionError):
+            pool.prefill(8, include_lowercase=False, include_uppercase=False, include_digits=False)
+        assert not pool._buffers
+        with pytest.raises(RuntimeError):
+            pool.get(13)
+        assert len(pool.get(8)) == 8
+        for _ in range(200):
+            if len(pool) == 20:
+                break
+            time.sleep(0.01)
+        assert len(pool) == 20 and pool._thread.is_alive()
+        assert pool.stats.refill_errors >= 1 and isinstance(pool.refill_failures[(13, True, True, True, False)],
+                                                            RuntimeError)
+        assert pool.refill() == 0
+
+
+def test_string_pool_background_refill():
+    """
+    Test that the background thread tops a buffer back up after it drops below the low water mark.
+    """
+    with random_utils.StringPool(capacity=50, low_water=20) as pool:
+        pool.prefill(8)
+        for _ in range(40):
+            assert len(pool.get(8)) == 8
+        for _ in range(200):
+            if pool.stats.refills >= 2:
+                break
+            time.sleep(0.01)
+        assert pool.stats.refills >= 2
+        assert len(pool) >= 20
+    assert repr(pool) == 'StringPool(capacity=50, low_water=20)'
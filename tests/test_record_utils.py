@@ -0,0 +1,238 @@
+""" Unit tests for the record_utils module. """
+import dataclasses
+import io
+import json
+import typing
+
+import pytest
+
+from lib.record_utils import RECORD_STRATEGY_OFFSET, RecordPayloadSerializer, RecordSerializer, record_codec, \
+    record_fields, record_kind
+from lib.serialization_utils import DataSerializer, FramedSerializer, JsonSerializer, MsgpackSerializer, \
+    PickleSerializer, YamlSerializer
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Point:
+    x: float
+    y: float
+
+
+class Tag(typing.NamedTuple):
+    name: str
+    weight: int = 1
+
+
+class Owner(typing.TypedDict, total=False):
+    login: str
+    team: typing.Optional[str]
+
+
+@dataclasses.dataclass
+class Shape:
+    name: str
+    points: typing.List[Point]
+    labels: typing.Tuple[str, ...] = ()
+    tag: typing.Optional[Tag] = None
+    parent: typing.Optional['Shape'] = None
+    area: float = dataclasses.field(default=0.0, init=False)
+
+
+@dataclasses.dataclass
+class Counted:
+    value: int
+    calls: typing.ClassVar[int] = 0
+
+    def __post_init__(self):
+        Counted.calls += 1
+
+
+def make_shapes() -> typing.List[Shape]:
+    """ Shapes using every kind of field"""
+    square = Shape('square', [Point(0, 0), Point(0, 1.5), Point(1.5, 1.5)], ('closed', 'convex'), Tag('geo', 3))
+    square.area = 2.25
+    return [square, Shape('dot', [Point(-1, 2)], parent=square), Shape('empty', [])]
+
+
+def strategies():
+    """ The wrapped strategies to run every round trip with"""
+    available = [JsonSerializer(), YamlSerializer(loader='safe'), PickleSerializer()]
+    try:
+        available.append(MsgpackSerializer())
+    except ImportError:
+        pass
+    return available
+
+
+class TestRecordSerializer:
+    """
+    Test cases for RecordSerializer round trips.
+
+    This class covers each record kind in row and columnar layout over every installed strategy, the size of the
+    payload, and the stream and framing integrations.
+    """
+
+    @pytest.mark.parametrize('columnar', [False, True])
+    @pytest.mark.parametrize('strategy', strategies(), ids=repr)
+    def test_round_trip(self, strategy, columnar):
+        """
+        Test that lists and single records of nested dataclasses come back equal, with their own field types.
+        """
+        shapes = make_shapes()
+        serializer = RecordSerializer(Shape, strategy, columnar=columnar, validate=True)
+        result = serializer(serializer(shapes), deserialize=True)
+        assert result == shapes
+        assert isinstance(result[0].labels, tuple) and isinstance(result[0].tag, Tag)
+        assert result[0].area == 2.25
+        assert result[1].parent == shapes[0]
+        assert serializer(serializer(shapes[0]), deserialize=True) == shapes[0]
+
+    def test_namedtuple_and_typeddict(self):
+        """
+        Test that NamedTuples and TypedDicts round trip, and that optional keys stay missing or None.
+        """
+        tags = RecordSerializer(Tag, columnar=True)
+        assert tags(tags([Tag('a'), Tag('b', 2)]), deserialize=True) == [Tag('a'), Tag('b', 2)]
+        owners = RecordSerializer(Owner, validate=True)
+        data = [{'login': 'ann', 'team': 'ops'}, {'login': 'bob'}, {'team': None}, {}]
+        assert owners(owners(data), deserialize=True) == data
+        assert RecordSerializer(Owner, columnar=True)(RecordSerializer(Owner, columnar=True)(data),
+                                                      deserialize=True) == data
+        assert owners(owners(data[1]), deserialize=True) == data[1]
+
+    def test_payload_layout(self):
+        """
+        Test that field names are written once, in front of rows or columns, and the payload beats a dict per record.
+        """
+        points = [Point(index, index * 2) for index in range(100)]
+        rows = json.loads(RecordSerializer(Point)(points))
+        assert rows['fields'] == ['x', 'y'] and rows['rows'][3] == [3, 6]
+        columns = json.loads(RecordSerializer(Point, columnar=True)(points))
+        assert columns['columns'][1][:3] == [0, 2, 4]
+        dicts = JsonSerializer()([dataclasses.asdict(point) for point in points])
+        assert len(RecordSerializer(Point, columnar=True)(points)) < len(RecordSerializer(Point)(points)) < len(dicts)
+
+    def test_frozen_dataclass_skips_init(self):
+        """
+        Test that frozen dataclasses are filled in directly while ones with __post_init__ go through it.
+        """
+        assert RecordSerializer(Point)('{"fields": ["x", "y"], "record": [1, 2]}', deserialize=True) == Point(1, 2)
+        assert '_new(_cls)' in record_codec(Point).source
+        serializer = RecordSerializer(Counted)
+        expected = [Counted(1), Counted(2)]
+        blob = serializer(expected)
+        calls = Counted.calls
+        assert serializer(blob, deserialize=True) == expected
+        assert Counted.calls == calls + 2
+
+    def test_streams_and_frames(self):
+        """
+        Test dump and load, record streams, and framing, which carries an id of its own per wrapped strategy.
+        """
+        shapes = make_shapes()
+        serializer = RecordSerializer(Shape, PickleSerializer())
+        stream = io.BytesIO()
+        serializer.dump(shapes, stream)
+        stream.seek(0)
+        assert serializer.load(stream) == shapes
+        stream = io.StringIO()
+        RecordSerializer(Shape).dump_records(shapes, stream)
+        stream.seek(0)
+        assert list(RecordSerializer(Shape).load_records(stream)) == shapes
+        framed = DataSerializer(FramedSerializer(serializer))
+        assert framed.deserialize(framed.serialize(shapes)) == shapes
+        assert serializer.strategy_id == RECORD_STRATEGY_OFFSET + PickleSerializer.strategy_id
+
+    def test_mixed_frames(self):
+        """
+        Test that record frames and plain JSON frames are told apart by whichever serializer reads them.
+        """
+        records = DataSerializer(FramedSerializer(RecordSerializer(Tag)))
+        plain = DataSerializer(FramedSerializer(JsonSerializer()))
+        record_frame = records.serialize([Tag('a'), Tag('b', 2)])
+        plain_frame = plain.serialize({'fields': ['name', 'weight'], 'rows': [['a', 1]]})
+        assert records.deserialize(record_frame) == [Tag('a'), Tag('b', 2)]
+        assert records.deserialize(plain_frame) == {'fields': ['name', 'weight'], 'rows': [['a', 1]]}
+        assert plain.deserialize(record_frame) == [{'name': 'a', 'weight': 1}, {'name': 'b', 'weight': 2}]
+        assert list(records.deserialize_frames(record_frame + plain_frame)) == [
+            [Tag('a'), Tag('b', 2)], {'fields': ['name', 'weight'], 'rows': [['a', 1]]}]
+        owners = DataSerializer(FramedSerializer(RecordSerializer(Owner, columnar=True)))
+        assert plain.deserialize(owners.serialize([{'login': 'ann', 'team': None}, {}])) == [
+            {'login': 'ann', 'team': None}, {}]
+        payloads = RecordPayloadSerializer()
+        assert payloads(payloads([{'x': 1, 'y': 2}]), deserialize=True) == [{'x': 1, 'y': 2}]
+        assert RecordSerializer(Point)(payloads({'x': 1, 'y': 2}), deserialize=True) == Point(1, 2)
+
+    def test_repr(self):
+        """
+        Test the formal string representation.
+        """
+        assert repr(RecordSerializer(Tag, columnar=True)) == \
+            'RecordSerializer(Tag, JsonSerializer(), columnar=True, validate=False)'
+
+
+class TestRecordCodec:
+    """
+    Test cases for the generated codecs and validation.
+    """
+
+    def test_fields_and_kinds(self):
+        """
+        Test that the fields of each record kind are found in order, and other types are rejected.
+        """
+        assert [record_kind(t) for t in (Point, Tag, Owner, dict, 1)] == ['dataclass', 'namedtuple', 'typeddict',
+                                                                          None, None]
+        assert [field.name for field in record_fields(Shape)] == ['name', 'points', 'labels', 'tag', 'parent', 'area']
+        assert [field.optional for field in record_fields(Owner)] == [True, True]
+        with pytest.raises(TypeError):
+            RecordSerializer(dict)
+
+    def test_keyword_only_fields(self):
+        """
+        Test that keyword-only dataclass fields declared between positional ones are passed by name.
+        """
+        @dataclasses.dataclass
+        class Options:
+            path: str
+            mode: int = dataclasses.field(kw_only=True, default=0o644)
+            owner: str = 'root'
+
+        serializer = RecordSerializer(Options)
+        options = [Options('/tmp', 'cidw', mode=0o600)]
+        assert serializer(serializer(options), deserialize=True) == options
+
+    def test_codec_is_shared(self):
+        """
+        Test that a codec is generated once per record type and validation setting.
+        """
+        assert record_codec(Point) is record_codec(Point)
+        assert record_codec(Point) is not record_codec(Point, validate=True)
+        assert 'def decode_row(row):' in record_codec(Point).source
+
+    def test_validation(self):
+        """
+        Test that validation reports the field and value, and that without it values pass through unchecked.
+        """
+        payload = '{"fields": ["name", "weight"], "rows": [["a", "heavy"]]}'
+        with pytest.raises(ValueError, match=r'Tag.weight: str value .heavy. does not match int'):
+            RecordSerializer(Tag, validate=True)(payload, deserialize=True)
+        assert RecordSerializer(Tag)(payload, deserialize=True) == [Tag('a', 'heavy')]
+        with pytest.raises(ValueError, match='has 2 fields, got 3 values'):
+            RecordSerializer(Tag, validate=True)('{"fields": ["name", "weight"], "record": ["a", 1, 2]}',
+                                                 deserialize=True)
+        nested = {'fields': record_codec(Shape).names, 'record': ['s', [[0, 'y']], [], None, None, 0.0]}
+        with pytest.raises(ValueError, match='Point.y'):
+            RecordSerializer(Shape, validate=True)(json.dumps(nested), deserialize=True)
+
+    def test_mismatched_payloads(self):
+        """
+        Test that payloads of another record type or layout are refused.
+        """
+        with pytest.raises(ValueError, match='do not match'):
+            RecordSerializer(Tag)(RecordSerializer(Point)(Point(1, 2)), deserialize=True)
+        with pytest.raises(ValueError, match='differ in length'):
+            RecordSerializer(Point)('{"fields": ["x", "y"], "columns": [[1, 2], [3]]}', deserialize=True)
+        with pytest.raises(ValueError):
+            RecordSerializer(Point)('[1, 2]', deserialize=True)
+        with pytest.raises(ValueError):
+            RecordSerializer(Point)(42)
@@ -1,6 +1,30 @@
 """Test cases for serialization_utils"""
+import asyncio
+import concurrent.futures
+import datetime
+import decimal
+import io
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import types
+
 import pytest
-from lib.serialization_utils import JsonSerializer, YamlSerializer, PickleSerializer, DataSerializer
+import yaml
+
+from lib import serialization_utils
+from lib.serialization_utils import JsonSerializer, YamlSerializer, PickleSerializer, DataSerializer, \
+    MsgpackSerializer, CborSerializer, CachingSerializer, CompressingSerializer, FramedSerializer, \
+    MultipartPayload, InMemoryMetrics, LoggingMetricsSink, MetricEvent, SerializerMetrics, SlowCallSampler, \
+    FRAME_FLAG_COMPRESSED, FRAME_HEADER_SIZE, available_codecs, available_json_backends, \
+    content_key, decode_frame, estimate_size, frame_size, freeze, is_frame, iter_frames, read_frame_header, \
+    register_json_backend, register_strategy, strategy_for_id, unframe, _JSON_BACKENDS, _STRATEGY_FACTORIES, \
+    _STRATEGY_INSTANCES
 
 
 class TestSimpleSerialization:
@@ -204,3 +228,1154 @@ class TestSerializerStrReprMethods:
         json_serializer = JsonSerializer()
         data_serializer = DataSerializer(json_serializer)
         assert repr(data_serializer) == 'DataSerializer(serializing_strategy=JsonSerializer)'
+
+
+class TestBatchSerialization:
+    """
+    Test cases for serialize_many and deserialize_many on DataSerializer.
+
+    This class checks that the batch API round trips data and preserves input order in serial, thread and
+    process pool modes.
+    """
+
+    @pytest.mark.parametrize('strategy', [JsonSerializer, YamlSerializer, PickleSerializer])
+    @pytest.mark.parametrize('pool', [None, 'serial', 'thread', 'process'])
+    def test_round_trip_preserves_order(self, strategy, pool):
+        """
+        Test that a batch round trips in input order for each strategy and pool mode.
+        """
+        data_serializer = DataSerializer(strategy())
+        items = [{'id': i, 'values': list(range(i % 5))} for i in range(50)]
+        serialized = data_serializer.serialize_many(items, pool=pool, max_workers=2, chunksize=7)
+        assert serialized == [data_serializer.serialize(item) for item in items]
+        assert data_serializer.deserialize_many(serialized, pool=pool, max_workers=2) == items
+
+    def test_accepts_generator_input(self):
+        """
+        Test that the batch API consumes any iterable, not just lists.
+        """
+        data_serializer = DataSerializer(JsonSerializer())
+        assert data_serializer.serialize_many((i for i in range(3)), pool='thread') == ['0', '1', '2']
+
+    def test_empty_batch(self):
+        """
+        Test that an empty batch returns an empty list without starting a pool.
+        """
+        data_serializer = DataSerializer(PickleSerializer())
+        assert not data_serializer.serialize_many([], pool='process')
+
+    def test_unknown_pool(self):
+        """
+        Test that an unknown pool type raises a ValueError.
+        """
+        data_serializer = DataSerializer(JsonSerializer())
+        with pytest.raises(ValueError):
+            data_serializer.serialize_many([1], pool='gpu')
+        with pytest.raises(ValueError, match='needs an executor'):
+            data_serializer.serialize_many([1], pool='executor')
+
+    def test_pools_are_reused(self):
+        """
+        Test that a pool started by one batch is reused by the next until close, which shuts it down.
+        """
+        with DataSerializer(JsonSerializer()) as data_serializer:
+            data_serializer.serialize_many([1, 2], pool='thread', max_workers=2)
+            data_serializer.deserialize_many(['1', '2'], pool='thread', max_workers=2)
+            assert len(data_serializer._pools) == 1
+            executor = data_serializer._pools['thread', 2]
+        assert not data_serializer._pools
+        with pytest.raises(RuntimeError):
+            executor.submit(print)
+
+    def test_configured_executor(self):
+        """
+        Test that pool='executor' runs batches in the constructor's executor and that close leaves it running.
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            with DataSerializer(JsonSerializer(), executor=executor) as data_serializer:
+                assert data_serializer.serialize_many([1, [2]], pool='executor') == ['1', '[2]']
+                assert not data_serializer._pools
+            assert executor.submit(len, 'cidw').result() == 4
+
+
+class TestStreamSerialization:
+    """
+    Test cases for the stream based dump/load and record methods of DataSerializer.
+
+    This class checks that every strategy writes to and reads from text and binary streams, and that record
+    streams are read back lazily in order.
+    """
+
+    DATA = {'key1': 'value1', 'key2': ['a', 'b'], 'key3': {'nested': 1.5}}
+    RECORDS = [{'id': i, 'name': f'rec{i}'} for i in range(5)]
+
+    @pytest.mark.parametrize('strategy', [JsonSerializer, YamlSerializer, PickleSerializer])
+    def test_dump_load_binary_stream(self, strategy):
+        """
+        Test dump and load round trip through a binary stream for each strategy.
+        """
+        data_serializer = DataSerializer(strategy())
+        stream = io.BytesIO()
+        data_serializer.dump(self.DATA, stream)
+        assert not stream.closed
+        stream.seek(0)
+        assert data_serializer.load(stream) == self.DATA
+
+    @pytest.mark.parametrize('strategy', [JsonSerializer, YamlSerializer])
+    def test_dump_load_text_stream(self, strategy):
+        """
+        Test dump and load round trip through a text stream, and that the output matches serialize.
+        """
+        data_serializer = DataSerializer(strategy())
+        stream = io.StringIO()
+        data_serializer.dump(self.DATA, stream)
+        assert stream.getvalue() == data_serializer.serialize(self.DATA)
+        stream.seek(0)
+        assert data_serializer.load(stream) == self.DATA
+
+    @pytest.mark.parametrize('strategy', [JsonSerializer, YamlSerializer, PickleSerializer])
+    def test_record_round_trip(self, strategy):
+        """
+        Test that records written with dump_records are yielded back in order by load_records.
+        """
+        data_serializer = DataSerializer(strategy())
+        stream = io.BytesIO()
+        data_serializer.dump_records(iter(self.RECORDS), stream)
+        stream.seek(0)
+        records = data_serializer.load_records(stream)
+        assert isinstance(records, types.GeneratorType)
+        assert list(records) == self.RECORDS
+
+    def test_json_lines_format(self):
+        """
+        Test that the JSON record stream is one document per line.
+        """
+        stream = io.StringIO()
+        DataSerializer(JsonSerializer()).dump_records([{'a': 1}, [2]], stream)
+        assert stream.getvalue() == '{"a": 1}\n[2]\n'
+
+    @pytest.mark.parametrize('wrap', [
+        lambda strategy: CompressingSerializer(strategy, threshold=0),
+        lambda strategy: FramedSerializer(strategy),
+        lambda strategy: FramedSerializer(CompressingSerializer(strategy, threshold=0)),
+        lambda strategy: CachingSerializer(strategy),
+    ])
+    @pytest.mark.parametrize('strategy', [JsonSerializer, PickleSerializer])
+    def test_wrapped_record_round_trip(self, wrap, strategy):
+        """
+        Test that record streams round trip through the compressing, framing and caching wrappers.
+        """
+        data_serializer = DataSerializer(wrap(strategy()))
+        stream = io.BytesIO()
+        data_serializer.dump_records(iter(self.RECORDS), stream)
+        stream.seek(0)
+        assert list(data_serializer.load_records(stream)) == self.RECORDS
+        if not isinstance(data_serializer.serializing_strategy, CachingSerializer):
+            # the length prefixed and framed streams tell a cut off record from the end of the stream
+            stream.seek(0)
+            stream.truncate(len(stream.getvalue()) - 1)
+            with pytest.raises(EOFError):
+                list(data_serializer.load_records(stream))
+
+    def test_empty_record_stream(self):
+        """
+        Test that an empty pickle stream yields no records.
+        """
+        assert not list(DataSerializer(PickleSerializer()).load_records(io.BytesIO()))
+
+
+class TestYamlLoaders:
+    """
+    Test cases for the YamlSerializer loader choice and libyaml fast path.
+
+    This class checks that the C and pure python implementations produce the same output, that the safe loader
+    refuses python specific tags and that the representation reflects the options.
+    """
+
+    DATA = {'name': 'svc', 'ports': [80, 443], 'limits': {'cpu': 1.5, 'memory': None, 'enabled': True}}
+
+    @pytest.mark.parametrize('loader', ['full', 'safe'])
+    def test_libyaml_matches_pure_python(self, loader):
+        """
+        Test that the libyaml and pure python paths serialize identically and round trip.
+        """
+        fast = YamlSerializer(loader=loader)
+        slow = YamlSerializer(loader=loader, use_libyaml=False)
+        assert not slow.libyaml
+        assert fast(self.DATA) == slow(self.DATA)
+        assert fast(slow(self.DATA), deserialize=True) == self.DATA
+
+    def test_libyaml_detected(self):
+        """
+        Test that the C implementation is used when PyYAML was built with libyaml.
+        """
+        if not yaml.__with_libyaml__:
+            pytest.skip('PyYAML built without libyaml')
+        assert YamlSerializer().libyaml
+
+    def test_safe_loader_rejects_python_tags(self):
+        """
+        Test that the safe loader refuses python object tags that the full loader accepts.
+        """
+        serialized = YamlSerializer()((1, 2))
+        assert YamlSerializer()(serialized, deserialize=True) == (1, 2)
+        with pytest.raises(yaml.constructor.ConstructorError):
+            YamlSerializer(loader='safe')(serialized, deserialize=True)
+
+    def test_unknown_loader(self):
+        """
+        Test that an unknown loader name raises a ValueError.
+        """
+        with pytest.raises(ValueError):
+            YamlSerializer(loader='unsafe')
+
+    def test_repr_shows_options(self):
+        """
+        Test that non-default options are shown in the representation.
+        """
+        assert repr(YamlSerializer(loader='safe', use_libyaml=False)) == \
+            "YamlSerializer(loader='safe', use_libyaml=False)"
+
+
+class TestJsonBackends:
+    """
+    Test cases for the pluggable JsonSerializer backends.
+
+    This class runs an output compatibility matrix over every installed backend: key ordering, float formatting,
+    non-ASCII text, bytes input and decoding each other's output.
+    """
+
+    BACKENDS = available_json_backends()
+    DATA = {'zeta': 1, 'alpha': [0.1, 1e300, -0.0, 3.0, 2.5e-8], 'text': 'héllo / wörld ✓ 日本',
+            'nested': {'b': None, 'a': True}}
+
+    def test_stdlib_always_available(self):
+        """
+        Test that the stdlib backend is registered and is the last resort for 'auto'.
+        """
+        assert 'stdlib' in self.BACKENDS
+        assert JsonSerializer(backend='auto').backend == self.BACKENDS[0]
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_round_trip(self, backend):
+        """
+        Test that each backend round trips floats and non-ASCII text exactly.
+        """
+        serializer = JsonSerializer(backend=backend)
+        serialized = serializer(self.DATA)
+        assert isinstance(serialized, str)
+        result = serializer(serialized, deserialize=True)
+        assert result == self.DATA
+        assert [repr(f) for f in result['alpha']] == [repr(f) for f in self.DATA['alpha']]
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_key_order(self, backend):
+        """
+        Test that each backend keeps insertion order by default and sorts keys on request.
+        """
+        unsorted = JsonSerializer(backend=backend)(self.DATA)
+        assert list(json.loads(unsorted)) == list(self.DATA)
+        ordered = JsonSerializer(backend=backend, sort_keys=True)(self.DATA)
+        assert list(json.loads(ordered)) == sorted(self.DATA)
+        assert list(json.loads(ordered)['nested']) == ['a', 'b']
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_output_agrees_with_stdlib(self, backend):
+        """
+        Test that each backend's output decodes to what stdlib's does, floats and non-ASCII text included, and that
+        every backend but orjson escapes non-ASCII text as json.dumps does.
+        """
+        data = dict(self.DATA, text='Zoë ✓ 日本 \U0001F600',
+                    floats=[0.1 + 0.2, 1e-7, 1e22, 5e-324, 123456789.123456789])
+        serialized = JsonSerializer(backend=backend, sort_keys=True)(data)
+        expected = json.loads(JsonSerializer(sort_keys=True)(data))
+        assert json.loads(serialized) == expected
+        assert [repr(f) for f in json.loads(serialized)['floats']] == [repr(f) for f in expected['floats']]
+        assert serialized.isascii() == (backend != 'orjson')
+
+    @pytest.mark.parametrize('writer', BACKENDS)
+    @pytest.mark.parametrize('reader', BACKENDS)
+    def test_cross_backend_decoding(self, writer, reader):
+        """
+        Test that every backend decodes every other backend's output, as str and as bytes.
+        """
+        serialized = JsonSerializer(backend=writer, binary=True)(self.DATA)
+        assert isinstance(serialized, bytes)
+        assert JsonSerializer(backend=reader)(serialized, deserialize=True) == self.DATA
+        assert JsonSerializer(backend=reader)(serialized.decode('utf-8'), deserialize=True) == self.DATA
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_streams(self, backend):
+        """
+        Test dump/load and JSON Lines records on binary and text streams for each backend.
+        """
+        data_serializer = DataSerializer(JsonSerializer(backend=backend))
+        for stream in (io.BytesIO(), io.StringIO()):
+            data_serializer.dump(self.DATA, stream)
+            stream.seek(0)
+            assert data_serializer.load(stream) == self.DATA
+        stream = io.BytesIO()
+        data_serializer.dump_records([self.DATA, [1, 2]], stream)
+        stream.seek(0)
+        assert list(data_serializer.load_records(stream)) == [self.DATA, [1, 2]]
+
+    @pytest.mark.parametrize('backend', BACKENDS)
+    def test_process_pool(self, backend):
+        """
+        Test that serializers for each backend can be shipped to process pool workers.
+        """
+        data_serializer = DataSerializer(JsonSerializer(backend=backend))
+        assert data_serializer.deserialize_many(data_serializer.serialize_many([self.DATA] * 3, pool='process'),
+                                                pool='process') == [self.DATA] * 3
+
+    def test_register_backend(self):
+        """
+        Test that a registered backend is selectable by name and shown in the representation.
+        """
+        # pylint: disable=protected-access
+        register_json_backend('test-upper', lambda data, sort_keys: json.dumps(data).upper(), json.loads)
+        try:
+            serializer = JsonSerializer(backend='test-upper')
+            assert serializer(['a']) == '["A"]'
+            assert repr(serializer) == "JsonSerializer(backend='test-upper')"
+        finally:
+            _JSON_BACKENDS.pop('test-upper')
+
+    def test_unknown_backend(self):
+        """
+        Test that an unknown backend raises a ValueError.
+        """
+        with pytest.raises(ValueError):
+            JsonSerializer(backend='simdjson-nope')
+
+
+class TestBinarySerializers:
+    """
+    Test cases for the MessagePack and CBOR strategies.
+
+    This class checks round trips of the extension types, stream and record support and use through DataSerializer.
+    Tests are skipped when the optional package is not installed.
+    """
+
+    DATA = {'when': datetime.datetime(2024, 5, 17, 12, 30, 15, 250, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 17), 'tags': {'a', 'b'}, 'frozen': frozenset([1, 2]),
+            'price': decimal.Decimal('19.990'), 'blob': b'\x00\xff', 'values': [1, 2.5, None, True, 'x'], 1: 'int key'}
+
+    @pytest.fixture(params=['msgpack', 'cbor'])
+    def data_serializer(self, request):
+        """
+        Pytest fixture for a DataSerializer of each binary strategy.
+        """
+        if request.param == 'msgpack':
+            pytest.importorskip('msgpack')
+            return DataSerializer(MsgpackSerializer())
+        pytest.importorskip('cbor2')
+        return DataSerializer(CborSerializer())
+
+    def test_round_trip_extension_types(self, data_serializer):
+        """
+        Test that datetimes, dates, sets, Decimals, bytes and int keys survive a round trip.
+        """
+        serialized = data_serializer.serialize(self.DATA)
+        assert isinstance(serialized, bytes)
+        deserialized = data_serializer.deserialize(serialized)
+        assert deserialized == self.DATA
+        assert str(deserialized['price']) == '19.990'
+
+    def test_accepts_memoryview(self, data_serializer):
+        """
+        Test that deserialize accepts a memoryview without copying to bytes first.
+        """
+        serialized = data_serializer.serialize([1, 2, 3])
+        assert data_serializer.deserialize(memoryview(serialized)) == [1, 2, 3]
+
+    def test_rejects_str(self, data_serializer):
+        """
+        Test that text input is rejected with a ValueError.
+        """
+        with pytest.raises(ValueError):
+            data_serializer.deserialize('not binary')
+
+    def test_streams_and_records(self, data_serializer):
+        """
+        Test dump/load and lazy record streams.
+        """
+        stream = io.BytesIO()
+        data_serializer.dump(self.DATA, stream)
+        stream.seek(0)
+        assert data_serializer.load(stream) == self.DATA
+        stream = io.BytesIO()
+        data_serializer.dump_records(({'id': i} for i in range(4)), stream)
+        stream.seek(0)
+        assert list(data_serializer.load_records(stream)) == [{'id': i} for i in range(4)]
+
+    def test_smaller_than_json(self, data_serializer):
+        """
+        Test that a numeric heavy payload is smaller than its JSON encoding.
+        """
+        payload = {'samples': [i * 1.5 for i in range(500)], 'ids': list(range(500))}
+        assert len(data_serializer.serialize(payload)) < len(DataSerializer(JsonSerializer()).serialize(payload))
+
+    def test_msgpack_naive_datetime_and_frozenset(self):
+        """
+        Test that MessagePack keeps naive datetimes naive and frozensets frozen.
+        """
+        pytest.importorskip('msgpack')
+        serializer = MsgpackSerializer()
+        value = datetime.datetime(2024, 1, 1, 8, 0)
+        assert serializer(serializer(value), deserialize=True) == value
+        assert isinstance(serializer(serializer(frozenset([1])), deserialize=True), frozenset)
+
+    def test_cbor_naive_datetime(self):
+        """
+        Test that CBOR stores naive datetimes in the configured timezone, or refuses them without one.
+        """
+        cbor2 = pytest.importorskip('cbor2')
+        value = datetime.datetime(2024, 1, 1, 8, 0)
+        serializer = CborSerializer()
+        assert serializer(serializer(value), deserialize=True) == value.replace(tzinfo=datetime.timezone.utc)
+        with pytest.raises(cbor2.CBOREncodeError):
+            CborSerializer(timezone=None)(value)
+
+
+class TestCompressingSerializer:
+    """
+    Test cases for the CompressingSerializer wrapper.
+
+    This class checks that every available codec round trips text and binary strategies, that the threshold
+    decides when to compress, and that the header lets deserialize pick the codec on its own.
+    """
+
+    LARGE = {'rows': [{'id': i, 'name': f'row-{i}', 'flag': i % 3 == 0} for i in range(500)]}
+
+    @pytest.mark.parametrize('codec', available_codecs())
+    @pytest.mark.parametrize('strategy', [JsonSerializer, YamlSerializer, PickleSerializer])
+    def test_round_trip(self, codec, strategy):
+        """
+        Test that each codec round trips large and small payloads for text and binary strategies.
+        """
+        data_serializer = DataSerializer(CompressingSerializer(strategy(), codec=codec))
+        for data in (self.LARGE, {'small': 1}):
+            serialized = data_serializer.serialize(data)
+            assert isinstance(serialized, bytes)
+            assert data_serializer.deserialize(serialized) == data
+
+    def test_threshold(self):
+        """
+        Test that payloads below the threshold are stored uncompressed and larger ones are compressed.
+        """
+        serializer = CompressingSerializer(JsonSerializer(), threshold=100)
+        small = serializer({'a': 1})
+        assert small[len(CompressingSerializer.MAGIC):].startswith(b'\x00\x01{"a": 1}')
+        large = serializer(self.LARGE)
+        assert len(large) < len(JsonSerializer()(self.LARGE)) / 3
+
+    def test_codec_detected_from_header(self):
+        """
+        Test that a serializer decodes payloads written with any other codec.
+        """
+        reader = CompressingSerializer(PickleSerializer(), codec='none')
+        for codec in available_codecs():
+            assert reader(CompressingSerializer(PickleSerializer(), codec=codec)(self.LARGE),
+                          deserialize=True) == self.LARGE
+
+    def test_uncompressed_input_passes_through(self):
+        """
+        Test that blobs written without the wrapper still deserialize, from bytes or str.
+        """
+        assert CompressingSerializer(PickleSerializer())(PickleSerializer()([1, 2]), deserialize=True) == [1, 2]
+        assert CompressingSerializer(JsonSerializer())('[1, 2]', deserialize=True) == [1, 2]
+
+    def test_unknown_codec(self):
+        """
+        Test that unknown codec names and ids raise ValueError.
+        """
+        with pytest.raises(ValueError):
+            CompressingSerializer(JsonSerializer(), codec='brotli-nope')
+        with pytest.raises(ValueError):
+            CompressingSerializer(JsonSerializer())(CompressingSerializer.MAGIC + b'\xfe\x00data', deserialize=True)
+
+    def test_process_pool(self):
+        """
+        Test that the wrapper can be shipped to process pool workers.
+        """
+        data_serializer = DataSerializer(CompressingSerializer(JsonSerializer(), codec='lzma', threshold=10))
+        items = [self.LARGE, {'x': 'y' * 50}]
+        assert data_serializer.deserialize_many(data_serializer.serialize_many(items, pool='process'),
+                                                pool='process') == items
+
+    def test_repr(self):
+        """
+        Test the representation shows the wrapped strategy and options.
+        """
+        assert repr(CompressingSerializer(JsonSerializer(), codec='bz2', threshold=10, level=9)) == \
+            "CompressingSerializer(JsonSerializer(), codec='bz2', threshold=10, level=9)"
+
+
+class TestFramedSerializer:
+    """
+    Test cases for self-describing frames.
+
+    This class checks the frame header, format auto-detection in DataSerializer.deserialize, checksum
+    verification and reading back-to-back frames from one buffer.
+    """
+
+    DATA = {'key': 'value', 'numbers': [1, 2, 3]}
+
+    @pytest.mark.parametrize('strategy', [JsonSerializer, YamlSerializer, PickleSerializer])
+    def test_any_serializer_reads_any_frame(self, strategy):
+        """
+        Test that a DataSerializer built with one strategy deserializes frames written by every other.
+        """
+        frame = DataSerializer(FramedSerializer(strategy(), schema_version=7)).serialize(self.DATA)
+        assert is_frame(frame)
+        header = read_frame_header(frame)
+        assert header.strategy_id == strategy.strategy_id
+        assert header.schema_version == 7
+        for reader in (JsonSerializer, YamlSerializer, PickleSerializer):
+            assert DataSerializer(reader()).deserialize(frame) == self.DATA
+
+    def test_binary_json_and_compressed_frames(self):
+        """
+        Test frames around bytes output and around a CompressingSerializer.
+        """
+        for strategy in (JsonSerializer(binary=True), CompressingSerializer(JsonSerializer(), threshold=0)):
+            frame = FramedSerializer(strategy)(self.DATA)
+            assert DataSerializer(PickleSerializer()).deserialize(frame) == self.DATA
+        compressed = FramedSerializer(CompressingSerializer(PickleSerializer(), threshold=0))(self.DATA)
+        assert read_frame_header(compressed).flags & FRAME_FLAG_COMPRESSED
+
+    def test_checksum(self):
+        """
+        Test that a corrupted payload fails the checksum, and is not checked when checksums are off.
+        """
+        frame = bytearray(FramedSerializer(JsonSerializer())(self.DATA))
+        frame[-3] ^= 0x01
+        with pytest.raises(ValueError, match='checksum'):
+            DataSerializer(JsonSerializer()).deserialize(bytes(frame))
+        unchecked = FramedSerializer(JsonSerializer(), checksum=False)(self.DATA)
+        assert read_frame_header(unchecked).checksum == 0
+
+    def test_truncated_and_bad_frames(self):
+        """
+        Test that truncated frames and unknown strategy ids raise ValueError.
+        """
+        frame = FramedSerializer(JsonSerializer())(self.DATA)
+        with pytest.raises(ValueError):
+            DataSerializer(JsonSerializer()).deserialize(frame[:-1])
+        with pytest.raises(ValueError):
+            decode_frame(frame[:FRAME_HEADER_SIZE - 1])
+        with pytest.raises(ValueError):
+            unframe(frame[:3] + b'\x01\xfe' + frame[5:])
+
+    def test_back_to_back_frames(self):
+        """
+        Test that many frames in one buffer are decoded in order, with zero-copy payload views.
+        """
+        items = [{'id': i} for i in range(5)]
+        writers = [FramedSerializer(JsonSerializer()), FramedSerializer(PickleSerializer())]
+        buffer = b''.join(writers[i % 2](item) for i, item in enumerate(items))
+        assert list(DataSerializer(JsonSerializer()).deserialize_frames(buffer)) == items
+        payloads = [payload for _, payload in iter_frames(buffer)]
+        assert all(isinstance(payload, memoryview) and payload.obj is buffer for payload in payloads)
+
+    def test_partial_trailing_frame(self):
+        """
+        Test that a trailing incomplete frame is left for later when allow_partial is set.
+        """
+        frame = FramedSerializer(JsonSerializer())(self.DATA)
+        buffer = frame + frame[:10]
+        assert len(list(iter_frames(buffer, allow_partial=True))) == 1
+        assert frame_size(buffer) == len(frame)
+        assert frame_size(buffer, len(frame)) is None
+        with pytest.raises(ValueError):
+            list(iter_frames(buffer))
+
+    @pytest.mark.parametrize('wrap', [
+        lambda strategy: strategy,
+        CachingSerializer,
+        lambda strategy: CachingSerializer(CompressingSerializer(strategy, threshold=0)),
+    ])
+    def test_configured_strategy_decodes_frames(self, wrap):
+        """
+        Test that frames are decoded with the configured strategy behind caching and compressing wrappers, so the
+        safe YAML loader still refuses python object tags instead of the registered default loading them.
+        """
+        frame = FramedSerializer(YamlSerializer())((1, 2))
+        with pytest.raises(yaml.constructor.ConstructorError):
+            FramedSerializer(wrap(YamlSerializer(loader='safe')))(frame, deserialize=True)
+        with pytest.raises(yaml.constructor.ConstructorError):
+            DataSerializer(FramedSerializer(wrap(YamlSerializer(loader='safe')))).deserialize(frame)
+
+    def test_unframeable_strategy(self):
+        """
+        Test that a strategy without a strategy_id cannot be framed.
+        """
+        class Anonymous(JsonSerializer):
+            """ A strategy that opts out of framing"""
+            strategy_id = None
+
+        with pytest.raises(ValueError):
+            FramedSerializer(Anonymous())
+
+    def test_register_strategy(self):
+        """
+        Test that frames from a newly registered strategy id are decoded by its factory.
+        """
+        # pylint: disable=protected-access
+        class Sorted(JsonSerializer):
+            """ A JSON strategy with its own id"""
+            strategy_id = 200
+
+        register_strategy(200, Sorted)
+        try:
+            frame = FramedSerializer(Sorted(sort_keys=True))(self.DATA)
+            assert isinstance(strategy_for_id(200), Sorted)
+            assert DataSerializer(YamlSerializer()).deserialize(frame) == self.DATA
+        finally:
+            _STRATEGY_FACTORIES.pop(200)
+            _STRATEGY_INSTANCES.pop(200, None)
+
+
+class TestOutOfBandPickle:
+    """
+    Test cases for protocol 5 out-of-band pickling and MultipartPayload.
+
+    This class checks that large buffers are kept out of the pickle stream without copying, and that multi-part
+    payloads survive writev, sendmsg and copying into a shared buffer.
+    """
+
+    BLOB = bytes(range(256)) * 1024
+
+    @pytest.fixture
+    def data(self):
+        """
+        Pytest fixture for a structure holding large bytes and bytearray buffers and small values.
+        """
+        return {'blob': self.BLOB, 'array': bytearray(self.BLOB), 'small': b'tiny', 'meta': {'n': 1}}
+
+    def test_large_buffers_out_of_band(self, data):
+        """
+        Test that large buffers become separate zero-copy parts and the main stream stays small.
+        """
+        payload = DataSerializer(PickleSerializer()).serialize_parts(data)
+        assert len(payload) == 3
+        assert payload.parts[0].nbytes < 1024
+        assert payload.parts[1].obj is data['blob']
+        assert payload.parts[2].obj is data['array']
+        assert DataSerializer(PickleSerializer()).deserialize_parts(payload) == data
+
+    def test_received_buffers_reused(self, data):
+        """
+        Test that out-of-band buffers handed back as the matching type are used without a copy.
+        """
+        serializer = PickleSerializer()
+        parts = serializer.to_parts(data)
+        received = [bytes(parts[0]), bytes(parts[1]), bytearray(parts[2])]
+        result = serializer.from_parts(received)
+        assert result['blob'] is received[1]
+        assert result['array'] is received[2]
+
+    def test_stream_read_in_place(self, data):
+        """
+        Test that the pickle stream is unpickled from views of the received buffer rather than a copy of it.
+        """
+        # pylint: disable=protected-access
+        serializer = PickleSerializer(oob_min_size=len(self.BLOB) + 1)
+        stream, = serializer.to_parts(data)
+        received = bytearray(8) + stream
+        reader = serialization_utils._BufferReader(memoryview(received)[8:])
+        assert reader.read(4).obj is received and bytes(reader.peek()) == bytes(stream[4:])
+        assert serializer.from_parts([memoryview(received)[8:]]) == data
+
+    def test_oob_min_size(self, data):
+        """
+        Test that buffers below oob_min_size stay in band.
+        """
+        assert len(PickleSerializer(oob_min_size=len(self.BLOB) + 1).to_parts(data)) == 1
+
+    @pytest.mark.parametrize('strategy', [JsonSerializer, YamlSerializer, CborSerializer])
+    def test_single_part_strategies(self, strategy):
+        """
+        Test that strategies without out-of-band support round trip as one part.
+        """
+        if strategy is CborSerializer:
+            pytest.importorskip('cbor2')
+        data_serializer = DataSerializer(strategy())
+        payload = data_serializer.serialize_parts({'a': [1, 2]})
+        assert len(payload) == 1
+        assert data_serializer.deserialize_parts(payload) == {'a': [1, 2]}
+
+    def test_write_into_and_from_buffer(self, data):
+        """
+        Test copying a payload into a buffer and reading it back as views.
+        """
+        payload = DataSerializer(PickleSerializer()).serialize_parts(data)
+        buffer = bytearray(len(payload.header()) + payload.nbytes + 8)
+        assert payload.write_into(buffer, offset=8) == len(buffer) - 8
+        restored = MultipartPayload.from_buffer(buffer, offset=8)
+        assert all(part.obj is buffer for part in restored.parts)
+        assert DataSerializer(PickleSerializer()).deserialize_parts(restored) == data
+
+    @pytest.mark.skipif(not hasattr(os, 'writev'), reason='needs os.writev')
+    def test_writev_pipe(self, data):
+        """
+        Test writing a payload to a pipe with writev and reading it back from the stream.
+        """
+        payload = DataSerializer(PickleSerializer()).serialize_parts(data)
+        read_fd, write_fd = os.pipe()
+        with open(read_fd, 'rb') as reader:
+            writer = threading.Thread(target=lambda: (payload.writev(write_fd), os.close(write_fd)))
+            writer.start()
+            restored = MultipartPayload.read(reader)
+            writer.join()
+        assert DataSerializer(PickleSerializer()).deserialize_parts(restored) == data
+
+    @pytest.mark.skipif(not hasattr(socket.socket, 'sendmsg'), reason='needs socket.sendmsg')
+    def test_sendmsg_socket(self, data):
+        """
+        Test sending a payload over a socket pair with sendmsg.
+        """
+        payload = DataSerializer(PickleSerializer()).serialize_parts(data)
+        left, right = socket.socketpair()
+        with left, right, right.makefile('rb') as reader:
+            sender = threading.Thread(target=payload.sendmsg, args=(left,))
+            sender.start()
+            restored = MultipartPayload.read(reader)
+            sender.join()
+        assert DataSerializer(PickleSerializer()).deserialize_parts(restored) == data
+
+    def test_bad_magic(self):
+        """
+        Test that a buffer that is not a multipart payload raises ValueError.
+        """
+        with pytest.raises(ValueError):
+            MultipartPayload.from_buffer(b'\x00\x00\x00\x00\x00\x00\x00')
+
+
+class TestCachingSerializer:
+    """
+    Test cases for the CachingSerializer wrapper.
+
+    This class checks cache hits on both sides, LRU and byte based eviction, explicit keys, frozen results and
+    concurrent use from several threads.
+    """
+
+    class CountingSerializer(JsonSerializer):
+        """
+        A JSON strategy that counts the calls reaching it.
+        """
+
+        def __init__(self):
+            """
+            Initialize the call counter.
+            """
+            super().__init__()
+            self.calls = 0
+
+        def __call__(self, data, deserialize=False):
+            """
+            Count the call and delegate to JsonSerializer.
+            """
+            self.calls += 1
+            return super().__call__(data, deserialize)
+
+    def test_serialize_cache_hits(self):
+        """
+        Test that equal content is serialized once and counted as hits.
+        """
+        inner = self.CountingSerializer()
+        data_serializer = DataSerializer(CachingSerializer(inner))
+        first = data_serializer.serialize({'a': [1, 2]})
+        assert data_serializer.serialize({'a': [1, 2]}) == first
+        assert inner.calls == 1
+        stats = data_serializer.serializing_strategy.serialize_stats
+        assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+    def test_deserialize_cache_returns_frozen_result(self):
+        """
+        Test that repeated blobs are decoded once and the shared result is read-only.
+        """
+        inner = self.CountingSerializer()
+        caching = CachingSerializer(inner)
+        first = caching('{"a": [1, {"b": 2}]}', deserialize=True)
+        second = caching(b'{"a": [1, {"b": 2}]}', deserialize=True)
+        assert first is second
+        assert inner.calls == 1
+        assert first == {'a': (1, {'b': 2})}
+        with pytest.raises(TypeError):
+            first['a'] = 1
+        assert caching.deserialize_stats.hits == 1
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted when max_entries is reached.
+        """
+        caching = CachingSerializer(JsonSerializer(), max_entries=2)
+        caching([1])
+        caching([2])
+        caching([1])
+        caching([3])
+        assert caching.serialize_stats.evictions == 1
+        caching([1])
+        assert caching.serialize_stats.hits == 2
+        caching([2])
+        assert caching.serialize_stats.misses == 4
+
+    def test_max_bytes_eviction(self):
+        """
+        Test that the total size of cached payloads stays under max_bytes and oversized ones are not cached.
+        """
+        caching = CachingSerializer(JsonSerializer(), max_bytes=20)
+        caching('x' * 10)
+        caching('y' * 10)
+        assert caching.serialize_stats.evictions == 1
+        assert caching.serialize_stats.nbytes <= 20
+        caching('z' * 40)
+        assert caching.serialize_stats.entries == 1
+
+    def test_explicit_and_custom_keys(self):
+        """
+        Test explicit keys, a custom key function and bypassing with a None key.
+        """
+        inner = self.CountingSerializer()
+        caching = CachingSerializer(inner, key_func=lambda data: data.get('id'))
+        assert caching.serialize_with_key({'v': 1}, 'k') == caching.serialize_with_key({'v': 2}, 'k')
+        caching({'id': 7, 'v': 1})
+        caching({'id': 7, 'v': 1})
+        caching({'v': 1})
+        caching({'v': 1})
+        assert inner.calls == 4
+
+    def test_unpicklable_data_bypasses_cache(self):
+        """
+        Test that data the content key cannot digest is serialized without caching.
+        """
+        assert content_key(threading.Lock()) is None
+        caching = CachingSerializer(YamlSerializer())
+        assert caching(['a']) == YamlSerializer()(['a'])
+
+    def test_thread_safety(self):
+        """
+        Test concurrent serialize and deserialize calls from several threads.
+        """
+        caching = CachingSerializer(JsonSerializer(), max_entries=8)
+        items = [{'id': i % 12} for i in range(2000)]
+        results = DataSerializer(caching).serialize_many(items, pool='thread', max_workers=8)
+        assert results == [JsonSerializer()(item) for item in items]
+        assert DataSerializer(caching).deserialize_many(results, pool='thread', max_workers=8) == items
+        stats = caching.serialize_stats
+        assert stats.hits + stats.misses == len(items)
+        assert stats.entries <= 8
+
+    def test_process_pool(self):
+        """
+        Test that the wrapper can be shipped to process pool workers.
+        """
+        data_serializer = DataSerializer(CachingSerializer(PickleSerializer()))
+        assert data_serializer.serialize_many([[1], [1]], pool='process') == [PickleSerializer()([1])] * 2
+
+    def test_freeze(self):
+        """
+        Test the freeze helper on nested structures.
+        """
+        frozen = freeze({'a': [1, {2, 3}], 'b': {'c': []}})
+        assert frozen == {'a': (1, frozenset({2, 3})), 'b': {'c': ()}}
+        assert isinstance(frozen['b'], types.MappingProxyType)
+
+
+class TestAsyncSerialization:
+    """
+    Test cases for the asyncio API of DataSerializer.
+
+    This class checks that small payloads run inline, large ones in the executor, and that frames travel over
+    asyncio streams.
+    """
+
+    class RecordingExecutor(concurrent.futures.ThreadPoolExecutor):
+        """
+        A thread pool that counts the calls submitted to it.
+        """
+
+        def __init__(self):
+            """
+            Initialize the pool and the counter.
+            """
+            super().__init__(max_workers=2)
+            self.submitted = 0
+
+        def submit(self, fn, /, *args, **kwargs):
+            """
+            Count the call and submit it.
+            """
+            self.submitted += 1
+            return super().submit(fn, *args, **kwargs)
+
+    def test_small_inline_large_offloaded(self):
+        """
+        Test that payloads under the threshold run inline and larger ones in the executor.
+        """
+        async def scenario():
+            with self.RecordingExecutor() as executor:
+                data_serializer = DataSerializer(JsonSerializer(), executor=executor, offload_threshold=1000)
+                small = await data_serializer.aserialize({'a': 1})
+                assert await data_serializer.adeserialize(small) == {'a': 1}
+                assert executor.submitted == 0
+                large = {'rows': ['x' * 100] * 50}
+                blob = await data_serializer.aserialize(large)
+                assert await data_serializer.adeserialize(blob) == large
+                assert executor.submitted == 2
+
+        asyncio.run(scenario())
+
+    def test_process_pool_executor(self):
+        """
+        Test offloading to a process pool.
+        """
+        async def scenario():
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+                data_serializer = DataSerializer(PickleSerializer(), executor=executor, offload_threshold=0)
+                blob = await data_serializer.aserialize([1, 2])
+                assert await data_serializer.adeserialize(blob) == [1, 2]
+                frame = FramedSerializer(PickleSerializer())([3])
+                assert await data_serializer.adeserialize(frame) == [3]
+
+        asyncio.run(scenario())
+
+    def test_frames_over_streams(self):
+        """
+        Test writing frames with adump and reading them back with aload and aiter_frames over a socket.
+        """
+        items = [{'id': i, 'pad': 'y' * (i * 200)} for i in range(6)]
+
+        async def scenario():
+            received = []
+
+            async def handle(reader, writer):
+                reader_serializer = DataSerializer(YamlSerializer(), offload_threshold=500)
+                received.append(await reader_serializer.aload(reader))
+                async for item in reader_serializer.aiter_frames(reader):
+                    received.append(item)
+                writer.close()
+
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                data_serializer = DataSerializer(CompressingSerializer(JsonSerializer()), offload_threshold=500)
+                for item in items:
+                    await data_serializer.adump(item, writer, schema_version=2)
+                writer.write_eof()
+                await reader.read()
+                writer.close()
+                await writer.wait_closed()
+            return received
+
+        assert asyncio.run(scenario()) == items
+
+    def test_aload_truncated_stream(self):
+        """
+        Test that a stream ending inside a frame raises IncompleteReadError.
+        """
+        async def scenario():
+            reader = asyncio.StreamReader()
+            reader.feed_data(FramedSerializer(JsonSerializer())([1, 2, 3])[:-2])
+            reader.feed_eof()
+            with pytest.raises(asyncio.IncompleteReadError):
+                await DataSerializer(JsonSerializer()).aload(reader)
+            reader = asyncio.StreamReader()
+            reader.feed_data(FramedSerializer(JsonSerializer())([1])[:5])
+            reader.feed_eof()
+            with pytest.raises(asyncio.IncompleteReadError):
+                _ = [item async for item in DataSerializer(JsonSerializer()).aiter_frames(reader)]
+
+        asyncio.run(scenario())
+
+    def test_estimate_size(self):
+        """
+        Test the size estimate on flat, nested and oversized structures.
+        """
+        assert estimate_size('x' * 100, 1000) == 100
+        assert estimate_size({'a': ['b' * 50, b'c' * 50]}, 1000) > 100
+        assert estimate_size(list(range(10 ** 6)), 1000) >= 1000
+
+
+class TestSerializerMetrics:
+    """
+    Test cases for the DataSerializer instrumentation hooks and sinks.
+    """
+
+    def test_disabled_by_default(self):
+        """
+        Test that a DataSerializer has no metrics unless given some.
+        """
+        assert DataSerializer(JsonSerializer()).metrics is None
+
+    def test_in_memory_metrics(self):
+        """
+        Test counts, byte sizes, latency histograms and errors per strategy and operation.
+        """
+        sink = InMemoryMetrics()
+        metrics = SerializerMetrics(sink)
+        json_serializer = DataSerializer(JsonSerializer(), metrics=metrics)
+        pickle_serializer = DataSerializer(PickleSerializer(), metrics=metrics)
+        blob = json_serializer.serialize({'key': 'value'})
+        json_serializer.serialize({'key': 'value'})
+        assert json_serializer.deserialize(blob) == {'key': 'value'}
+        with pytest.raises(ValueError):
+            json_serializer.deserialize('{broken')
+        pickle_serializer.serialize_many([1, 2, 3])
+
+        snapshot = sink.snapshot()
+        serialize = snapshot['JsonSerializer']['serialize']
+        assert serialize['calls'] == 2 and serialize['nbytes'] == 2 * len(blob) and serialize['errors'] == 0
+        assert sum(serialize['histogram'].values()) == 2
+        assert serialize['p50'] <= serialize['p99']
+        deserialize = snapshot['JsonSerializer']['deserialize']
+        assert deserialize['calls'] == 2 and deserialize['errors'] == 1
+        assert deserialize['nbytes'] == len(blob) + len('{broken')
+        assert snapshot['PickleSerializer']['serialize_many']['items'] == 3
+        assert repr(sink) == 'InMemoryMetrics(calls=5)'
+        sink.reset()
+        assert not sink.snapshot()
+
+    def test_callback_and_streams(self):
+        """
+        Test a plain callback sink on the stream and async methods.
+        """
+        events = []
+        serializer = DataSerializer(JsonSerializer(), metrics=SerializerMetrics(events.append))
+        stream = io.StringIO()
+        serializer.dump([1, 2], stream)
+        stream.seek(0)
+        assert serializer.load(stream) == [1, 2]
+        assert asyncio.run(serializer.adeserialize(asyncio.run(serializer.aserialize([3])))) == [3]
+        assert serializer.deserialize_many(['[4]']) == [[4]]
+        assert [event.operation for event in events] == ['dump', 'load', 'aserialize', 'adeserialize',
+                                                         'deserialize_many']
+        assert all(isinstance(event, MetricEvent) and event.strategy == 'JsonSerializer' for event in events)
+        assert events[2].nbytes == len('[3]')
+
+    def test_byte_counts(self):
+        """
+        Test that sizes are in bytes for non-ASCII text, and that dump and load count the bytes the stream moved.
+        """
+        events = []
+        serializer = DataSerializer(JsonSerializer(), metrics=SerializerMetrics(events.append))
+        data = {'name': 'Zoë ✓'}
+        blob = '{"name": "Zoë ✓"}'
+        serializer.deserialize(blob)
+        serializer.deserialize_many([blob, blob])
+        stream = io.BytesIO()
+        serializer.dump(data, stream)
+        stream.seek(0)
+        serializer.load(stream)
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as text:
+            serializer.dump(data, text)
+            text.seek(0)
+            serializer.load(text)
+        serializer.dump(data, io.StringIO())
+        size = len(blob.encode('utf-8'))
+        assert size == len(blob) + 3
+        dumped = len(stream.getvalue())
+        assert [event.nbytes for event in events] == [size, 2 * size, dumped, dumped, dumped, dumped, None]
+
+    def test_logging_sink(self, caplog):
+        """
+        Test that the logging sink logs calls and failures.
+        """
+        serializer = DataSerializer(JsonSerializer(), metrics=SerializerMetrics(LoggingMetricsSink()))
+        with caplog.at_level(logging.DEBUG, logger='lib.serialization_utils'):
+            serializer.serialize([1])
+            with pytest.raises(ValueError):
+                serializer.deserialize('[')
+        assert 'JsonSerializer serialize 1 items, 3 bytes' in caplog.records[0].getMessage()
+        assert caplog.records[1].levelno == logging.WARNING
+
+    def test_slow_call_sampler(self):
+        """
+        Test that only calls over the threshold are captured, with their size and calling stack.
+        """
+        captured = []
+        sampler = SlowCallSampler(0.0, max_samples=2, callback=captured.append)
+        never = SlowCallSampler(60.0)
+        serializer = DataSerializer(PickleSerializer(), metrics=SerializerMetrics(sampler, never))
+        for value in range(3):
+            serializer.serialize(value)
+        assert len(sampler.samples) == 2 and len(captured) == 3
+        assert sampler.samples[0].event.nbytes > 0
+        assert any('test_slow_call_sampler' in frame for frame in sampler.samples[0].stack)
+        assert not never.samples
+
+    def test_sampling_and_sink_errors(self):
+        """
+        Test that sampling skips calls and that a failing sink never breaks serialization.
+        """
+        def broken(event):
+            raise RuntimeError(event)
+
+        events = []
+        metrics = SerializerMetrics(broken, events.append, sample_rate=0.5)
+        serializer = DataSerializer(JsonSerializer(), metrics=metrics)
+        for value in range(200):
+            assert serializer.serialize(value) == str(value)
+        assert 0 < len(events) < 200
+        assert metrics.sink_errors == len(events)
+
+
+class TestImportTime:
+    """
+    Test cases for the import cost of lib.serialization_utils.
+
+    Short-lived workers import this module on every start, so the strategy backends must not be imported until a
+    strategy needs them. Each test imports the module in a fresh interpreter.
+    """
+
+    # modules only loaded when a strategy, codec, pool or async method first needs them
+    LAZY = ['asyncio', 'cbor2', 'concurrent.futures.process', 'lz4', 'msgpack', 'orjson', 'pickle', 'rapidjson',
+            'socket', 'ujson', 'yaml', 'zstandard']
+    # time spent importing other modules while importing lib.serialization_utils, in microseconds
+    BUDGET_US = 60000
+
+    @staticmethod
+    def run_python(*args):
+        """ Run the interpreter from the repository root and return its stdout and stderr"""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, *args], cwd=root, capture_output=True, text=True, check=True)
+        return result.stdout, result.stderr
+
+    def test_import_budget(self):
+        """
+        Test that python -X importtime shows no lazy backend imported, and the imports stay within the budget.
+        """
+        _, report = self.run_python('-X', 'importtime', '-c', 'import lib.serialization_utils')
+        timings = {}
+        for line in report.splitlines():
+            if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+                own, cumulative, name = line[len('import time:'):].split('|')
+                timings[name.strip()] = int(own), int(cumulative)
+        assert [name for name in self.LAZY if name in timings] == []
+        own, cumulative = timings['lib.serialization_utils']
+        assert cumulative - own < self.BUDGET_US, report
+
+    def test_backends_load_on_first_use(self):
+        """
+        Test that a backend is imported by the first strategy using it and rebinds the module global.
+        """
+        script = '; '.join([
+            'import sys',
+            'import lib.serialization_utils as su',
+            'print(int("yaml" in sys.modules), int("msgpack" in sys.modules))',
+            'su.YamlSerializer()({"a": 1})',
+            'print(int("yaml" in sys.modules), int(su.yaml is sys.modules["yaml"]), int("pickle" in sys.modules))',
+        ])
+        before, after = self.run_python('-c', script)[0].split('\n')[:2]
+        assert before == '0 0'
+        assert after == '1 1 0'
+
+    def test_missing_backend(self):
+        """
+        Test that a package that is not installed is reported as None, and an imported one is returned as is.
+        """
+        assert serialization_utils._lazy_import('no_such_backend_package') is None
+        assert serialization_utils._lazy_import('no_such_backend_package.frame') is None
+        assert serialization_utils._lazy_import('json') is json
@@ -0,0 +1,163 @@
+""" Unit tests for the shm_utils module. """
+import multiprocessing
+import os
+
+import pytest
+
+from lib.serialization_utils import DataSerializer, JsonSerializer, PickleSerializer
+from lib.shm_utils import SHM_DIR, SharedRingBuffer, SharedSegment, load_object, share_object
+
+
+def produce(ring_name: str, object_name: str, count: int):
+    """ Child process: send the shared object back, then count records, through the ring"""
+    serializer = DataSerializer(PickleSerializer())
+    with SharedRingBuffer.attach(ring_name, serializer) as ring:
+        ring.put(load_object(object_name, serializer))
+        for index in range(count):
+            ring.put({'index': index, 'blob': bytes(index % 300)})
+        ring.finish()
+
+
+class TestSharedSegment:
+    """
+    Test cases for SharedSegment and the object exchange functions.
+
+    This class covers reference counting, unlinking by the last release, and loading with and without copies.
+    """
+
+    def test_reference_counting(self):
+        """
+        Test that each attach adds a reference and that the segment is unlinked by the last release only.
+        """
+        segment = SharedSegment.create(100)
+        path = os.path.join(SHM_DIR, segment.name)
+        with SharedSegment.attach(segment.name) as other:
+            assert segment.refcount == other.refcount == 2
+            other.buf[:5] = b'hello'
+            assert bytes(segment.buf[:5]) == b'hello'
+        assert segment.refcount == 1
+        with SharedSegment.attach(segment.name) as other:
+            segment.release()
+            segment.release()
+            assert os.path.exists(path) and other.refcount == 1
+        assert not os.path.exists(path)
+        with pytest.raises(FileNotFoundError):
+            SharedSegment.attach(segment.name)
+
+    def test_share_and_load(self):
+        """
+        Test that objects round trip by name, and that out of band buffers are only aliased when asked to.
+        """
+        numpy = pytest.importorskip('numpy')
+        serializer = DataSerializer(PickleSerializer())
+        data = {'array': numpy.arange(1000), 'text': 'cidw', 'blob': b'x' * 10000}
+        with share_object(data, serializer) as segment:
+            result = load_object(segment.name, serializer)
+            assert result['text'] == 'cidw' and result['blob'] == data['blob']
+            assert numpy.array_equal(result['array'], data['array'])
+            assert segment.refcount == 1
+            consumer = SharedSegment.attach(segment.name)
+            result = consumer.load(serializer)
+            assert numpy.array_equal(result['array'], data['array'])
+            with pytest.raises(BufferError):
+                consumer.release()
+            assert segment.refcount == 2 and not consumer.closed
+            assert consumer.buf.nbytes == segment.buf.nbytes
+            del result
+            consumer.release()
+            assert segment.refcount == 1
+        text = DataSerializer(JsonSerializer())
+        with share_object([1, 'two', None], text, name=f'test_shm_{os.getpid()}') as segment:
+            assert segment.name == f'test_shm_{os.getpid()}'
+            assert load_object(segment.name, text) == [1, 'two', None]
+
+    def test_rejects_other_segments(self):
+        """
+        Test that segments without the header are refused, and rings are not loaded as objects.
+        """
+        from multiprocessing import shared_memory
+        plain = shared_memory.SharedMemory(create=True, size=128)
+        try:
+            with pytest.raises(ValueError, match='not a version 1 shared segment'):
+                SharedSegment.attach(plain.name)
+        finally:
+            plain.close()
+            plain.unlink()
+        with SharedSegment.create(64) as segment:
+            with pytest.raises(ValueError, match='does not hold a ring buffer'):
+                SharedRingBuffer(segment, DataSerializer(PickleSerializer()))
+            assert repr(segment) == f"SharedSegment(name='{segment.name}', size={segment.buf.nbytes})"
+        assert repr(segment) == f"SharedSegment(name='{segment.name}', closed=True)"
+
+
+class TestSharedRingBuffer:
+    """
+    Test cases for SharedRingBuffer.
+
+    This class covers wrapping around the end of the ring, waiting while full or empty, finishing the stream, and a
+    producer in another process.
+    """
+
+    def test_wrap_around(self):
+        """
+        Test that records of every size come back in order as they wrap around a small ring.
+        """
+        with SharedRingBuffer.create(512, DataSerializer(JsonSerializer())) as ring:
+            records = [{'index': index, 'pad': 'x' * (index % 90)} for index in range(200)]
+            for first, second in zip(records[::2], records[1::2]):
+                assert ring.put(first, timeout=1) % 8 == 0 and ring.put(second, timeout=1) % 8 == 0
+                assert ring.pending > 0
+                assert (ring.get(timeout=1), ring.get(timeout=1)) == (first, second)
+            assert ring.pending == 0
+
+    def test_full_empty_and_finished(self):
+        """
+        Test the timeouts while full and empty, oversized records, and that finishing ends iteration once drained.
+        """
+        with SharedRingBuffer.create(128, DataSerializer(PickleSerializer())) as ring:
+            with pytest.raises(TimeoutError):
+                ring.get(timeout=0.01)
+            with pytest.raises(ValueError, match='does not fit'):
+                ring.put(bytes(200))
+            with pytest.raises(ValueError, match='too large'):
+                SharedRingBuffer.create(1 << 32, DataSerializer(PickleSerializer()))
+            ring.put(bytes(50))
+            with pytest.raises(TimeoutError):
+                ring.put(bytes(50), timeout=0.01)
+            ring.finish()
+            assert list(ring) == [bytes(50)]
+            with pytest.raises(EOFError):
+                ring.get()
+            assert repr(ring) == f"SharedRingBuffer(name='{ring.name}', capacity=128, out_of_band=False)"
+
+    def test_out_of_band(self):
+        """
+        Test that out-of-band buffers are copied out of the ring, so later records do not overwrite them.
+        """
+        numpy = pytest.importorskip('numpy')
+        with SharedRingBuffer.create(1 << 14, DataSerializer(PickleSerializer()), out_of_band=True) as ring:
+            ring.put({'array': numpy.arange(1000)})
+            first = ring.get()
+            for _ in range(10):
+                ring.put({'array': numpy.zeros(1000, numpy.int64)})
+                ring.get()
+            assert numpy.array_equal(first['array'], numpy.arange(1000))
+            assert repr(ring).endswith('out_of_band=True)')
+
+    def test_other_process(self):
+        """
+        Test a stream from a producer process attached by name, which also loads a shared object.
+        """
+        serializer = DataSerializer(PickleSerializer())
+        data = {'blob': bytearray(range(256)) * 100}
+        ring = SharedRingBuffer.create(1 << 16, serializer, out_of_band=True)
+        with share_object(data, serializer) as segment, ring:
+            process = multiprocessing.get_context('fork').Process(target=produce,
+                                                                  args=(ring.name, segment.name, 500))
+            process.start()
+            assert ring.get(timeout=10) == data
+            records = list(ring)
+            process.join(10)
+            assert process.exitcode == 0
+            assert records == [{'index': index, 'blob': bytes(index % 300)} for index in range(500)]
+            assert ring.segment.refcount == 1 and segment.refcount == 1